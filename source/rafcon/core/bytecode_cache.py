@@ -0,0 +1,127 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: bytecode_cache
+   :synopsis: A cache of the compiled code of the scripts of execution states
+
+The code objects are cached by the hash of the script text, so that scripts with the same text, e.g. of the copies of
+a library, are only compiled once. The code is compiled with a neutral file name, which is replaced by the file name
+of the script, when the code is handed out. In addition to the cache in memory, the code can be stored in a cache
+folder (config value ``USE_SCRIPT_BYTECODE_CACHE``), similar to the ``.pyc`` files of Python, so that scripts are not
+compiled again after a restart of RAFCON.
+If the file name of code objects cannot be replaced, as for Python versions before 3.8, scripts are always compiled.
+"""
+
+import os
+import marshal
+import hashlib
+import types
+from collections import OrderedDict
+from threading import Lock
+
+from rafcon.core.config import global_config
+from rafcon.utils.constants import RAFCON_TEMP_PATH_CACHE
+from rafcon.utils.filesystem import write_file_atomically, create_private_folder
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+try:
+    from importlib.util import MAGIC_NUMBER
+except ImportError:  # Python 2
+    from imp import get_magic
+    MAGIC_NUMBER = get_magic()
+
+#: Maximal number of code objects cached in memory
+MEMORY_CACHE_SIZE = 1000
+
+_CACHED_CODE_FILENAME = "<rafcon script>"
+_can_replace_filename = hasattr(types.CodeType, 'replace')
+
+_cache_lock = Lock()
+_memory_cache = OrderedDict()  # hash of the script text -> code object, the least recently used first
+
+
+def get_bytecode_cache_path():
+    """Returns the folder of the bytecode cache as configured by ``SCRIPT_BYTECODE_CACHE_PATH``
+
+    :rtype: str
+    """
+    cache_path = global_config.get_config_value("SCRIPT_BYTECODE_CACHE_PATH", "%RAFCON_TEMP_PATH_CACHE/scripts")
+    if cache_path.startswith('%RAFCON_TEMP_PATH_CACHE'):
+        cache_path = cache_path.replace('%RAFCON_TEMP_PATH_CACHE', RAFCON_TEMP_PATH_CACHE)
+    return os.path.abspath(os.path.expandvars(os.path.expanduser(cache_path)))
+
+
+def compile_script(script_text, filename):
+    """Compiles the text of a script, using the cached code if the same text was compiled before
+
+    :param str script_text: the source code of the script
+    :param str filename: the file name of the code, as shown in tracebacks
+    :return: the code object
+    :raises SyntaxError: if the script text is not valid
+    """
+    if not _can_replace_filename:
+        return compile(script_text, filename, 'exec')
+    source_hash = hashlib.sha256(script_text.encode('utf-8')).hexdigest()
+    with _cache_lock:
+        code = _memory_cache.pop(source_hash, None)
+        if code is not None:
+            _memory_cache[source_hash] = code
+    if code is None:
+        code = _compile_with_file_cache(script_text, source_hash)
+        with _cache_lock:
+            _memory_cache[source_hash] = code
+            while len(_memory_cache) > MEMORY_CACHE_SIZE:
+                _memory_cache.popitem(last=False)
+    return _replace_filename(code, filename)
+
+
+def clear_bytecode_cache():
+    """Removes all code objects from the cache in memory and from the cache folder"""
+    with _cache_lock:
+        _memory_cache.clear()
+    cache_path = get_bytecode_cache_path()
+    if os.path.isdir(cache_path):
+        for file_name in os.listdir(cache_path):
+            if file_name.endswith('.rafconc'):
+                os.remove(os.path.join(cache_path, file_name))
+
+
+def _compile_with_file_cache(script_text, source_hash):
+    if not global_config.get_config_value("USE_SCRIPT_BYTECODE_CACHE", False):
+        return compile(script_text, _CACHED_CODE_FILENAME, 'exec')
+    cache_path = get_bytecode_cache_path()
+    if not create_private_folder(cache_path):
+        logger.warning("The script bytecode cache is not used, as its folder is not owned and exclusively writable by "
+                       "the current user: {0}".format(cache_path))
+        return compile(script_text, _CACHED_CODE_FILENAME, 'exec')
+    cache_file_path = os.path.join(cache_path, source_hash + '.rafconc')
+    try:
+        with open(cache_file_path, 'rb') as cache_file:
+            data = cache_file.read()
+        if data.startswith(MAGIC_NUMBER):
+            return marshal.loads(data[len(MAGIC_NUMBER):])
+    except (IOError, OSError):
+        pass
+    except (EOFError, ValueError, TypeError) as e:
+        logger.debug("Invalid bytecode cache file {0}: {1}".format(cache_file_path, e))
+
+    code = compile(script_text, _CACHED_CODE_FILENAME, 'exec')
+    try:
+        write_file_atomically(cache_file_path, MAGIC_NUMBER + marshal.dumps(code), mode='wb')
+    except (IOError, OSError) as e:
+        logger.debug("The bytecode of a script cannot be cached: {0}".format(e))
+    return code
+
+
+def _replace_filename(code, filename):
+    """Replaces the file name of a code object and of all code objects it contains, e.g. of functions"""
+    constants = tuple(_replace_filename(constant, filename) if isinstance(constant, types.CodeType) else constant
+                      for constant in code.co_consts)
+    return code.replace(co_filename=filename, co_consts=constants)
@@ -20,6 +20,11 @@ from builtins import filter
 import functools
 import itertools
 
+from gtkmvc3.observable import Observable
+
+from rafcon.core.execution.execution_event_bus import get_active_execution_event_bus, ExecutionEvent
+from rafcon.core.execution.execution_profile import production_profile_active
+
 
 def wraps_safely(obj, attr_names=functools.WRAPPER_ASSIGNMENTS):
     # Solves problem with missing attributes: http://stackoverflow.com/a/28752007
@@ -60,3 +65,46 @@ def lock_state_machine(func):
                 global_lock_counter -= 1
         return return_value
     return func_wrapper
+
+
+def lock_scoped_data(func):
+    """Decorate methods changing the scoped data of a container state during execution
+
+    The scoped data is runtime data and thus not protected by the modification lock of the state machine, which is
+    reserved for structural edits. Instead, the changes are serialized with the scoped data lock of the container
+    state, so that concurrent branches of a state machine do not block each other.
+    """
+    @wraps_safely(func)
+    def func_wrapper(self, *args, **kwargs):
+        with self._scoped_data_lock:
+            return func(self, *args, **kwargs)
+    return func_wrapper
+
+
+def observed_execution_event(coalesce, skipped_in_production=True):
+    """Decorate observed methods, which are called during execution
+
+    Like :meth:`gtkmvc3.observable.Observable.observed`, the observers are notified about calls of the method. If the
+    execution event bus has subscribers, the call is published to the bus instead, so that the executing thread is not
+    blocked by the observers. With the production execution profile, the observers are not notified at all, unless
+    skipped_in_production is False.
+
+    :param bool coalesce: whether not yet dispatched calls of the method are replaced by newer ones
+    :param bool skipped_in_production: whether the observers are not notified with the production execution profile
+    """
+    def decorator(func):
+        observed_func = Observable.observed(func)
+
+        @wraps_safely(func)
+        def func_wrapper(self, *args, **kwargs):
+            if skipped_in_production and production_profile_active():
+                return func(self, *args, **kwargs)
+            execution_event_bus = get_active_execution_event_bus()
+            if execution_event_bus is None:
+                return observed_func(self, *args, **kwargs)
+            result = func(self, *args, **kwargs)
+            execution_event_bus.publish(ExecutionEvent(self, func.__name__, (self, ) + args, kwargs, result),
+                                        coalesce)
+            return result
+        return func_wrapper
+    return decorator
@@ -20,7 +20,6 @@
 """
 from future import standard_library
 standard_library.install_aliases()
-import copy
 import threading
 import time
 import queue
@@ -31,6 +30,9 @@ from gtkmvc3.observable import Observable
 from rafcon.core.execution.execution_status import ExecutionStatus
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.core.config import global_config
+from rafcon.core.decorators import observed_execution_event
+from rafcon.core.execution.execution_profile import activate_configured_profile, deactivate_profile, \
+    production_profile_active
 from rafcon.utils import log
 from rafcon.utils import plugins
 
@@ -60,9 +62,6 @@ class ExecutionEngine(Observable):
         self._run_to_states = []
         self.run_to_states = []
         self.state_machine_running = False
-        # the thread, that wants to synchronize, has to acquire the self._status.execution_condition_variable
-        # then it can read or set the synchronization_counter; this is only relevant for tests
-        self.synchronization_counter = 0
         # counts how often a state asks for the current execution status
         self.state_counter = 0
         self.state_counter_lock = Lock()
@@ -157,11 +156,8 @@ class ExecutionEngine(Observable):
         logger.debug("Stop the state machine execution ...")
         if self.state_machine_manager.get_active_state_machine() is not None:
             self.state_machine_manager.get_active_state_machine().root_state.recursively_preempt_states()
+        # releases the states waiting in step mode or those that are paused
         self.__set_execution_mode_to_stopped()
-
-        # Notifies states waiting in step mode or those that are paused about execution stop
-        with self._status.execution_condition_variable:
-            self._status.execution_condition_variable.notify_all()
         self.__running_state_machine = None
 
     def join(self, timeout=None):
@@ -188,17 +184,20 @@ class ExecutionEngine(Observable):
     def __set_execution_mode_to_stopped(self):
         """Stop and reset execution engine"""
         self.run_to_states = []
+        deactivate_profile()
         self.set_execution_mode(StateMachineExecutionStatus.STOPPED)
 
     def __set_execution_mode_to_finished(self):
         """Stop and reset execution engine"""
         self.run_to_states = []
+        deactivate_profile()
         self.set_execution_mode(StateMachineExecutionStatus.FINISHED)
 
     def _run_active_state_machine(self):
         """Store running state machine and observe its status
         """
 
+        activate_configured_profile()
         # Create new concurrency queue for root state to be able to synchronize with the execution
         self.__running_state_machine = self.state_machine_manager.get_active_state_machine()
         if not self.__running_state_machine:
@@ -227,6 +226,10 @@ class ExecutionEngine(Observable):
     def backward_step(self):
         """Take a backward step for all active states in the state machine
         """
+        if production_profile_active():
+            logger.warning("Backward steps are not possible with the production execution profile, as no execution "
+                           "history is recorded")
+            return
         logger.debug("Executing backward step ...")
         self.run_to_states = []
         self.set_execution_mode(StateMachineExecutionStatus.BACKWARD)
@@ -300,15 +303,18 @@ class ExecutionEngine(Observable):
             self.run_to_states.append(path)
             self._run_active_state_machine()
 
+    def _paused_or_in_step_mode(self):
+        return (self._status.execution_mode is StateMachineExecutionStatus.PAUSED) \
+            or (self._status.execution_mode is StateMachineExecutionStatus.STEP_MODE)
+
+    def _not_stopped(self):
+        return self._status.execution_mode is not StateMachineExecutionStatus.STOPPED
+
     def _wait_while_in_pause_or_in_step_mode(self):
         """ Waits as long as the execution_mode is in paused or step_mode
         """
-        while (self._status.execution_mode is StateMachineExecutionStatus.PAUSED) \
-                or (self._status.execution_mode is StateMachineExecutionStatus.STEP_MODE):
-            with self._status.execution_condition_variable:
-                self.synchronization_counter += 1
-                logger.verbose("Increase synchronization_counter: " + str(self.synchronization_counter))
-                self._status.execution_condition_variable.wait()
+        while self._status.execution_condition_variable.park(self._paused_or_in_step_mode):
+            pass
 
     def _wait_if_required(self, container_state, next_child_state_to_execute, woke_up_from_pause_or_step_mode):
         """ Calls a blocking wait for the calling thread, depending on the execution mode.
@@ -318,16 +324,17 @@ class ExecutionEngine(Observable):
         :param woke_up_from_pause_or_step_mode: a flag to check if the execution just woke up from paused- or step-mode
         """
         wait = True
+        container_state_path = container_state.get_path()
+        next_child_state_path = None
+        # can be None in case of no transition given
+        if next_child_state_to_execute:
+            next_child_state_path = next_child_state_to_execute.get_path()
         # if there is a state in self.run_to_states then RAFCON was commanded
         #    a) a step_over
         #    b) a step_out
         #    c) a run_until
-        for state_path in copy.deepcopy(self.run_to_states):
-            next_child_state_path = None
-            # can be None in case of no transition given
-            if next_child_state_to_execute:
-                next_child_state_path = next_child_state_to_execute.get_path()
-            if state_path == container_state.get_path():
+        for state_path in list(self.run_to_states):
+            if state_path == container_state_path:
                 # the execution did a whole step_over inside hierarchy state "state" (case a) )
                 # or a whole step_out into the hierarchy state "state" (case b) )
                 # thus we delete its state path from self.run_to_states
@@ -351,11 +358,10 @@ class ExecutionEngine(Observable):
         # don't wait if the the execution just woke up from step mode or pause
         if wait and not woke_up_from_pause_or_step_mode:
             logger.debug("Stepping mode: waiting for next step!")
-            with self._status.execution_condition_variable:
-                self.synchronization_counter += 1
-                logger.verbose("Increase synchronization_counter: " + str(self.synchronization_counter))
-                self._status.execution_condition_variable.wait()
-            # if the status was set to PAUSED or STEP_MODE don't wake up!
+            # the thread is not released if the status is set to PAUSED or STEP_MODE
+            self._status.execution_condition_variable.park(self._paused_or_in_step_mode,
+                                                           park_required=self._not_stopped)
+            # the status may have been set to PAUSED or STEP_MODE again in the meantime
             self._wait_while_in_pause_or_in_step_mode()
             # container_state was notified => thus, a new user command was issued, which has to be handled!
             container_state.execution_history.new_execution_command_handled = False
@@ -373,6 +379,9 @@ class ExecutionEngine(Observable):
         :param next_child_state_to_execute: is the next child state of :param state to be executed
         :return: the current state machine execution status
         """
+        if self._status.execution_mode is StateMachineExecutionStatus.STARTED and production_profile_active():
+            return StateMachineExecutionStatus.STARTED
+
         with self.state_counter_lock:
             self.state_counter += 1
             # logger.verbose("Increase state_counter!" + str(self.state_counter))
@@ -455,8 +464,9 @@ class ExecutionEngine(Observable):
         """
         if self._status.execution_mode is StateMachineExecutionStatus.FORWARD_OVER or \
                 self._status.execution_mode is StateMachineExecutionStatus.FORWARD_OUT:
-            for state_path in copy.deepcopy(self.run_to_states):
-                if state_path == state.get_path():
+            state_path_to_remove = state.get_path()
+            for state_path in list(self.run_to_states):
+                if state_path == state_path_to_remove:
                     logger.verbose("Modifying run_to_states; triggered by state %s!", state.name)
                     self.run_to_states.remove(state_path)
                     from rafcon.core.states.state import State
@@ -517,7 +527,7 @@ class ExecutionEngine(Observable):
 
 
 
-    @Observable.observed
+    @observed_execution_event(coalesce=False, skipped_in_production=False)
     def set_execution_mode(self, execution_mode, notify=True):
         """ An observed setter for the execution mode of the state machine status. This is necessary for the
         monitoring client to update the local state machine in the same way as the root state machine of the server.
@@ -529,8 +539,21 @@ class ExecutionEngine(Observable):
             raise TypeError("status must be of type StateMachineExecutionStatus")
         self._status.execution_mode = execution_mode
         if notify:
-            with self._status.execution_condition_variable:
-                self._status.execution_condition_variable.notify_all()
+            self._status.execution_condition_variable.release_parked_threads()
+
+    def wait_for_parked_threads(self, number_of_threads=1, timeout=None):
+        """Blocks until the execution threads parked the given number of times, waiting for the next execution command
+
+        The parked threads are counted by the synchronization counter, which is decreased by number_of_threads
+        afterwards, so that no parking is lost. With concurrent branches, number_of_threads is the number of branches,
+        which park in the current step.
+
+        :param int number_of_threads: the number of times threads have to park, which were not consumed yet
+        :param float timeout: the maximum time to wait in seconds or None to wait infinitely
+        :return: False, if a timeout occurred, True otherwise
+        :rtype: bool
+        """
+        return self._status.execution_condition_variable.wait_for_parked_threads(number_of_threads, timeout)
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc3
@@ -543,6 +566,18 @@ class ExecutionEngine(Observable):
         """
         return self._status
 
+    @property
+    def synchronization_counter(self):
+        """The number of times execution threads parked and were not yet waited for, see :meth:`wait_for_parked_threads`
+
+        """
+        return self._status.execution_condition_variable.synchronization_counter
+
+    @synchronization_counter.setter
+    def synchronization_counter(self, synchronization_counter):
+        with self._status.execution_condition_variable:
+            self._status.execution_condition_variable.synchronization_counter = synchronization_counter
+
     @property
     def run_to_states(self):
         """Property for the _run_to_states field
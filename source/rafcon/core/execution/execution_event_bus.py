@@ -0,0 +1,181 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: execution_event_bus
+   :synopsis: A bus dispatching the execution events of state machines in batches to its subscribers
+
+Changes of the execution status of states, new history items and changes of the execution mode are observed by
+gtkmvc3, which notifies all observers in the executing thread. If the execution event bus is enabled (config value
+``EXECUTION_EVENT_BUS_ENABLED``) and has subscribers, these changes are published to the bus instead. The bus
+collects the events and dispatches them in batches with the configured rate (``EXECUTION_EVENT_RATE``) in its own
+thread. Events of the same method of the same object, e.g. status changes of a state, are coalesced, so that only
+the latest one is dispatched. History items and changes of the execution mode are not coalesced.
+"""
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import threading
+import itertools
+from collections import namedtuple, OrderedDict
+
+from rafcon.core.config import global_config
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+#: An observed method call: the source is the called object, the args include the source and result is the return value
+ExecutionEvent = namedtuple('ExecutionEvent', ['source', 'method_name', 'args', 'kwargs', 'result'])
+
+
+class ExecutionEventBus(object):
+    """Collects execution events and dispatches them in batches to its subscribers
+
+    The subscribers are called with the list of events of a batch in the thread of the bus. As long as the bus has no
+    subscribers, no events are published to it.
+
+    :ivar float rate: the number of batches dispatched per second
+    """
+
+    def __init__(self, rate):
+        if rate <= 0:
+            raise ValueError("The rate of the execution event bus must be positive")
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._dispatch_lock = threading.Lock()
+        self._subscribers = []
+        # key -> event; coalesced events use the source and method name as key, all others a unique number
+        self._events = OrderedDict()
+        self._event_counter = itertools.count()
+        self._dispatcher = None
+        self._stop_dispatcher = None
+
+    @property
+    def active(self):
+        """Whether the bus has subscribers, only then events are published to it"""
+        return bool(self._subscribers)
+
+    def subscribe(self, callback):
+        """Subscribes a callback to the execution events
+
+        :param callback: a callable taking the list of :class:`ExecutionEvent` of a batch
+        """
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+            if self._dispatcher is None:
+                # events published while the last subscriber was removed are outdated
+                self._events.clear()
+                self._stop_dispatcher = threading.Event()
+                self._dispatcher = threading.Thread(target=self._dispatch_periodically, args=(self._stop_dispatcher, ),
+                                                    name="ExecutionEventBus")
+                self._dispatcher.daemon = True
+                self._dispatcher.start()
+
+    def unsubscribe(self, callback):
+        """Unsubscribes a callback, the dispatching is stopped together with the last subscriber
+
+        :param callback: a callback passed to :meth:`subscribe`
+        """
+        dispatcher = None
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+            if not self._subscribers and self._dispatcher is not None:
+                dispatcher = self._dispatcher
+                self._stop_dispatcher.set()
+                self._dispatcher = None
+                self._events.clear()
+        if dispatcher is not None and dispatcher is not threading.current_thread():
+            dispatcher.join()
+
+    def publish(self, event, coalesce=True):
+        """Publishes an event, which is dispatched with the next batch
+
+        :param ExecutionEvent event: the event
+        :param bool coalesce: whether the event replaces a not yet dispatched event of the same method and source
+        """
+        with self._lock:
+            if coalesce:
+                key = (id(event.source), event.method_name)
+                # the replacing event is dispatched in the order of its publication
+                self._events.pop(key, None)
+            else:
+                key = next(self._event_counter)
+            self._events[key] = event
+
+    def flush(self):
+        """Dispatches all pending events directly in the calling thread"""
+        with self._dispatch_lock:
+            with self._lock:
+                if not self._events:
+                    return
+                events = list(self._events.values())
+                self._events.clear()
+                subscribers = list(self._subscribers)
+            for callback in subscribers:
+                try:
+                    callback(events)
+                except Exception as e:
+                    logger.exception("Error while dispatching execution events to {0}: {1}".format(callback, e))
+
+    def _dispatch_periodically(self, stop_dispatcher):
+        while not stop_dispatcher.wait(1. / self.rate):
+            self.flush()
+
+
+def notify_observers(events):
+    """Notifies the gtkmvc3 observers of the sources of the events, as if the observed methods were called now
+
+    This allows observers to subscribe to the bus without being changed, e.g. by passing the events to this function
+    in the thread of the observers.
+
+    :param list[ExecutionEvent] events: the events of a batch
+    """
+    for event in events:
+        event.source._notify_method_before(event.source, event.method_name, event.args, event.kwargs)
+        event.source._notify_method_after(event.source, event.method_name, event.result, event.args, event.kwargs)
+
+
+_execution_event_bus = None
+_execution_event_bus_lock = threading.Lock()
+
+
+def get_execution_event_bus():
+    """Returns the global execution event bus, which is created on first use
+
+    The rate of the bus is read from the ``EXECUTION_EVENT_RATE`` config value.
+
+    :rtype: ExecutionEventBus
+    """
+    global _execution_event_bus
+    if _execution_event_bus is None:
+        with _execution_event_bus_lock:
+            if _execution_event_bus is None:
+                _execution_event_bus = ExecutionEventBus(global_config.get_config_value("EXECUTION_EVENT_RATE", 25))
+    return _execution_event_bus
+
+
+def get_active_execution_event_bus():
+    """Returns the global execution event bus, if it exists and has subscribers
+
+    :return: the bus the execution events are to be published to or None, if the observers are to be notified directly
+    :rtype: ExecutionEventBus
+    """
+    execution_event_bus = _execution_event_bus
+    if execution_event_bus is not None and execution_event_bus.active:
+        return execution_event_bus
+    return None
+
+
+def execution_event_bus_enabled():
+    """Checks whether the observers of the GUI are to subscribe to the execution event bus
+
+    :return: the value of the ``EXECUTION_EVENT_BUS_ENABLED`` config value
+    :rtype: bool
+    """
+    return global_config.get_config_value("EXECUTION_EVENT_BUS_ENABLED", False)
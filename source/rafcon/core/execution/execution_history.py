@@ -17,23 +17,31 @@
    :synopsis: A module for the history of one thread during state machine execution
 
 """
+from future import standard_library
+standard_library.install_aliases()
 from future.utils import native_str
 from builtins import object
 from builtins import range
 from builtins import str
 import time
 import copy
-from collections import Iterable, Sized
+from collections import Iterable, Sized, deque
+from itertools import chain, islice
 import json
 from jsonconversion.decoder import JSONObjectDecoder
 from jsonconversion.encoder import JSONObjectEncoder
 
 import shelve
-from threading import Lock
+import queue
+from threading import Lock, Thread
 from enum import Enum
 from gtkmvc3.observable import Observable
 
+from rafcon.core.config import global_config
 from rafcon.core.id_generator import history_item_id_generator
+from rafcon.core.decorators import observed_execution_event
+from rafcon.utils.execution_log import open_execution_log
+from rafcon.utils.record_log import RecordLogWriter
 from rafcon.utils import log
 logger = log.get_logger(__name__)
 import os
@@ -41,16 +49,33 @@ import subprocess
 import pickle
 from weakref import ref
 
+SHELVE_LOG_FORMAT = "SHELVE"
+RECORD_LOG_FORMAT = "RECORDS"
+
 
 class ExecutionHistoryStorage(object):
-    def __init__(self, filename):
+    """Writes the history items of an execution to a log file
+
+    The log is either written as shelve or as append-only record log (see :mod:`rafcon.utils.record_log`), which can be
+    read while it is written. Both formats can be read with :func:`rafcon.utils.execution_log.open_execution_log`.
+
+    :ivar str filename: the path of the log file
+    :ivar str log_format: the format of the log file, either SHELVE_LOG_FORMAT or RECORD_LOG_FORMAT
+    """
+    def __init__(self, filename, log_format=SHELVE_LOG_FORMAT):
         self.filename = filename
+        self.log_format = log_format
         self.store_lock = Lock()
+        self.closed = False
         try:
-            # 'c' for read/write/create
-            # protocol 2 cause of in some cases smaller file size
-            # writeback disabled, cause we don't need caching of entries in memory but continuous writes to the disk
-            self.store = shelve.open(filename, flag='c', protocol=2, writeback=False)
+            if log_format == RECORD_LOG_FORMAT:
+                self.store = RecordLogWriter(filename)
+            else:
+                # 'c' for read/write/create
+                # protocol 2 cause of in some cases smaller file size
+                # writeback disabled, cause we don't need caching of entries in memory but continuous writes to the
+                # disk
+                self.store = shelve.open(filename, flag='c', protocol=2, writeback=False)
             logger.debug('Openend log file for writing %s' % self.filename)
         except Exception:
             logger.exception('Exception:')
@@ -62,9 +87,43 @@ class ExecutionHistoryStorage(object):
             except Exception:
                 logger.exception('Exception:')
 
+    def store_history_item(self, history_item):
+        """Stores the dictionary representation of a history item
+
+        :param HistoryItem history_item: the history item to store
+        """
+        self.store_item(history_item.history_item_id, history_item.to_dict())
+
+    def load_item(self, key):
+        """Reads a stored history item
+
+        :param key: the id of the history item
+        :return: the dictionary representation of the history item or None, if it is not stored
+        :rtype: dict
+        """
+        with self.store_lock:
+            try:
+                if not self.closed:
+                    return self.store[native_str(key)]
+                # the log file is not kept open after the execution finished
+                store = open_execution_log(self.filename)
+                try:
+                    return store[native_str(key)]
+                finally:
+                    store.close()
+            except KeyError:
+                return None
+            except Exception:
+                logger.exception('Exception:')
+                return None
+
     def flush(self):
         with self.store_lock:
             try:
+                if self.log_format == RECORD_LOG_FORMAT:
+                    # record logs are append-only, no need to reopen them
+                    self.store.sync()
+                    return
                 self.store.close()
                 self.store = shelve.open(self.filename, flag='c', protocol=2, writeback=False)
                 logger.debug('Flushed log file %s' % self.filename)
@@ -78,6 +137,7 @@ class ExecutionHistoryStorage(object):
         with self.store_lock:
             try:
                 self.store.close()
+                self.closed = True
                 logger.debug('Closed log file %s' % self.filename)
                 if make_read_and_writable_for_all:
                     ret = subprocess.call(['chmod', 'a+rw', self.filename])
@@ -98,47 +158,184 @@ class ExecutionHistoryStorage(object):
                 logger.exception('Exception:')
 
 
+class AsyncExecutionHistoryStorage(ExecutionHistoryStorage):
+    """An execution history storage, which writes the history items in a background thread
+
+    The executing threads convert the history items to dictionaries, as these read the current data of the states, and
+    enqueue them. The writer thread writes them to the shelve in batches. If the queue is full, the executing threads
+    are blocked until the writer caught up or, if `drop_items_if_full` is set, the items are dropped. All enqueued
+    items are written before the storage is closed and before items are loaded. Items stored after the storage was
+    closed are rejected.
+
+    :ivar int number_of_dropped_items: the number of items, which were not written as the queue was full
+    """
+    BATCH_SIZE = 100
+
+    def __init__(self, filename, log_format=SHELVE_LOG_FORMAT, queue_size=10000, drop_items_if_full=False):
+        super(AsyncExecutionHistoryStorage, self).__init__(filename, log_format)
+        self.drop_items_if_full = drop_items_if_full
+        self.number_of_dropped_items = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        # guards the enqueuing against closing the storage
+        self._enqueue_lock = Lock()
+        self._closing = False
+        self._writer_thread = Thread(target=self._write_items, name="ExecutionLogWriter")
+        self._writer_thread.daemon = True
+        self._writer_thread.start()
+
+    def store_history_item(self, history_item):
+        try:
+            entry = (history_item.history_item_id, history_item.to_dict())
+        except Exception:
+            logger.exception('Exception:')
+            return
+        with self._enqueue_lock:
+            if self._closing:
+                logger.warning("The execution log {0} is already closed, history item {1} is not written".format(
+                    self.filename, history_item.history_item_id))
+                return
+            if not self.drop_items_if_full:
+                # the writer thread does not need the lock to make room in the queue
+                self._queue.put(entry)
+                return
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                if self.number_of_dropped_items == 0:
+                    logger.warning("The execution log cannot keep up, history items are dropped: {0}".format(
+                        self.filename))
+                self.number_of_dropped_items += 1
+
+    def _write_items(self):
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [entry for entry in batch if entry is not None]
+            stop = len(records) < len(batch)
+            with self.store_lock:
+                for key, record in records:
+                    try:
+                        self.store[native_str(key)] = record
+                    except Exception:
+                        logger.exception('Exception:')
+            for _ in batch:
+                self._queue.task_done()
+
+    def wait_for_writer(self):
+        """Blocks until all enqueued history items are written"""
+        if self._writer_thread.is_alive():
+            self._queue.join()
+
+    def load_item(self, key):
+        self.wait_for_writer()
+        return super(AsyncExecutionHistoryStorage, self).load_item(key)
+
+    def flush(self):
+        self.wait_for_writer()
+        super(AsyncExecutionHistoryStorage, self).flush()
+
+    def close(self, make_read_and_writable_for_all=False):
+        with self._enqueue_lock:
+            self._closing = True
+            if self._writer_thread.is_alive():
+                self._queue.put(None)
+        self._writer_thread.join()
+        if self.number_of_dropped_items > 0:
+            logger.warning("{0} history items were dropped from the execution log {1}".format(
+                self.number_of_dropped_items, self.filename))
+        super(AsyncExecutionHistoryStorage, self).close(make_read_and_writable_for_all)
+
+
+#: The maximum number of ranges of consecutive ids of evicted items, which are kept to load the items from the log
+MAX_EVICTED_ITEM_ID_RANGES = 10000
+
+
+def _get_retention_limit(config_key):
+    limit = global_config.get_config_value(config_key, 0)
+    # zero or None disable the limit
+    if limit in (None, "None") or limit <= 0:
+        return None
+    return limit
+
+
 class ExecutionHistory(Observable, Iterable, Sized):
     """A class for the history of a state machine execution
 
         It stores all history elements in a stack wise fashion.
 
+        The number of items kept in memory can be limited with the config values ``EXECUTION_HISTORY_MAX_ITEMS`` and
+        ``EXECUTION_HISTORY_MAX_AGE``. Older items are evicted, except for the call items of states that are still
+        running. If the execution log is enabled, evicted items can still be loaded from it.
+
         :ivar initial_prev: optional link to a previous element for the first element pushed into this history of
                             type :class:`rafcon.core.execution.execution_history.HistoryItem`
+        :ivar int max_items: the maximum number of items kept in memory, None for no limit
+        :ivar float max_age: the maximum age of items kept in memory in seconds, None for no limit
     """
 
     def __init__(self, initial_prev=None):
         super(ExecutionHistory, self).__init__()
-        self._history_items = []            
+        self._history_items = deque()
+        # call items of states that did not return yet (and the concurrency items of running concurrency states)
+        self._open_items = []
+        # open items, which would have been evicted already because of their age
+        self._pinned_items = []
+        # ranges of consecutive ids of evicted items: [id prefix, first number, number of ids, width of the number]
+        self._evicted_item_id_ranges = deque()
+        # the number of evicted items, whose ids were forgotten as too many ranges were kept
+        self._number_of_forgotten_item_ids = 0
+        self._number_of_evicted_items = 0
         self.initial_prev = initial_prev
         self.execution_history_storage = None
         self.new_execution_command_handled = True
+        self.max_items = _get_retention_limit("EXECUTION_HISTORY_MAX_ITEMS")
+        self.max_age = _get_retention_limit("EXECUTION_HISTORY_MAX_AGE")
 
     def destroy(self):
         # logger.verbose("Destroy execution history!")
         if self.execution_history_storage:
             self.execution_history_storage.close()
         self.execution_history_storage = None
-        if len(self._history_items) > 0:
-            if self._history_items[0]:
-                execution_history_iterator = iter(self)
-                for history_item in execution_history_iterator:
-                    history_item.destroy()
+        if len(self) > 0:
+            execution_history_iterator = iter(self)
+            for history_item in execution_history_iterator:
+                history_item.destroy()
         self.destroyed = True
         self._history_items = None
+        self._open_items = None
+        self._pinned_items = None
         self.initial_prev = None
 
     def __iter__(self):
-        return iter(self._history_items)                        
+        return chain(self._pinned_items, self._history_items)
 
     def set_execution_history_storage(self, execution_history_storage):
         self.execution_history_storage = execution_history_storage
         
     def __len__(self):
-        return len(self._history_items)
+        return len(self._pinned_items) + len(self._history_items)
 
     def __getitem__(self, index):
-        return self._history_items[index]
+        if isinstance(index, slice):
+            return list(self)[index]
+        number_of_pinned_items = len(self._pinned_items)
+        if index < 0:
+            if -index <= len(self._history_items):
+                return self._history_items[index]
+            return self._pinned_items[index + len(self._history_items)]
+        if index < number_of_pinned_items:
+            return self._pinned_items[index]
+        return self._history_items[index - number_of_pinned_items]
+
+    @property
+    def number_of_evicted_items(self):
+        """The number of items that were removed from memory due to the retention limits"""
+        return self._number_of_evicted_items
 
     def get_last_history_item(self):
         """Returns the history item that was added last
@@ -146,10 +343,12 @@ class ExecutionHistory(Observable, Iterable, Sized):
         :return: History item added last
         :rtype: HistoryItem
         """
-        try:
-            return self[-1]
-        except IndexError:  # this is the case for the very first executed state
-            return None
+        if self._history_items:
+            return self._history_items[-1]
+        if self._pinned_items:
+            return self._pinned_items[-1]
+        # this is the case for the very first executed state
+        return None
 
     def _push_item(self, last_history_item, current_item):
         if last_history_item is None:
@@ -157,9 +356,12 @@ class ExecutionHistory(Observable, Iterable, Sized):
         if last_history_item is not None:
             last_history_item.next = current_item
         if self.execution_history_storage is not None:
-            self.execution_history_storage.store_item(current_item.history_item_id, current_item.to_dict())
+            self.execution_history_storage.store_history_item(current_item)
         try:
             self._history_items.append(current_item)
+            self._update_open_items(current_item)
+            if self.max_items is not None or self.max_age is not None:
+                self._evict_items()
         except AttributeError:
             if self.destroyed:
                 pass # this is fine
@@ -167,7 +369,137 @@ class ExecutionHistory(Observable, Iterable, Sized):
                 raise
         return current_item
 
-    @Observable.observed
+    def _update_open_items(self, current_item):
+        if isinstance(current_item, (CallItem, ConcurrencyItem)):
+            self._open_items.append(current_item)
+        elif isinstance(current_item, ReturnItem):
+            # calls and returns are nested like brackets; open items of states that did not return properly (e.g.
+            # because of an internal error) are closed together with the call item of the returning state
+            for index in range(len(self._open_items) - 1, -1, -1):
+                open_item = self._open_items[index]
+                if isinstance(open_item, CallItem) and open_item.state_reference is current_item.state_reference \
+                        and open_item.call_type is current_item.call_type:
+                    current_item.call_item = open_item
+                    pinned_items_to_release = self._open_items[index:]
+                    del self._open_items[index:]
+                    if self._pinned_items:
+                        for pinned_item in pinned_items_to_release:
+                            if pinned_item in self._pinned_items:
+                                self._pinned_items.remove(pinned_item)
+                                self._evict_item(pinned_item)
+                    break
+
+    def _evict_items(self):
+        """Removes the oldest items from memory, until the retention limits are satisfied"""
+        current_time = time.time()
+        # the last item is always kept, as it is required to continue the execution
+        while len(self._history_items) > 1:
+            oldest_item = self._history_items[0]
+            too_many_items = self.max_items is not None and len(self) > self.max_items
+            too_old = self.max_age is not None and current_time - oldest_item.timestamp > self.max_age
+            if not too_many_items and not too_old:
+                break
+            self._history_items.popleft()
+            if oldest_item in self._open_items:
+                # the item of a running state is still required for the backward execution
+                self._pinned_items.append(oldest_item)
+            else:
+                self._evict_item(oldest_item)
+
+    def _evict_item(self, history_item):
+        self._number_of_evicted_items += 1
+        if self.execution_history_storage is not None:
+            self._remember_evicted_item_id(history_item.history_item_id)
+        # unlink the item, so that the chain of evicted items can be garbage collected
+        if history_item.next is not None and history_item.next.prev is history_item:
+            history_item.next.prev = None
+        if history_item.prev is not None and history_item.prev.next is history_item:
+            history_item.prev.next = None
+
+    def _remember_evicted_item_id(self, history_item_id):
+        # the generated ids end with a counter, thus the ids of subsequent items mostly form consecutive ranges
+        prefix, _, number = history_item_id.rpartition('.')
+        if not number.isdigit():
+            prefix, number = history_item_id, None
+        id_ranges = self._evicted_item_id_ranges
+        if id_ranges and number is not None:
+            last_range = id_ranges[-1]
+            if last_range[0] == prefix and last_range[1] is not None and last_range[3] == len(number) and \
+                    last_range[1] + last_range[2] == int(number):
+                last_range[2] += 1
+                return
+        id_ranges.append([prefix, None if number is None else int(number), 1, None if number is None else len(number)])
+        if len(id_ranges) > MAX_EVICTED_ITEM_ID_RANGES:
+            self._number_of_forgotten_item_ids += id_ranges.popleft()[2]
+
+    def _iter_evicted_item_ids(self):
+        for prefix, first_number, number_of_ids, width in self._evicted_item_id_ranges:
+            if first_number is None:
+                yield prefix
+                continue
+            for number in range(first_number, first_number + number_of_ids):
+                yield "{0}.{1:0{2}d}".format(prefix, number, width)
+
+    def get_evicted_item_records(self, start=0, stop=None):
+        """Loads evicted history items from the execution log
+
+        The records are ordered from old to new, the indices refer to all evicted items. The ids of the oldest evicted
+        items are forgotten, if they do not fit into `MAX_EVICTED_ITEM_ID_RANGES` ranges of consecutive ids; no records
+        are returned for these.
+
+        :param int start: the index of the first record to load
+        :param int stop: the index after the last record to load, None to load all remaining
+        :return: the dictionary representations of the evicted items, as stored in the execution log
+        :rtype: list
+        """
+        if self.execution_history_storage is None:
+            return []
+        records = []
+        start = max(start - self._number_of_forgotten_item_ids, 0)
+        if stop is not None:
+            stop = max(stop - self._number_of_forgotten_item_ids, 0)
+        for history_item_id in islice(self._iter_evicted_item_ids(), start, stop):
+            record = self.execution_history_storage.load_item(history_item_id)
+            if record is not None:
+                records.append(record)
+        return records
+
+    def _is_retained(self, history_item):
+        return any(item is history_item for item in self)
+
+    def is_backward_step_possible(self):
+        """Checks whether all items required to step back from the current point of execution are kept in memory
+
+        :return: False, if the step would lead into items that were evicted
+        :rtype: bool
+        """
+        last_history_item = self.get_last_history_item()
+        if last_history_item is None:
+            return False
+        if not isinstance(last_history_item, ReturnItem) or not self._has_evicted_items():
+            return True
+        call_item = last_history_item.call_item
+        if call_item is None or not self._is_retained(call_item):
+            return False
+        # the branches of concurrency states executed within the step need to be complete as well
+        item = call_item
+        while item is not None and item is not last_history_item:
+            if isinstance(item, ConcurrencyItem):
+                if any(execution_history._has_evicted_items() for execution_history in item.execution_histories):
+                    return False
+            item = item.next
+        return True
+
+    def _has_evicted_items(self):
+        if self._number_of_evicted_items > 0:
+            return True
+        for item in self:
+            if isinstance(item, ConcurrencyItem):
+                if any(execution_history._has_evicted_items() for execution_history in item.execution_histories):
+                    return True
+        return False
+
+    @observed_execution_event(coalesce=False)
     def push_call_history_item(self, state, call_type, state_for_scoped_data, input_data=None):
         """Adds a new call-history-item to the history item list
 
@@ -188,7 +520,7 @@ class ExecutionHistory(Observable, Iterable, Sized):
                                state.run_id)
         return self._push_item(last_history_item, return_item)
 
-    @Observable.observed
+    @observed_execution_event(coalesce=False)
     def push_return_history_item(self, state, call_type, state_for_scoped_data, output_data=None):
         """Adds a new return-history-item to the history item list
 
@@ -209,7 +541,7 @@ class ExecutionHistory(Observable, Iterable, Sized):
                                  state.run_id)
         return self._push_item(last_history_item, return_item)
 
-    @Observable.observed
+    @observed_execution_event(coalesce=False)
     def push_concurrency_history_item(self, state, number_concurrent_threads):
         """Adds a new concurrency-history-item to the history item list
 
@@ -226,12 +558,14 @@ class ExecutionHistory(Observable, Iterable, Sized):
                                       self.execution_history_storage)
         return self._push_item(last_history_item, return_item)
 
-    @Observable.observed
+    @observed_execution_event(coalesce=False)
     def push_state_machine_start_history_item(self, state_machine, run_id):
         return_item = StateMachineStartItem(state_machine, run_id)
         if self.execution_history_storage is not None:
-            self.execution_history_storage.store_item(return_item.history_item_id, return_item.to_dict())
+            self.execution_history_storage.store_history_item(return_item)
         self._history_items.append(return_item)
+        if self.max_items is not None or self.max_age is not None:
+            self._evict_items()
         return return_item
 
     @Observable.observed
@@ -241,11 +575,94 @@ class ExecutionHistory(Observable, Iterable, Sized):
         :return: History item added last
         :rtype: HistoryItem
         """
-        try:
-            return self._history_items.pop()
-        except IndexError:
+        if self._history_items:
+            last_history_item = self._history_items.pop()
+        elif self._pinned_items:
+            last_history_item = self._pinned_items.pop()
+        else:
             logger.error("No item left in the history item list in the execution history.")
             return None
+        if self._open_items and self._open_items[-1] is last_history_item:
+            self._open_items.pop()
+        elif isinstance(last_history_item, ReturnItem) and last_history_item.call_item is not None:
+            # stepping back into a state re-opens its call
+            self._open_items.append(last_history_item.call_item)
+        return last_history_item
+
+
+class ExecutionTimingHistory(ExecutionHistory):
+    """An execution history, which only records the execution times of the states
+
+    This history is used by the production execution profile. No history items are created, thus stepping backwards is
+    not possible and no execution log is written. Instead, the number of executions and their total duration is
+    recorded for each state executed by its parent (or as root state).
+    """
+
+    def __init__(self):
+        super(ExecutionTimingHistory, self).__init__()
+        # state path -> [number of executions, total duration in seconds]
+        self._timings = {}
+        # (id of the state, call type) -> time of the call
+        self._call_times = {}
+        # id of a running concurrency state -> the histories of its branches
+        self._branch_histories = {}
+
+    def get_timings(self):
+        """Returns the recorded execution times, including the ones of running concurrent branches
+
+        :return: a dict mapping state paths onto the number of executions and their total duration in seconds
+        :rtype: dict[str, (int, float)]
+        """
+        timings = {path: tuple(timing) for path, timing in self._timings.items()}
+        for branch_histories in list(self._branch_histories.values()):
+            for execution_history in branch_histories:
+                for path, (number_of_executions, duration) in execution_history.get_timings().items():
+                    timing = timings.get(path, (0, 0.))
+                    timings[path] = (timing[0] + number_of_executions, timing[1] + duration)
+        return timings
+
+    def is_backward_step_possible(self):
+        return False
+
+    def push_call_history_item(self, state, call_type, state_for_scoped_data, input_data=None):
+        self._call_times[(id(state), call_type)] = time.time()
+
+    def push_return_history_item(self, state, call_type, state_for_scoped_data, output_data=None):
+        call_time = self._call_times.pop((id(state), call_type), None)
+        branch_histories = self._branch_histories.pop(id(state), None)
+        if branch_histories is not None:
+            for execution_history in branch_histories:
+                for path, (number_of_executions, duration) in execution_history.get_timings().items():
+                    self._add_timing(path, number_of_executions, duration)
+        # the states are called by their parents, only the root state calls itself
+        if call_time is not None and (call_type is CallType.EXECUTE or state.is_root_state):
+            self._add_timing(state.get_path(), 1, time.time() - call_time)
+
+    def push_concurrency_history_item(self, state, number_concurrent_threads):
+        branch_histories = [ExecutionTimingHistory() for _ in range(number_concurrent_threads)]
+        self._branch_histories[id(state)] = branch_histories
+        return ConcurrencyTimingItem(branch_histories)
+
+    def push_state_machine_start_history_item(self, state_machine, run_id):
+        pass
+
+    def _add_timing(self, path, number_of_executions, duration):
+        timing = self._timings.get(path)
+        if timing is None:
+            self._timings[path] = [number_of_executions, duration]
+        else:
+            timing[0] += number_of_executions
+            timing[1] += duration
+
+
+class ConcurrencyTimingItem(object):
+    """Holds the execution histories of the branches of a concurrency state like a :class:`ConcurrencyItem`
+
+    :ivar list[ExecutionTimingHistory] execution_histories: the histories of the branches
+    """
+
+    def __init__(self, execution_histories):
+        self.execution_histories = execution_histories
 
 
 class HistoryItem(object):
@@ -263,7 +680,7 @@ class HistoryItem(object):
 
     def __init__(self, state, prev, run_id):
         self._state_reference = state
-        self.path = copy.deepcopy(state.get_path())
+        self.path = state.get_path()
         self.timestamp = time.time()
         self.run_id = run_id
         self.prev = prev
@@ -386,7 +803,8 @@ class ScopedDataItem(HistoryItem):
         else:
             raise Exception('unkown calltype, neither CONTAINER nor EXECUTE')
         self.call_type = call_type
-        self.scoped_data = {} if state_for_scoped_data is None else copy.deepcopy(state_for_scoped_data._scoped_data)
+        # the snapshot shares the unchanged ScopedData objects with the previous history items
+        self.scoped_data = {} if state_for_scoped_data is None else state_for_scoped_data.get_scoped_data_snapshot()
         self.child_state_input_output_data = copy.deepcopy(child_state_input_output_data)
 
     def to_dict(self):
@@ -453,6 +871,12 @@ class ReturnItem(ScopedDataItem):
     def __init__(self, state, prev, call_type, state_for_scoped_data, output_data, run_id):
         ScopedDataItem.__init__(self, state, prev, call_type, state_for_scoped_data, output_data, run_id)
         self.outcome = copy.deepcopy(state.final_outcome)
+        # the matching call item, set by the execution history
+        self.call_item = None
+
+    def destroy(self):
+        self.call_item = None
+        super(ReturnItem, self).destroy()
 
     def __str__(self):
         return "ReturnItem %s" % (ScopedDataItem.__str__(self))
@@ -0,0 +1,63 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: execution_profile
+   :synopsis: A module holding the execution profile of the current state machine execution
+
+The execution profile is read from the ``EXECUTION_PROFILE`` config value, when an execution is started, and is reset
+to the default profile, when the execution finishes or is stopped. With the
+``"PRODUCTION"`` profile, meant for headless deployments, which neither step nor step backwards, the execution
+skips all work only needed for debugging and visualization:
+
+* no history items are created, only the execution times of the states are recorded
+  (:class:`rafcon.core.execution.execution_history.ExecutionTimingHistory`), thus no execution log is written
+* observers are not notified about changes of the runtime data of states, e.g. their execution status, but still
+  about changes of the execution mode
+* the execution engine does not handle execution modes while the state machine is running normally
+* the previously executed state is unknown, thus :meth:`rafcon.core.states.state.State.get_previously_executed_state`
+  raises a RuntimeError
+"""
+
+from rafcon.core.config import global_config
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+DEFAULT_PROFILE = "DEFAULT"
+PRODUCTION_PROFILE = "PRODUCTION"
+
+_production_profile_active = False
+
+
+def production_profile_active():
+    """Checks whether the current execution uses the production profile
+
+    :rtype: bool
+    """
+    return _production_profile_active
+
+
+def activate_configured_profile():
+    """Activates the execution profile configured by ``EXECUTION_PROFILE``, called when an execution is started
+
+    :return: the activated profile
+    :rtype: str
+    """
+    global _production_profile_active
+    profile = global_config.get_config_value("EXECUTION_PROFILE", DEFAULT_PROFILE)
+    if profile not in (DEFAULT_PROFILE, PRODUCTION_PROFILE):
+        logger.warning("Invalid EXECUTION_PROFILE '{0}', using '{1}'".format(profile, DEFAULT_PROFILE))
+        profile = DEFAULT_PROFILE
+    _production_profile_active = profile == PRODUCTION_PROFILE
+    return profile
+
+
+def deactivate_profile():
+    """Resets the execution profile to the default profile, called when an execution finishes or is stopped"""
+    global _production_profile_active
+    _production_profile_active = False
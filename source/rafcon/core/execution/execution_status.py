@@ -18,6 +18,8 @@
 from builtins import str
 from enum import Enum
 import sys
+import time
+from threading import Event
 if sys.version_info[0] == 2:
     from threading import _Condition as Condition
 else:
@@ -47,6 +49,92 @@ class CustomCondition(Condition):
         return len(self._Condition__waiters)
 
 
+class ExecutionCondition(CustomCondition):
+    """The condition, at which the execution threads park until an execution command releases them
+
+    Each parked thread waits on its own event, instead of waiting on the condition itself. Thus a release only wakes
+    the threads, which are allowed to continue, e.g. switching from step mode to pause wakes no thread at all. The
+    condition itself is notified whenever a thread parks, so that other threads can await parked execution threads
+    with :meth:`wait_for_parked_threads` without polling.
+
+    :ivar int synchronization_counter: the number of times threads parked, which were not yet waited for
+    :ivar int number_of_wakeups: the number of times parked threads were woken up
+    """
+
+    def __init__(self, lock=None):
+        super(ExecutionCondition, self).__init__(lock)
+        # the events of the parked threads together with the checks, whether they have to stay parked
+        self._parked_threads = []
+        self.synchronization_counter = 0
+        self.number_of_wakeups = 0
+
+    def get_number_of_waiting_threads(self):
+        """Returns the number of parked threads
+
+        :return: the number of threads waiting to be released
+        :rtype: int
+        """
+        with self:
+            return len(self._parked_threads)
+
+    def park(self, keep_parked, park_required=None):
+        """Parks the calling thread until it is released by :meth:`release_parked_threads`
+
+        The checks are called with the condition acquired, so that a release cannot get lost between the check and
+        parking.
+
+        :param keep_parked: a callable checked on each release, the thread stays parked as long as it returns True
+        :param park_required: a callable checked before parking, if it returns False the thread does not park;
+            defaults to keep_parked
+        :return: whether the thread was parked
+        :rtype: bool
+        """
+        if park_required is None:
+            park_required = keep_parked
+        event = Event()
+        with self:
+            if not park_required():
+                return False
+            self._parked_threads.append((event, keep_parked))
+            self.synchronization_counter += 1
+            logger.verbose("Increase synchronization_counter: " + str(self.synchronization_counter))
+            self.notify_all()
+        event.wait()
+        return True
+
+    def release_parked_threads(self):
+        """Wakes up all parked threads, which do not have to stay parked"""
+        with self:
+            still_parked_threads = []
+            for event, keep_parked in self._parked_threads:
+                if keep_parked():
+                    still_parked_threads.append((event, keep_parked))
+                else:
+                    self.number_of_wakeups += 1
+                    event.set()
+            self._parked_threads = still_parked_threads
+
+    def wait_for_parked_threads(self, number_of_threads=1, timeout=None):
+        """Blocks until threads parked the given number of times and subtracts them from the synchronization counter
+
+        Threads parking in excess, e.g. while the caller was not waiting yet, stay counted for the next call.
+
+        :param int number_of_threads: the number of times threads have to park, which were not consumed yet
+        :param float timeout: the maximum time to wait in seconds or None to wait infinitely
+        :return: False, if a timeout occurred, True otherwise
+        :rtype: bool
+        """
+        end_time = None if timeout is None else time.time() + timeout
+        with self:
+            while self.synchronization_counter < number_of_threads:
+                remaining_time = None if end_time is None else end_time - time.time()
+                if remaining_time is not None and remaining_time <= 0:
+                    return False
+                self.wait(remaining_time)
+            self.synchronization_counter -= number_of_threads
+            return True
+
+
 class ExecutionStatus(Observable):
     """A class for representing the state machine status
 
@@ -66,7 +154,7 @@ class ExecutionStatus(Observable):
         self._execution_mode = None
         self.execution_mode = execution_mode
         logger.debug("State machine status is set to %s" % str(execution_mode))
-        self.execution_condition_variable = CustomCondition()
+        self.execution_condition_variable = ExecutionCondition()
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc3
@@ -0,0 +1,174 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: state_thread_pool
+   :synopsis: A module holding a pool of reusable worker threads for the execution of states
+
+"""
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import queue
+import threading
+
+from rafcon.core.config import global_config
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+THREAD_BACKEND = "THREADS"
+POOL_BACKEND = "POOL"
+
+
+def pooled_execution_enabled():
+    """Checks whether states are to be executed with the pooled execution backend
+
+    :return: True, if the ``STATE_EXECUTION_BACKEND`` config value is set to "POOL"
+    :rtype: bool
+    """
+    return global_config.get_config_value("STATE_EXECUTION_BACKEND", THREAD_BACKEND) == POOL_BACKEND
+
+
+class StateExecutionHandle(object):
+    """A thread-like handle of a state run that was dispatched to the :class:`StateThreadPool`
+
+    The handle offers the subset of the :class:`threading.Thread` interface that is needed to synchronize with the
+    execution of a state.
+    """
+
+    def __init__(self):
+        self._finished = threading.Event()
+
+    def join(self, timeout=None):
+        """Waits until the dispatched run finished
+
+        :param float timeout: Maximum time to wait, None if infinitely
+        """
+        self._finished.wait(timeout)
+
+    def is_alive(self):
+        return not self._finished.is_set()
+
+    def _set_finished(self):
+        self._finished.set()
+
+
+class _PoolWorker(threading.Thread):
+    """A worker thread processing the runs that are assigned to it by its pool
+    """
+
+    def __init__(self, pool, name):
+        super(_PoolWorker, self).__init__(name=name)
+        # idle workers must not keep the interpreter alive
+        self.daemon = True
+        self._pool = pool
+        self._runs = queue.Queue(maxsize=0)
+
+    def assign(self, target, handle):
+        self._runs.put((target, handle))
+
+    def run(self):
+        while True:
+            target, handle = self._runs.get()
+            _execute_target(target)
+            # return to the pool before signalling the handle, so that the joining thread can directly reuse the worker
+            self._pool._release_worker(self)
+            handle._set_finished()
+
+
+def _execute_target(target):
+    try:
+        target()
+    except Exception:
+        logger.exception("Pooled state execution had an unhandled error:")
+
+
+class StateThreadPool(object):
+    """A bounded pool of reusable threads the states are executed in
+
+    Creating a new :class:`threading.Thread` for each execution of a state is expensive for short states. Instead, the
+    pool keeps up to `max_workers` threads alive and hands out idle ones. If all pooled threads are busy, the run is
+    executed in an additional, non-pooled thread. Waiting for a free worker is no option, as concurrent branches
+    (e.g. of nested concurrency states) can block each other until they all run.
+
+    :ivar int max_workers: the maximum number of threads kept in the pool
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._idle_workers = []
+        self._number_of_workers = 0
+        self._number_of_overflow_runs = 0
+
+    def submit(self, target):
+        """Runs the callable `target` in a pooled thread
+
+        :param target: the callable to be executed, usually the run method of a state
+        :return: a handle to join the run
+        :rtype: StateExecutionHandle
+        """
+        handle = StateExecutionHandle()
+        new_worker = False
+        with self._lock:
+            if self._idle_workers:
+                worker = self._idle_workers.pop()
+            elif self._number_of_workers < self.max_workers:
+                self._number_of_workers += 1
+                worker = _PoolWorker(self, "StateWorker-{0}".format(self._number_of_workers))
+                new_worker = True
+            else:
+                worker = None
+                self._number_of_overflow_runs += 1
+
+        if worker is None:
+            thread = threading.Thread(target=self._run_overflow, args=(target, handle))
+            thread.start()
+        else:
+            worker.assign(target, handle)
+            if new_worker:
+                worker.start()
+        return handle
+
+    @staticmethod
+    def _run_overflow(target, handle):
+        _execute_target(target)
+        handle._set_finished()
+
+    def _release_worker(self, worker):
+        with self._lock:
+            self._idle_workers.append(worker)
+
+    @property
+    def number_of_workers(self):
+        """The number of threads currently held by the pool"""
+        return self._number_of_workers
+
+    @property
+    def number_of_overflow_runs(self):
+        """The number of runs that had to be executed outside of the pool, as all pooled threads were busy"""
+        return self._number_of_overflow_runs
+
+
+_state_thread_pool = None
+_state_thread_pool_lock = threading.Lock()
+
+
+def get_state_thread_pool():
+    """Returns the global state thread pool, which is created on first use
+
+    The size of the pool is read from the ``STATE_EXECUTION_POOL_SIZE`` config value.
+
+    :rtype: StateThreadPool
+    """
+    global _state_thread_pool
+    if _state_thread_pool is None:
+        with _state_thread_pool_lock:
+            if _state_thread_pool is None:
+                _state_thread_pool = StateThreadPool(global_config.get_config_value("STATE_EXECUTION_POOL_SIZE", 32))
+    return _state_thread_pool
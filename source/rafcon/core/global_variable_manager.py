@@ -21,10 +21,12 @@
 """
 
 from builtins import str
+from builtins import object
 import time
 import copy
+from collections import deque
 from gtkmvc3.observable import Observable
-from threading import Lock, currentThread, RLock
+from threading import Lock, currentThread, RLock, Condition
 from rafcon.core.id_generator import *
 
 from rafcon.utils.type_helpers import type_inherits_of_type
@@ -33,14 +35,157 @@ from rafcon.utils import type_helpers
 logger = log.get_logger(__name__)
 
 
+class VariableLock(object):
+    """A fair reader/writer lock for a global variable
+
+    The lock can either be held exclusively by one thread or shared by any number of readers. Threads waiting for
+    the exclusive lock are woken up as soon as it is released and acquire it in the order of their requests. New
+    readers wait while a thread waits for the exclusive lock, so that writers cannot starve. The lock counts its
+    acquisitions and the time threads had to wait for it.
+
+    :ivar str key: the key of the global variable
+    :ivar int number_of_acquisitions: the number of times the lock was acquired exclusively
+    :ivar int number_of_shared_acquisitions: the number of times the lock was acquired by a reader
+    :ivar int number_of_contended_acquisitions: the number of times a thread had to wait for the lock
+    :ivar float total_wait_time: the time in seconds all threads waited for the lock
+    :ivar float max_wait_time: the longest time in seconds a thread waited for the lock
+    """
+    LOG_INTERVAL = 2.
+
+    def __init__(self, key):
+        self.key = key
+        self._condition = Condition(Lock())
+        self._locked = False
+        self._number_of_readers = 0
+        self._waiting_threads = deque()
+        self.number_of_acquisitions = 0
+        self.number_of_shared_acquisitions = 0
+        self.number_of_contended_acquisitions = 0
+        self.total_wait_time = 0.
+        self.max_wait_time = 0.
+
+    def _wait_until(self, is_free, timeout):
+        """Waits on the condition until the lock is free for the calling thread
+
+        Must be called with the condition acquired.
+
+        :param is_free: a function returning whether the calling thread may take the lock
+        :param float timeout: the maximum time in seconds to wait, None to wait forever
+        :return: True if the lock is free, False if the timeout elapsed
+        """
+        start_time = time.time()
+        next_log_time = start_time + self.LOG_INTERVAL
+        while not is_free():
+            now = time.time()
+            if timeout is not None and now - start_time >= timeout:
+                return False
+            if now >= next_log_time:
+                # inform the user about long locked variables
+                logger.verbose("Variable '{2}' is locked and thread {0} waits already {1} seconds to "
+                               "access it.".format(currentThread(), now - start_time, self.key))
+                next_log_time += self.LOG_INTERVAL
+            wake_up_time = next_log_time if timeout is None else min(next_log_time, start_time + timeout)
+            self._condition.wait(max(0., wake_up_time - now))
+        wait_time = time.time() - start_time
+        self.number_of_contended_acquisitions += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        return True
+
+    def acquire(self, blocking=True, timeout=None):
+        """Acquires the lock exclusively
+
+        :param bool blocking: whether to wait for the lock if it is held by another thread
+        :param float timeout: the maximum time in seconds to wait for the lock, None to wait forever
+        :return: True if the lock was acquired, False otherwise
+        """
+        with self._condition:
+            if not self._locked and not self._number_of_readers and not self._waiting_threads:
+                self._locked = True
+                self.number_of_acquisitions += 1
+                return True
+            if not blocking:
+                return False
+
+            ticket = object()
+            self._waiting_threads.append(ticket)
+            acquired = False
+            try:
+                acquired = self._wait_until(lambda: not self._locked and not self._number_of_readers and
+                                            self._waiting_threads[0] is ticket, timeout)
+                if acquired:
+                    self._locked = True
+                    self.number_of_acquisitions += 1
+            finally:
+                self._waiting_threads.remove(ticket)
+                if not acquired:
+                    # the next thread in the queue or waiting readers might be able to acquire the lock now
+                    self._condition.notify_all()
+            return acquired
+
+    def release(self):
+        """Releases the exclusive lock and wakes up the waiting threads"""
+        with self._condition:
+            self._locked = False
+            self._condition.notify_all()
+
+    def acquire_shared(self, blocking=True, timeout=None):
+        """Acquires the lock for reading
+
+        Readers do not block each other. They only wait while the lock is held exclusively or a thread waits for
+        the exclusive lock.
+
+        :param bool blocking: whether to wait for the lock if it is held exclusively
+        :param float timeout: the maximum time in seconds to wait for the lock, None to wait forever
+        :return: True if the lock was acquired, False otherwise
+        """
+        with self._condition:
+            if self._locked or self._waiting_threads:
+                if not blocking or not self._wait_until(lambda: not self._locked and not self._waiting_threads,
+                                                        timeout):
+                    return False
+            self._number_of_readers += 1
+            self.number_of_shared_acquisitions += 1
+            return True
+
+    def release_shared(self):
+        """Releases the lock held by a reader and wakes up the waiting threads, if it was the last reader"""
+        with self._condition:
+            self._number_of_readers -= 1
+            if not self._number_of_readers:
+                self._condition.notify_all()
+
+    def locked(self):
+        """Returns whether the lock is held exclusively"""
+        return self._locked
+
+    def get_statistics(self):
+        """Returns the statistics of the lock
+
+        :return: a dict with the number of exclusive, shared and contended acquisitions, the total and maximum
+          wait time and the number of currently waiting threads and active readers
+        :rtype: dict
+        """
+        with self._condition:
+            return {'number_of_acquisitions': self.number_of_acquisitions,
+                    'number_of_shared_acquisitions': self.number_of_shared_acquisitions,
+                    'number_of_contended_acquisitions': self.number_of_contended_acquisitions,
+                    'total_wait_time': self.total_wait_time,
+                    'max_wait_time': self.max_wait_time,
+                    'number_of_waiting_threads': len(self._waiting_threads),
+                    'number_of_readers': self._number_of_readers}
+
+
 class GlobalVariableManager(Observable):
     """A class for organizing all global variables of the state machine
 
     :ivar __global_variable_dictionary: the dictionary, where all global variables are stored
-    :ivar __variable_locks: a dictionary that holds one mutex for each global variable
+    :ivar __variable_locks: a dictionary that holds one :class:`VariableLock` for each global variable
     :ivar __global_lock: a mutex to prevent that the dictionary is written by two threads simultaneously
     :ivar __access_keys: a dictionary that holds an access key to each locked global variable
     :ivar __variable_references: a dictionary that stores whether a variable can be returned by reference or not
+    :ivar __immutable_variables: a dictionary that stores whether the value of a variable is never modified in place
+    :ivar __variable_versions: a dictionary that holds a counter for each global variable, increased on every set
     """
 
     def __init__(self):
@@ -51,15 +196,19 @@ class GlobalVariableManager(Observable):
         self.__global_lock = RLock()
         self.__access_keys = {}
         self.__variable_references = {}
+        self.__immutable_variables = {}
+        self.__variable_versions = {}
 
     @Observable.observed
-    def set_variable(self, key, value, per_reference=False, access_key=None, data_type=None):
+    def set_variable(self, key, value, per_reference=False, access_key=None, data_type=None, immutable=False):
         """Sets a global variable
 
         :param key: the key of the global variable to be set
         :param value: the new value of the global variable
         :param per_reference: a flag to decide if the variable should be stored per reference or per value
         :param access_key: if the variable was explicitly locked with the  rafcon.state lock_variable
+        :param bool immutable: a flag to promise that the value is never modified in place, neither by the setter
+          nor by readers; readers then get the stored value without a copy
         :raises exceptions.RuntimeError: if a wrong access key is passed
         """
         key = str(key)  # Ensure that we have the same string type for all keys (under Python2 and 3!)
@@ -84,7 +233,7 @@ class GlobalVariableManager(Observable):
                 else:  # case not locked
                     access_key = self.lock_variable(key, block=True)
             else:
-                self.__variable_locks[key] = Lock()
+                self.__variable_locks[key] = VariableLock(key)
                 access_key = self.lock_variable(key, block=True)
 
             # --- variable locked
@@ -96,6 +245,8 @@ class GlobalVariableManager(Observable):
                 self.__global_variable_dictionary[key] = copy.deepcopy(value)
                 self.__global_variable_type_dictionary[key] = data_type
                 self.__variable_references[key] = False
+            self.__immutable_variables[key] = immutable
+            self.__variable_versions[key] = self.__variable_versions.get(key, 0) + 1
             # --- release variable
 
             if unlock:
@@ -114,39 +265,86 @@ class GlobalVariableManager(Observable):
         :raises exceptions.RuntimeError: if a wrong access key is passed or the variable cannot be accessed by reference
         """
         key = str(key)
-        if self.variable_exist(key):
-            unlock = True
-            if self.is_locked(key):
-                if self.__access_keys[key] == access_key:
-                    unlock = False
-                else:
-                    if not access_key:
-                        access_key = self.lock_variable(key, block=True)
-                    else:
-                        raise RuntimeError("Wrong access key for accessing global variable")
-            else:
-                access_key = self.lock_variable(key, block=True)
+        if not self.variable_exist(key):
+            # logger.warning("Global variable '{0}' not existing, returning default value".format(key))
+            return default
+        try:
+            shared_lock = self.__acquire_read_access(key, access_key)
+        except KeyError:  # the variable was deleted in the meantime
+            return default
 
+        try:
             # --- variable locked
             if self.variable_can_be_referenced(key):
-                if per_reference or per_reference is None:
-                    return_value = self.__global_variable_dictionary[key]
-                else:
-                    return_value = copy.deepcopy(self.__global_variable_dictionary[key])
-            else:
-                if per_reference:
-                    self.unlock_variable(key, access_key)
-                    raise RuntimeError("Variable cannot be accessed by reference")
-                else:
-                    return_value = copy.deepcopy(self.__global_variable_dictionary[key])
+                if per_reference or per_reference is None or self.__immutable_variables[key]:
+                    return self.__global_variable_dictionary[key]
+                return copy.deepcopy(self.__global_variable_dictionary[key])
+            if per_reference:
+                raise RuntimeError("Variable cannot be accessed by reference")
+            if self.__immutable_variables[key]:
+                return self.__global_variable_dictionary[key]
+            return copy.deepcopy(self.__global_variable_dictionary[key])
+        finally:
             # --- release variable
+            if shared_lock:
+                shared_lock.release_shared()
 
-            if unlock:
-                self.unlock_variable(key, access_key)
-            return return_value
-        else:
-            # logger.warning("Global variable '{0}' not existing, returning default value".format(key))
-            return default
+    def get_variable_snapshot(self, key, default=None):
+        """Fetches a snapshot of the value of a global variable together with its version
+
+        The version is increased on every change of the variable, so that polling readers can cheaply detect
+        changes. Readers never block each other. The value is only copied, if it is not marked as immutable.
+
+        :param key: the key of the global variable to be fetched
+        :param default: a value to be returned if the key does not exist
+        :return: a tuple of the value of the global variable and its version; the version is 0, if the key does not
+          exist
+        :rtype: tuple
+        """
+        key = str(key)
+        if not self.variable_exist(key):
+            return default, 0
+        try:
+            shared_lock = self.__acquire_read_access(key)
+        except KeyError:  # the variable was deleted in the meantime
+            return default, 0
+        try:
+            value = self.__global_variable_dictionary[key]
+            if not self.__immutable_variables[key]:
+                value = copy.deepcopy(value)
+            return value, self.__variable_versions[key]
+        finally:
+            if shared_lock:
+                shared_lock.release_shared()
+
+    def get_variable_version(self, key):
+        """Returns the version of a global variable, which is increased on every change of the variable
+
+        :param key: the key of the global variable
+        :return: the version of the global variable or 0, if the variable does not exist
+        :rtype: int
+        """
+        return self.__variable_versions.get(str(key), 0)
+
+    def __acquire_read_access(self, key, access_key=None):
+        """Acquires the lock of a global variable for reading
+
+        If the variable is explicitly locked by the caller, no further lock is needed.
+
+        :param str key: the key of the global variable
+        :param access_key: the access key, if the variable was explicitly locked by the caller
+        :return: the lock acquired for reading, which must be released with `release_shared`, or None
+        :raises exceptions.RuntimeError: if a wrong access key is passed
+        :raises exceptions.KeyError: if the global variable does not exist (anymore)
+        """
+        if access_key and self.is_locked(key):
+            if self.__access_keys[key] == access_key:
+                return None
+            raise RuntimeError("Wrong access key for accessing global variable")
+        with self.__global_lock:
+            variable_lock = self.__variable_locks[key]
+        variable_lock.acquire_shared()
+        return variable_lock
 
     def variable_can_be_referenced(self, key):
         """Checks whether the value of the variable can be returned by reference
@@ -175,38 +373,34 @@ class GlobalVariableManager(Observable):
                 self.unlock_variable(key, access_key)
                 del self.__variable_locks[key]
                 del self.__variable_references[key]
+                del self.__immutable_variables[key]
+                del self.__variable_versions[key]
             else:
                 raise AttributeError("Global variable %s does not exist!" % str(key))
 
         logger.debug("Global variable %s was deleted!" % str(key))
 
     @Observable.observed
-    def lock_variable(self, key, block=False):
+    def lock_variable(self, key, block=False, timeout=None):
         """Locks a global variable
 
         :param key: the key of the global variable to be locked
         :param block: a flag to specify if to wait for locking the variable in blocking mode
+        :param float timeout: if blocking, the maximum time in seconds to wait for the lock, None to wait forever
+        :return: the access key or False, if the variable could not be locked
         """
         key = str(key)
         # watch out for releasing the __dictionary_lock properly
         try:
             if key in self.__variable_locks:
-                # acquire without arguments is blocking
-                lock_successful = self.__variable_locks[key].acquire(False)
-                if lock_successful or block:
-                    if (not lock_successful) and block:  # case: lock could not be acquired => wait for it as block=True
-                        duration = 0.
-                        loop_time = 0.1
-                        while not self.__variable_locks[key].acquire(False):
-                            time.sleep(loop_time)
-                            duration += loop_time
-                            if int(duration*10) % 20 == 0:
-                                # while loops informs the user about long locked variables
-                                logger.verbose("Variable '{2}' is locked and thread {0} waits already {1} seconds to "
-                                               "access it.".format(currentThread(), duration, key))
+                if self.__variable_locks[key].acquire(block, timeout):
                     access_key = global_variable_id_generator()
                     self.__access_keys[key] = access_key
                     return access_key
+                elif block:
+                    logger.warning("Global variable {0} could not be locked within {1} seconds".format(str(key),
+                                                                                                      timeout))
+                    return False
                 else:
                     logger.warning("Global variable {} already locked".format(str(key)))
                     return False
@@ -288,6 +482,19 @@ class GlobalVariableManager(Observable):
             return self.__variable_locks[key].locked()
         return False
 
+    def get_lock_statistics(self, key):
+        """Returns the wait and contention statistics of the lock of a global variable
+
+        :param key: the unique key of the global variable
+        :return: the statistics as returned by :meth:`VariableLock.get_statistics` or None, if the variable does not
+          exist
+        :rtype: dict
+        """
+        key = str(key)
+        if key in self.__variable_locks:
+            return self.__variable_locks[key].get_statistics()
+        return None
+
     def get_all_keys_starting_with(self, start_key):
         """ Returns all keys, which start with a certain pattern defined in :param start_key.
 
@@ -18,6 +18,8 @@
 """
 
 import os
+import time
+import json
 import shutil
 import copy
 import warnings
@@ -26,12 +28,22 @@ from gtkmvc3.observable import Observable
 
 from rafcon.core import interface
 from rafcon.core.storage import storage
+from rafcon.core.storage import library_cache
 from rafcon.core.custom_exceptions import LibraryNotFoundException
 import rafcon.core.config as config
 
 from rafcon.utils import log
+from rafcon.utils.constants import RAFCON_TEMP_PATH_CACHE
+from rafcon.utils.directory_watcher import create_directory_watcher
+from rafcon.utils.filesystem import write_file_atomically
 logger = log.get_logger(__name__)
 
+#: Version of the format of the library index file, index files of other versions are ignored
+LIBRARY_INDEX_FORMAT_VERSION = 1
+#: Folders modified less than this number of seconds before they were listed are not indexed, as further modifications
+#: might not be reflected in their modification time, due to the time resolution of the file system
+RACY_MODIFICATION_INTERVAL = 2.
+
 
 class LibraryManager(Observable):
     """This class manages all libraries
@@ -45,6 +57,11 @@ class LibraryManager(Observable):
     The library_root_path can be relative paths and could include environment variables.
     A library is pointed on by the file system path library_os_path which again partial consists of 
     library_root_path + library_path (partly) + library_name.
+    If the config value ``LIBRARY_FILE_SYSTEM_WATCHER`` is not ``"NONE"``, the folders of the library tree and of the
+    loaded libraries are watched. A refresh then only lists the changed folders again and only the changed libraries
+    are removed from the loaded libraries.
+    If the config value ``USE_LIBRARY_INDEX`` is True, the library tree is stored in an index file together with the
+    modification times of its folders. On initialization, only the folders whose modification time changed are listed.
     :ivar _libraries: a dictionary to hold  all libraries
     """
 
@@ -63,11 +80,36 @@ class LibraryManager(Observable):
         self._loaded_libraries = {}
         self._libraries_instances = {}
 
+        # file system watching
+        self._directory_watcher = None
+        self._directory_watcher_type = "NONE"
+        # watched folders of the library tree, with their libraries dictionary or None for library folders
+        self._library_tree_directories = {}
+        # watched folders of loaded libraries, with the library os path of the library
+        self._loaded_library_directories = {}
+        self._changed_library_tree_directories = set()
+        self._changed_loaded_libraries = set()
+
+        # the library index of the library root paths, if the index is used, and the time of the initialization
+        self._library_index = None
+        self._library_index_time = None
+
     def prepare_destruction(self):
+        self._stop_watching()
         self.clean_loaded_libraries()
 
     def clean_loaded_libraries(self):
-        self._loaded_libraries.clear()
+        """Removes the loaded libraries, so that they are loaded again from the file system when used
+
+        If the file system is watched, only the libraries that changed are removed.
+        """
+        if self._directory_watcher is None:
+            self._loaded_libraries.clear()
+            return
+        self._collect_file_system_changes()
+        for lib_os_path in self._changed_loaded_libraries:
+            self._remove_loaded_library(lib_os_path)
+        self._changed_loaded_libraries.clear()
 
     def initialize(self):
         """Initializes the library manager
@@ -83,6 +125,8 @@ class LibraryManager(Observable):
         self._replaced_libraries = {}
         self._skipped_states = []
         self._skipped_library_roots = []
+        self._start_watching()
+        old_library_index = self._read_library_index()
 
         # 1. Load libraries from config.yaml
         for library_root_key, library_root_path in config.global_config.get_config_value("LIBRARY_PATHS").items():
@@ -90,7 +134,7 @@ class LibraryManager(Observable):
             if os.path.exists(library_root_path):
                 logger.debug("Adding library root key '{0}' from path '{1}'".format(
                     library_root_key, library_root_path))
-                self._load_libraries_from_root_path(library_root_key, library_root_path)
+                self._load_libraries_from_root_path(library_root_key, library_root_path, old_library_index)
             else:
                 logger.warning("Configured path for library root key '{}' does not exist: {}".format(
                     library_root_key, library_root_path))
@@ -113,14 +157,81 @@ class LibraryManager(Observable):
                 else:
                     logger.warning("The library '{}' is already existing and will be overridden with '{}'".format(
                         library_root_key, library_root_path))
-                    self._load_libraries_from_root_path(library_root_key, library_root_path)
+                    self._load_libraries_from_root_path(library_root_key, library_root_path, old_library_index)
             else:
-                self._load_libraries_from_root_path(library_root_key, library_root_path)
+                self._load_libraries_from_root_path(library_root_key, library_root_path, old_library_index)
             logger.debug("Adding library '{1}' from {0}".format(library_root_path, library_root_key))
 
         self._libraries = OrderedDict(sorted(self._libraries.items()))
+        self._write_library_index(old_library_index)
         logger.debug("Initialization of LibraryManager done")
 
+    @staticmethod
+    def _get_library_index_path():
+        index_path = config.global_config.get_config_value("LIBRARY_INDEX_PATH",
+                                                           "%RAFCON_TEMP_PATH_CACHE/library_index.json")
+        if index_path.startswith('%RAFCON_TEMP_PATH_CACHE'):
+            index_path = index_path.replace('%RAFCON_TEMP_PATH_CACHE', RAFCON_TEMP_PATH_CACHE)
+        return os.path.abspath(os.path.expandvars(os.path.expanduser(index_path)))
+
+    def _read_library_index(self):
+        """Reads the library index file, if the index is used
+
+        The entries of the old index are used by `_load_libraries_from_root_path`, which collects the entries of the new
+        index in `self._library_index`.
+
+        :return: the entries of the index file, with the library root paths as keys, or None if the index is not used
+        :rtype: dict
+        """
+        if not config.global_config.get_config_value("USE_LIBRARY_INDEX", False):
+            self._library_index = None
+            return None
+        self._library_index = {}
+        self._library_index_time = time.time()
+        try:
+            with open(self._get_library_index_path(), 'r') as index_file:
+                library_index = json.load(index_file)
+            if library_index['format_version'] == LIBRARY_INDEX_FORMAT_VERSION:
+                return library_index['root_paths']
+        except (IOError, OSError):
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            logger.debug("The library index cannot be read: {0}".format(e))
+        return {}
+
+    def _write_library_index(self, old_library_index):
+        """Writes the library index file, if the index is used and changed
+
+        The entries of other library root paths, e.g. written by other RAFCON processes, are kept.
+        """
+        if self._library_index is None:
+            return
+        library_index = dict(old_library_index)
+        library_index.update(self._library_index)
+        if library_index == old_library_index:
+            return
+        index_path = self._get_library_index_path()
+        try:
+            if not os.path.isdir(os.path.dirname(index_path)):
+                os.makedirs(os.path.dirname(index_path))
+            write_file_atomically(index_path, json.dumps({'format_version': LIBRARY_INDEX_FORMAT_VERSION,
+                                                          'root_paths': library_index}))
+        except (IOError, OSError) as e:
+            logger.warning("The library index cannot be written: {0}".format(e))
+
+    def _get_index_modification_time(self, path):
+        """Returns the modification time of a folder to be stored in the library index
+
+        :return: the modification time, None if the folder does not exist or was modified too recently to be indexed
+        """
+        try:
+            modification_time = os.stat(path).st_mtime
+        except OSError:
+            return None
+        if modification_time > self._library_index_time - RACY_MODIFICATION_INTERVAL:
+            return None
+        return modification_time
+
     @staticmethod
     def _clean_path(path):
         """Create a fully fissile absolute system path with no symbolic links and environment variables"""
@@ -139,11 +250,34 @@ class LibraryManager(Observable):
         path = os.path.realpath(path)
         return path
 
-    def _load_libraries_from_root_path(self, library_root_key, library_root_path):
+    def _get_configured_library_root_paths(self):
+        """Returns the existing library root paths of the config and RAFCON_LIBRARY_PATH, like used by initialize
+
+        :return: the library root paths with the library root keys as keys
+        :rtype: dict
+        """
+        library_root_paths = {}
+        for library_root_key, library_root_path in config.global_config.get_config_value("LIBRARY_PATHS").items():
+            library_root_path = self._clean_path(library_root_path)
+            if os.path.exists(library_root_path):
+                library_root_paths[library_root_key] = library_root_path
+        for library_root_path in set(os.environ.get('RAFCON_LIBRARY_PATH', '').split(os.pathsep)):
+            if not library_root_path:
+                continue
+            library_root_path = self._clean_path(library_root_path)
+            if os.path.exists(library_root_path):
+                library_root_paths[os.path.split(library_root_path)[1]] = library_root_path
+        return library_root_paths
+
+    def _load_libraries_from_root_path(self, library_root_key, library_root_path, old_library_index=None):
         self._library_root_paths[library_root_key] = library_root_path
-        self._libraries[library_root_key] = {}
-        self._load_nested_libraries(library_root_path, self._libraries[library_root_key])
-        self._libraries[library_root_key] = OrderedDict(sorted(self._libraries[library_root_key].items()))
+        self._libraries[library_root_key] = OrderedDict()
+        # folders are watched before being listed, so that no change is missed
+        self._watch_library_tree_directory(library_root_path, self._libraries[library_root_key])
+        index_entry = self._load_nested_libraries(library_root_path, self._libraries[library_root_key],
+                                                  (old_library_index or {}).get(library_root_path))
+        if self._library_index is not None:
+            self._library_index[library_root_path] = index_entry
 
     def check_clean_path_of_library(self, folder_path, folder_name):
         library_root_path = self._library_root_paths[self._get_library_root_key_for_os_path(folder_path)]
@@ -156,32 +290,201 @@ class LibraryManager(Observable):
                           "".format(not_allowed_characters, full_path), log.RAFCONDeprecationWarning)
         return folder_path, folder_name
 
-    def _load_nested_libraries(self, library_path, target_dict):
+    @staticmethod
+    def _is_library_folder(path):
+        return os.path.exists(os.path.join(path, storage.STATEMACHINE_FILE)) \
+            or os.path.exists(os.path.join(path, storage.STATEMACHINE_FILE_OLD))
+
+    def _load_nested_libraries(self, library_path, target_dict, index_entry=None):
         """Recursively load libraries within path
 
         Adds all libraries specified in a given path and stores them into the provided library dictionary. The library
         entries in the dictionary consist only of the path to the library in the file system.
+        If the dictionary already holds the libraries of the path, as when a watched folder changed, the sub folders
+        already contained are not loaded again, as their changes are handled separately.
+        If the library index is used, the path is only listed if its modification time differs from the one in the
+        given index entry.
 
         :param library_path: the path to add all libraries from
-        :param target_dict: the target dictionary to store all loaded libraries to
+        :param target_dict: the target dictionary to store all loaded libraries to, which is sorted in place
+        :param dict index_entry: the entry of the library index for the path
+        :return: the new entry of the library index for the path, if the index is used
+        :rtype: dict
         """
+        if self._library_index is not None and index_entry is not None and not target_dict:
+            new_index_entry = self._load_nested_libraries_from_index(library_path, target_dict, index_entry)
+            if new_index_entry is not None:
+                return new_index_entry
+        new_index_entry = None
+        if self._library_index is not None:
+            # the modification time is taken before listing, so that modifications during listing are detected
+            new_index_entry = {'mtime': self._get_index_modification_time(library_path), 'libraries': {},
+                               'folders': {}}
+        old_index_folders = index_entry['folders'] if index_entry is not None else {}
+        old_libraries = dict(target_dict)
+        libraries = {}
         for library_name in os.listdir(library_path):
             library_folder_path, library_name = self.check_clean_path_of_library(library_path, library_name)
             full_library_path = os.path.join(library_path, library_name)
             if os.path.isdir(full_library_path) and library_name[0] != '.':
-                if os.path.exists(os.path.join(full_library_path, storage.STATEMACHINE_FILE)) \
-                        or os.path.exists(os.path.join(full_library_path, storage.STATEMACHINE_FILE_OLD)):
-                    target_dict[library_name] = full_library_path
+                old_entry = old_libraries.pop(library_name, None)
+                if self._is_library_folder(full_library_path):
+                    libraries[library_name] = full_library_path
+                    if old_entry != full_library_path:
+                        if old_entry is not None:
+                            self._unwatch_library_tree(full_library_path)
+                        self._watch_library_tree_directory(full_library_path, None)
+                    if new_index_entry is not None:
+                        new_index_entry['libraries'][library_name] = \
+                            self._get_index_modification_time(full_library_path)
+                elif isinstance(old_entry, dict):
+                    libraries[library_name] = old_entry
                 else:
-                    target_dict[library_name] = {}
-                    self._load_nested_libraries(full_library_path, target_dict[library_name])
-                    target_dict[library_name] = OrderedDict(sorted(target_dict[library_name].items()))
+                    if old_entry is not None:
+                        self._unwatch_library_tree(full_library_path)
+                    libraries[library_name] = OrderedDict()
+                    self._watch_library_tree_directory(full_library_path, libraries[library_name])
+                    folder_index_entry = self._load_nested_libraries(full_library_path, libraries[library_name],
+                                                                     old_index_folders.get(library_name))
+                    if new_index_entry is not None:
+                        new_index_entry['folders'][library_name] = folder_index_entry
+        for library_name in old_libraries:
+            self._unwatch_library_tree(os.path.join(library_path, library_name))
+        target_dict.clear()
+        target_dict.update(sorted(libraries.items()))
+        return new_index_entry
+
+    def _load_nested_libraries_from_index(self, library_path, target_dict, index_entry):
+        """Loads the libraries within path from the library index, if the folder was not modified since it was indexed
+
+        The library folders of the path are checked by their modification time. The sub folders are loaded
+        recursively with `_load_nested_libraries`.
+
+        :return: the new entry of the library index for the path, None if the folder has to be listed
+        :rtype: dict
+        """
+        if index_entry.get('mtime') is None or \
+                self._get_index_modification_time(library_path) != index_entry['mtime']:
+            return None
+        new_index_entry = {'mtime': index_entry['mtime'], 'libraries': {}, 'folders': {}}
+        for library_name, modification_time in index_entry['libraries'].items():
+            full_library_path = os.path.join(library_path, library_name)
+            if modification_time is None or \
+                    self._get_index_modification_time(full_library_path) != modification_time:
+                # e.g. the state machine file of the library was removed
+                if not self._is_library_folder(full_library_path):
+                    return None
+                modification_time = self._get_index_modification_time(full_library_path)
+            new_index_entry['libraries'][library_name] = modification_time
+        for library_name in index_entry['folders']:
+            # saving a state machine into a folder does not change the modification time of its parent
+            if self._is_library_folder(os.path.join(library_path, library_name)):
+                return None
+
+        libraries = {}
+        for library_name in new_index_entry['libraries']:
+            libraries[library_name] = os.path.join(library_path, library_name)
+            self._watch_library_tree_directory(libraries[library_name], None)
+        for library_name, folder_index_entry in index_entry['folders'].items():
+            full_library_path = os.path.join(library_path, library_name)
+            libraries[library_name] = OrderedDict()
+            self._watch_library_tree_directory(full_library_path, libraries[library_name])
+            new_index_entry['folders'][library_name] = self._load_nested_libraries(
+                full_library_path, libraries[library_name], folder_index_entry)
+        target_dict.update(sorted(libraries.items()))
+        return new_index_entry
 
     @Observable.observed
     def refresh_libraries(self):
         """Deletes all loaded libraries and reloads them from the file system
+
+        If the file system is watched and the library root paths did not change, only the changed folders are listed
+        again.
         """
-        self.initialize()
+        if self._directory_watcher is None or \
+                self._directory_watcher_type != config.global_config.get_config_value("LIBRARY_FILE_SYSTEM_WATCHER",
+                                                                                      "NONE") or \
+                self._get_configured_library_root_paths() != self._library_root_paths:
+            self.initialize()
+            return
+        self._replaced_libraries = {}
+        self._skipped_states = []
+        self._skipped_library_roots = []
+
+        self._collect_file_system_changes()
+        # parent folders first, as their update removes the folders of removed sub folders
+        changed_directories = sorted(self._changed_library_tree_directories, key=len)
+        self._changed_library_tree_directories.clear()
+        for path in changed_directories:
+            if path not in self._library_tree_directories:
+                continue
+            libraries_dict = self._library_tree_directories[path]
+            is_library_folder = self._is_library_folder(path)
+            if libraries_dict is None and is_library_folder:
+                continue  # the content of a library changed, which is handled by clean_loaded_libraries
+            if libraries_dict is not None and os.path.isdir(path) and not is_library_folder:
+                logger.debug("Updating libraries of changed folder {0}".format(path))
+                self._load_nested_libraries(path, libraries_dict)
+                continue
+            # the folder was removed or turned into or from a library folder
+            parent_libraries_dict = self._library_tree_directories.get(os.path.dirname(path))
+            if path in self._library_root_paths.values() or parent_libraries_dict is None:
+                self.initialize()
+                return
+            logger.debug("Updating libraries of folder {0}".format(os.path.dirname(path)))
+            self._load_nested_libraries(os.path.dirname(path), parent_libraries_dict)
+
+    def _start_watching(self):
+        """(Re)starts watching the library tree as configured by ``LIBRARY_FILE_SYSTEM_WATCHER``"""
+        watcher_type = config.global_config.get_config_value("LIBRARY_FILE_SYSTEM_WATCHER", "NONE")
+        if watcher_type not in ("INOTIFY", "POLLING"):
+            if watcher_type != "NONE":
+                logger.warning("Invalid value for LIBRARY_FILE_SYSTEM_WATCHER: {0}".format(watcher_type))
+            self._stop_watching()
+            return
+        if self._directory_watcher is not None and watcher_type == self._directory_watcher_type:
+            for path in self._library_tree_directories:
+                self._directory_watcher.unwatch(path)
+            self._library_tree_directories = {}
+            self._changed_library_tree_directories.clear()
+            return
+        self._stop_watching()
+        # libraries loaded without watcher might be outdated
+        self._loaded_libraries.clear()
+        self._directory_watcher = create_directory_watcher(use_inotify=watcher_type == "INOTIFY")
+        self._directory_watcher_type = watcher_type
+
+    def _stop_watching(self):
+        if self._directory_watcher is not None:
+            self._directory_watcher.close()
+        self._directory_watcher = None
+        self._directory_watcher_type = "NONE"
+        self._library_tree_directories = {}
+        self._loaded_library_directories = {}
+        self._changed_library_tree_directories.clear()
+        self._changed_loaded_libraries.clear()
+
+    def _watch_library_tree_directory(self, path, libraries_dict):
+        if self._directory_watcher is not None:
+            self._library_tree_directories[path] = libraries_dict
+            self._directory_watcher.watch(path)
+
+    def _unwatch_library_tree(self, path):
+        """Stops watching a folder of the library tree and all folders within"""
+        if self._directory_watcher is None:
+            return
+        for watched_path in list(self._library_tree_directories):
+            if watched_path == path or watched_path.startswith(path + os.sep):
+                del self._library_tree_directories[watched_path]
+                self._directory_watcher.unwatch(watched_path)
+
+    def _collect_file_system_changes(self):
+        """Sorts the changed folders reported by the watcher into library tree changes and loaded library changes"""
+        for path in self._directory_watcher.get_changed_directories():
+            if path in self._library_tree_directories:
+                self._changed_library_tree_directories.add(path)
+            if path in self._loaded_library_directories:
+                self._changed_loaded_libraries.add(self._loaded_library_directories[path])
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc3
@@ -372,6 +675,47 @@ class LibraryManager(Observable):
         else:
             logger.warning("Library manager will not create a library instance which is not in the mounted libraries.")
 
+    def get_library_state_template(self, lib_os_path):
+        """Returns the root state of the library specified via the lib_os_path
+
+        The root state is shared by all library states of the library, which copy it when needed. Thus, it must not be
+        modified.
+
+        :param lib_os_path: the location of the library
+        :return: the version of the library and its root state
+        """
+        if lib_os_path not in self._loaded_libraries:
+            self._load_library(lib_os_path)
+        state_machine = self._loaded_libraries[lib_os_path]
+        return state_machine.version, state_machine.root_state
+
+    def _load_library(self, lib_os_path):
+        """Loads a library into the loaded libraries and watches its folders, if the file system is watched"""
+        from rafcon.core.states.container_state import ContainerState
+        state_machine = library_cache.load_library_state_machine(lib_os_path)
+        self._loaded_libraries[lib_os_path] = state_machine
+        if self._directory_watcher is not None:
+            directories = [lib_os_path]
+            states = [state_machine.root_state]
+            while states:
+                state = states.pop()
+                directories.append(state.file_system_path)
+                if isinstance(state, ContainerState):
+                    states.extend(state.states.values())
+            for path in directories:
+                if path is not None and path not in self._loaded_library_directories:
+                    self._loaded_library_directories[path] = lib_os_path
+                    self._directory_watcher.watch(path, files=True)
+        return state_machine
+
+    def _remove_loaded_library(self, lib_os_path):
+        logger.debug("Removing changed library {0} from the loaded libraries".format(lib_os_path))
+        self._loaded_libraries.pop(lib_os_path, None)
+        for path, library_os_path in list(self._loaded_library_directories.items()):
+            if library_os_path == lib_os_path:
+                del self._loaded_library_directories[path]
+                self._directory_watcher.unwatch(path)
+
     def get_library_state_copy_instance(self, lib_os_path):
         """ A method to get a state copy of the library specified via the lib_os_path.
 
@@ -392,8 +736,7 @@ class LibraryManager(Observable):
             state_copy = copy.deepcopy(state_machine.root_state)
             return state_machine.version, state_copy
         else:
-            state_machine = storage.load_state_machine_from_path(lib_os_path)
-            self._loaded_libraries[lib_os_path] = state_machine
+            state_machine = self._load_library(lib_os_path)
             if config.global_config.get_config_value("NO_PROGRAMMATIC_CHANGE_OF_LIBRARY_STATES_PERFORMED", False):
                 return state_machine.version, state_machine.root_state
             else:
@@ -16,14 +16,16 @@
 
 """
 
-from future.utils import string_types
+from future.utils import string_types, native_str
 from builtins import str
 import os
-import imp
+import types
 import yaml
+from threading import RLock
 from gtkmvc3.observable import Observable
 
 from rafcon.core.config import global_config
+from rafcon.core import bytecode_cache
 from rafcon.core.id_generator import generate_script_id
 from rafcon.core.storage.storage import SCRIPT_FILE
 import rafcon.core.singleton
@@ -46,6 +48,7 @@ class Script(Observable, yaml.YAMLObject):
     :ivar path: the path where the script resides
     :ivar filename: the full name of the script file
     :ivar _compiled_module: the compiled module
+    :ivar _code: the code of the script, together with the script text and file name it was compiled for
     :ivar _script_id: the id of the script
     :ivar check_path: a flag to indicate if the path should be checked for existence
 
@@ -61,6 +64,8 @@ class Script(Observable, yaml.YAMLObject):
         self._path = None
         self._filename = None
         self._compiled_module = None
+        self._compilation_lock = RLock()
+        self._code = None
         self._script_id = generate_script_id()
         self._parent = None
 
@@ -124,26 +129,42 @@ class Script(Observable, yaml.YAMLObject):
                           "".format(os.path.join(self.path, self.filename)))
         self.script = script_text
 
+    def _get_code(self):
+        """Returns the code of the script, which is only compiled again, if the script text changed
+
+        :return: the code object
+        """
+        script_text = self.script
+        code_filename = '%s (%s)' % (self.filename, self._script_id)
+        code = self._code
+        if code is None or code[0] != script_text or code[1] != code_filename:
+            code = script_text, code_filename, bytecode_cache.compile_script(script_text, code_filename)
+            self._code = code
+        return code[2]
+
     def compile_module(self):
         """Builds a temporary module from the script file
 
+        The module is created from scratch, thus its global variables are reset. The script text is only compiled
+        again, if it changed since the last call (see :mod:`rafcon.core.bytecode_cache`).
+        Only the compilation of the very same script is serialized, the scripts of concurrent states are compiled in
+        parallel. The module is not registered in `sys.modules`, thus the global import lock is not needed.
+
         :raises exceptions.IOError: if the compilation of the script module failed
         """
-        try:
-            imp.acquire_lock()
-
-            code = compile(self.script, '%s (%s)' % (self.filename, self._script_id), 'exec')
-            # load module
-            module_name = os.path.splitext(self.filename)[0] + str(self._script_id)
-            tmp_module = imp.new_module(module_name)
-            exec(code, tmp_module.__dict__)
-            # return the module
-            self.compiled_module = tmp_module
-        except Exception as e:
-            self.compiled_module = None
-            raise
-        finally:
-            imp.release_lock()
+        with self._compilation_lock:
+            try:
+                code = self._get_code()
+                # load module
+                module_name = os.path.splitext(self.filename)[0] + str(self._script_id)
+                # Python 2 only accepts byte strings as module names
+                tmp_module = types.ModuleType(native_str(module_name))
+                exec(code, tmp_module.__dict__)
+                # return the module
+                self.compiled_module = tmp_module
+            except Exception:
+                self.compiled_module = None
+                raise
 
     @classmethod
     def to_yaml(cls, dumper, data):
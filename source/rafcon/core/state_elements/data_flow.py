@@ -137,6 +137,12 @@ class DataFlow(StateElement):
             'to_key': state_element.to_key
         }
 
+    def _invalidate_parent_lookup_tables(self):
+        """Informs the parent that the origin or target of the data flow changed"""
+        parent = self.parent
+        if parent is not None:
+            parent.invalidate_connection_lookup_tables()
+
 #########################################################################
 # Properties for all class field that must be observed by the gtkmvc3
 #########################################################################
@@ -164,7 +170,9 @@ class DataFlow(StateElement):
         if not valid:
             self._from_state = old_from_state
             self._from_key = old_from_key
+            self._invalidate_parent_lookup_tables()
             raise ValueError("The data flow origin could not be changed: {0}".format(message))
+        self._invalidate_parent_lookup_tables()
 
     @property
     def from_state(self):
@@ -179,7 +187,10 @@ class DataFlow(StateElement):
         if not isinstance(from_state, string_types):
             raise ValueError("from_state must be a string")
 
-        self._change_property_with_validity_check('_from_state', from_state)
+        try:
+            self._change_property_with_validity_check('_from_state', from_state)
+        finally:
+            self._invalidate_parent_lookup_tables()
 
     @property
     def from_key(self):
@@ -194,7 +205,10 @@ class DataFlow(StateElement):
         if not isinstance(from_key, int):
             raise ValueError("from_key must be of type int")
 
-        self._change_property_with_validity_check('_from_key', from_key)
+        try:
+            self._change_property_with_validity_check('_from_key', from_key)
+        finally:
+            self._invalidate_parent_lookup_tables()
 
     @lock_state_machine
     @Observable.observed
@@ -219,7 +233,9 @@ class DataFlow(StateElement):
         if not valid:
             self._to_state = old_to_state
             self._to_key = old_to_key
+            self._invalidate_parent_lookup_tables()
             raise ValueError("The data flow target could not be changed: {0}".format(message))
+        self._invalidate_parent_lookup_tables()
 
     @property
     def to_state(self):
@@ -234,7 +250,10 @@ class DataFlow(StateElement):
         if not isinstance(to_state, string_types):
             raise ValueError("to_state must be a string")
 
-        self._change_property_with_validity_check('_to_state', to_state)
+        try:
+            self._change_property_with_validity_check('_to_state', to_state)
+        finally:
+            self._invalidate_parent_lookup_tables()
 
     @property
     def to_key(self):
@@ -249,7 +268,10 @@ class DataFlow(StateElement):
         if not isinstance(to_key, int):
             raise ValueError("to_key must be of type int")
 
-        self._change_property_with_validity_check('_to_key', to_key)
+        try:
+            self._change_property_with_validity_check('_to_key', to_key)
+        finally:
+            self._invalidate_parent_lookup_tables()
 
     @property
     def data_flow_id(self):
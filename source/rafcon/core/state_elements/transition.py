@@ -119,6 +119,12 @@ class Transition(StateElement):
             'to_outcome': state_element.to_outcome
         }
 
+    def _invalidate_parent_lookup_tables(self):
+        """Informs the parent that the origin or target of the transition changed"""
+        parent = self.parent
+        if parent is not None:
+            parent.invalidate_connection_lookup_tables()
+
 #########################################################################
 # Properties for all class field that must be observed by the gtkmvc3
 #########################################################################
@@ -147,7 +153,9 @@ class Transition(StateElement):
         if not valid:
             self._from_state = old_from_state
             self._from_outcome = old_from_outcome
+            self._invalidate_parent_lookup_tables()
             raise ValueError("The transition origin could not be changed: {0}".format(message))
+        self._invalidate_parent_lookup_tables()
 
     @lock_state_machine
     @Observable.observed
@@ -174,7 +182,9 @@ class Transition(StateElement):
         if not valid:
             self._to_state = old_to_state
             self._to_outcome = old_to_outcome
+            self._invalidate_parent_lookup_tables()
             raise ValueError("The transition target could not be changed: {0}".format(message))
+        self._invalidate_parent_lookup_tables()
 
     @property
     def from_state(self):
@@ -190,7 +200,10 @@ class Transition(StateElement):
         if from_state is not None and not isinstance(from_state, string_types):
             raise ValueError("from_state must be a string")
 
-        self._change_property_with_validity_check('_from_state', from_state)
+        try:
+            self._change_property_with_validity_check('_from_state', from_state)
+        finally:
+            self._invalidate_parent_lookup_tables()
 
     @property
     def from_outcome(self):
@@ -206,7 +219,10 @@ class Transition(StateElement):
         if from_outcome is not None and not isinstance(from_outcome, int):
             raise ValueError("from_outcome must be of type int")
 
-        self._change_property_with_validity_check('_from_outcome', from_outcome)
+        try:
+            self._change_property_with_validity_check('_from_outcome', from_outcome)
+        finally:
+            self._invalidate_parent_lookup_tables()
 
     @property
     def to_state(self):
@@ -222,7 +238,10 @@ class Transition(StateElement):
         if to_state is not None and not isinstance(to_state, string_types):
             raise ValueError("to_state must be a string")
 
-        self._change_property_with_validity_check('_to_state', to_state)
+        try:
+            self._change_property_with_validity_check('_to_state', to_state)
+        finally:
+            self._invalidate_parent_lookup_tables()
 
     @property
     def to_outcome(self):
@@ -33,7 +33,9 @@ from gtkmvc3.observable import Observable
 from jsonconversion.jsonobject import JSONObject
 
 import rafcon
-from rafcon.core.execution.execution_history import ExecutionHistory, ExecutionHistoryStorage
+from rafcon.core.execution.execution_history import ExecutionHistory, ExecutionHistoryStorage, \
+    AsyncExecutionHistoryStorage, ExecutionTimingHistory, SHELVE_LOG_FORMAT, RECORD_LOG_FORMAT
+from rafcon.core.execution.execution_profile import production_profile_active
 from rafcon.core.id_generator import generate_state_machine_id, run_id_generator
 from rafcon.utils import log
 from rafcon.utils.hashable import Hashable
@@ -70,6 +72,8 @@ class StateMachine(Observable, JSONObject, Hashable):
         Observable.__init__(self)
 
         self._modification_lock = RLock()
+        # (path generation, root state, dict of states by their path) of the states found by get_state_by_path
+        self._state_path_index = (None, None, {})
 
         if state_machine_id is None:
             self.state_machine_id = generate_state_machine_id()
@@ -225,18 +229,37 @@ class StateMachine(Observable, JSONObject, Hashable):
 
     @Observable.observed
     def _add_new_execution_history(self):
-        new_execution_history = ExecutionHistory()
+        if production_profile_active():
+            # neither history items nor the execution log are recorded
+            new_execution_history = ExecutionTimingHistory()
+            self._execution_histories.append(new_execution_history)
+            return new_execution_history
 
+        new_execution_history = ExecutionHistory()
         if global_config.get_config_value("EXECUTION_LOG_ENABLE", False):
             base_dir = global_config.get_config_value("EXECUTION_LOG_PATH", "%RAFCON_TEMP_PATH_BASE/execution_logs")
             if base_dir.startswith('%RAFCON_TEMP_PATH_BASE'):
                 base_dir = base_dir.replace('%RAFCON_TEMP_PATH_BASE', RAFCON_TEMP_PATH_BASE)
             if not os.path.exists(base_dir):
                 os.makedirs(base_dir)
-            shelve_name = os.path.join(base_dir, '%s_rafcon_execution_log_%s.shelve' %
-                                       (time.strftime('%Y-%m-%d-%H:%M:%S', time.localtime()),
-                                        self.root_state.name.replace(' ', '-')))
-            execution_history_store = ExecutionHistoryStorage(shelve_name)
+            log_format = global_config.get_config_value("EXECUTION_LOG_FORMAT", SHELVE_LOG_FORMAT)
+            if log_format not in (SHELVE_LOG_FORMAT, RECORD_LOG_FORMAT):
+                logger.warning("Invalid EXECUTION_LOG_FORMAT '{0}', using '{1}'".format(log_format, SHELVE_LOG_FORMAT))
+                log_format = SHELVE_LOG_FORMAT
+            log_file_name = os.path.join(base_dir, '%s_rafcon_execution_log_%s.%s' %
+                                         (time.strftime('%Y-%m-%d-%H:%M:%S', time.localtime()),
+                                          self.root_state.name.replace(' ', '-'),
+                                          'rlog' if log_format == RECORD_LOG_FORMAT else 'shelve'))
+            if global_config.get_config_value("EXECUTION_LOG_ASYNC_WRITER", True):
+                queue_full_policy = global_config.get_config_value("EXECUTION_LOG_QUEUE_FULL_POLICY", "BLOCK")
+                if queue_full_policy not in ("BLOCK", "DROP"):
+                    logger.warning("Invalid EXECUTION_LOG_QUEUE_FULL_POLICY '{0}', using 'BLOCK'".format(
+                        queue_full_policy))
+                execution_history_store = AsyncExecutionHistoryStorage(
+                    log_file_name, log_format, global_config.get_config_value("EXECUTION_LOG_QUEUE_SIZE", 10000),
+                    drop_items_if_full=queue_full_policy == "DROP")
+            else:
+                execution_history_store = ExecutionHistoryStorage(log_file_name, log_format)
             new_execution_history.set_execution_history_storage(execution_history_store)
         self._execution_histories.append(new_execution_history)
         return new_execution_history
@@ -274,6 +297,16 @@ class StateMachine(Observable, JSONObject, Hashable):
         if not path:
             logger.debug("No start state specified!")
             return None
+        from rafcon.core.states.state import get_path_generation
+        # the index is valid as long as no state of this state machine was renamed, reparented or got a new id
+        path_generation = get_path_generation(self.root_state)
+        index_path_generation, index_root_state, state_index = self._state_path_index
+        if index_path_generation == path_generation and index_root_state is self.root_state:
+            if path in state_index:
+                return state_index[path]
+        else:
+            state_index = {}
+            self._state_path_index = (path_generation, self.root_state, state_index)
         from rafcon.core.states.library_state import LibraryState
         from rafcon.core.states.execution_state import ExecutionState
         path_item_list = path.split('/')
@@ -300,6 +333,7 @@ class StateMachine(Observable, JSONObject, Hashable):
                                                                                               note))
                     return None
             prev_state_id = state_id
+        state_index[path] = state
         return state
 
     def get_last_execution_log_filename(self):
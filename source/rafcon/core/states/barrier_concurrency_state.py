@@ -27,7 +27,7 @@ from rafcon.core.custom_exceptions import RecoveryModeException
 from rafcon.core.state_elements.logical_port import Outcome
 from rafcon.core.decorators import lock_state_machine
 from rafcon.core.states.concurrency_state import ConcurrencyState
-from rafcon.core.states.state import StateExecutionStatus
+from rafcon.core.states.state import StateExecutionStatus, invalidate_state_paths
 from rafcon.core.states.execution_state import ExecutionState
 from rafcon.core.states.container_state import ContainerState
 from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
@@ -70,6 +70,7 @@ class BarrierConcurrencyState(ConcurrencyState):
         if decider_state is not None:
             if isinstance(decider_state, DeciderState):
                 decider_state._state_id = UNIQUE_DECIDER_STATE_ID
+                invalidate_state_paths(decider_state)
                 states[UNIQUE_DECIDER_STATE_ID] = decider_state
             else:
                 logger.warning("Argument decider_state has to be instance of DeciderState not {}".format(decider_state))
@@ -101,7 +102,7 @@ class BarrierConcurrencyState(ConcurrencyState):
 
         :return:
         """
-        logger.debug("Starting execution of {0}{1}".format(self, " (backwards)" if self.backward_execution else ""))
+        logger.debug("Starting execution of %s%s", self, " (backwards)" if self.backward_execution else "")
         self.setup_run()
 
         # data to be accessed by the decider state
@@ -195,8 +196,7 @@ class BarrierConcurrencyState(ConcurrencyState):
         # standard state execution
         decider_state.input_data = self.get_inputs_for_state(decider_state)
         decider_state.output_data = self.create_output_dictionary_for_state(decider_state)
-        decider_state.start(self.execution_history, backward_execution=False)
-        decider_state.join()
+        decider_state.run_synchronously(self.execution_history, backward_execution=False)
         decider_state_error = None
         if decider_state.final_outcome.outcome_id == -1:
             if 'error' in decider_state.output_data:
@@ -22,13 +22,13 @@
 from weakref import ref
 from builtins import str
 from copy import copy, deepcopy
-from threading import Condition
+from threading import Condition, RLock
 from collections import OrderedDict
 
 from gtkmvc3.observable import Observable
 
 from rafcon.core.custom_exceptions import RecoveryModeException
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, lock_scoped_data
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.core.id_generator import *
 from rafcon.core.singleton import state_machine_execution_engine
@@ -73,9 +73,16 @@ class ContainerState(State):
         self._data_flows = {}
         self._scoped_variables = {}
         self._scoped_data = {}
+        self._scoped_data_snapshot = None
+        self._scoped_data_lock = RLock()
         self._current_state = None
         # condition variable to wait for not connected states
         self._transitions_cv = Condition()
+        # lookup tables for transitions and data flows, which are rebuilt on first use after a modification
+        self._transitions_by_origin = None
+        self._data_flows_by_origin = None
+        self._data_flows_by_target = None
+        self._connection_modification_counter = 0
         self._child_execution = False
         self._start_state_modified = False
 
@@ -105,12 +112,14 @@ class ContainerState(State):
         self._states = states if states is not None else {}
         for _, state in self._states.items():
             state._parent = ref(self)
+            state._set_path_scope(self._path_scope)
         self._transitions = transitions if transitions is not None else {}
         for _, transition in self._transitions.items():
             transition._parent = ref(self)
         self._data_flows = data_flows if data_flows is not None else {}
         for _, data_flow in self._data_flows.items():
             data_flow._parent = ref(self)
+        self.invalidate_connection_lookup_tables()
 
     # ---------------------------------------------------------------------------------------------
     # ----------------------------------- generic methods -----------------------------------------
@@ -240,6 +249,11 @@ class ContainerState(State):
         """
         raise NotImplementedError("The ContainerState.run() function has to be implemented!")
 
+    def _set_path_scope(self, path_scope):
+        super(ContainerState, self)._set_path_scope(path_scope)
+        for state in self._states.values():
+            state._set_path_scope(path_scope)
+
     def recursively_preempt_states(self):
         """ Preempt the state and all of it child states.
         """
@@ -1199,6 +1213,83 @@ class ContainerState(State):
         else:
             super(ContainerState, self).remove(state_element, force=force, destroy=destroy)
 
+    # ---------------------------------------------------------------------------------------------
+    # ------------------------------ connection lookup functions ----------------------------------
+    # ---------------------------------------------------------------------------------------------
+
+    def invalidate_connection_lookup_tables(self):
+        """Drops the lookup tables of the transitions and data flows
+
+        Must be called whenever transitions or data flows are added or removed or their origin or target changes. The
+        tables are rebuilt with the next lookup.
+        """
+        self._connection_modification_counter += 1
+        self._transitions_by_origin = None
+        self._data_flows_by_origin = None
+        self._data_flows_by_target = None
+
+    def _build_transition_lookup_table(self):
+        modification_counter = self._connection_modification_counter
+        transitions_by_origin = {}
+        for transition in list(self._transitions.values()):
+            transitions_by_origin[(transition.from_state, transition.from_outcome)] = transition
+        # do not store the table if the transitions were modified in the meantime
+        if modification_counter == self._connection_modification_counter:
+            self._transitions_by_origin = transitions_by_origin
+        return transitions_by_origin
+
+    def _build_data_flow_lookup_tables(self):
+        modification_counter = self._connection_modification_counter
+        data_flows_by_origin = {}
+        data_flows_by_target = {}
+        for data_flow in list(self._data_flows.values()):
+            data_flows_by_origin.setdefault((data_flow.from_state, data_flow.from_key), []).append(data_flow)
+            data_flows_by_target.setdefault((data_flow.to_state, data_flow.to_key), []).append(data_flow)
+        # do not store the tables if the data flows were modified in the meantime
+        if modification_counter == self._connection_modification_counter:
+            self._data_flows_by_origin = data_flows_by_origin
+            self._data_flows_by_target = data_flows_by_target
+        return data_flows_by_origin, data_flows_by_target
+
+    def get_transition_for_origin(self, from_state_id, from_outcome_id):
+        """Looks up the transition starting at a specific outcome of a state
+
+        :param str from_state_id: The id of the origin state
+        :param int from_outcome_id: The id of the outcome of the origin state
+        :return: The transition connected to the outcome or None
+        :rtype: rafcon.core.state_elements.transition.Transition
+        """
+        transitions_by_origin = self._transitions_by_origin
+        if transitions_by_origin is None:
+            transitions_by_origin = self._build_transition_lookup_table()
+        return transitions_by_origin.get((from_state_id, from_outcome_id))
+
+    def get_data_flows_from_port(self, from_state_id, from_key):
+        """Looks up all data flows starting at a specific data port
+
+        :param str from_state_id: The id of the state the data port belongs to
+        :param int from_key: The id of the data port
+        :return: The data flows starting at the data port
+        :rtype: list
+        """
+        data_flows_by_origin = self._data_flows_by_origin
+        if data_flows_by_origin is None:
+            data_flows_by_origin, _ = self._build_data_flow_lookup_tables()
+        return data_flows_by_origin.get((from_state_id, from_key), [])
+
+    def get_data_flows_to_port(self, to_state_id, to_key):
+        """Looks up all data flows ending at a specific data port
+
+        :param str to_state_id: The id of the state the data port belongs to
+        :param int to_key: The id of the data port
+        :return: The data flows ending at the data port
+        :rtype: list
+        """
+        data_flows_by_target = self._data_flows_by_target
+        if data_flows_by_target is None:
+            _, data_flows_by_target = self._build_data_flow_lookup_tables()
+        return data_flows_by_target.get((to_state_id, to_key), [])
+
     # ---------------------------------------------------------------------------------------------
     # ---------------------------------- transition functions -------------------------------------
     # ---------------------------------------------------------------------------------------------
@@ -1259,6 +1350,7 @@ class ContainerState(State):
                 from_state = self.states[from_state_id]
 
         # finally add transition
+        self.invalidate_connection_lookup_tables()
         if from_outcome is not None:
             if from_outcome in from_state.outcomes:
                 if to_outcome is not None:
@@ -1275,6 +1367,7 @@ class ContainerState(State):
         else:
             self.transitions[transition_id] = \
                 Transition(None, None, to_state_id, to_outcome, transition_id, self)
+        self.invalidate_connection_lookup_tables()
 
         # notify all states waiting for transition to be connected
         with self._transitions_cv:
@@ -1305,6 +1398,7 @@ class ContainerState(State):
 
         new_transition = Transition(from_state_id, from_outcome, to_state_id, to_outcome, transition_id, self)
         self.transitions[transition_id] = new_transition
+        self.invalidate_connection_lookup_tables()
 
         # notify all states waiting for transition to be connected
         with self._transitions_cv:
@@ -1324,11 +1418,7 @@ class ContainerState(State):
             raise TypeError("state must be of type State")
         if not isinstance(outcome, Outcome):
             raise TypeError("outcome must be of type Outcome")
-        result_transition = None
-        for key, transition in self.transitions.items():
-            if transition.from_state == state.state_id and transition.from_outcome == outcome.outcome_id:
-                result_transition = transition
-        return result_transition
+        return self.get_transition_for_origin(state.state_id, outcome.outcome_id)
 
     @lock_state_machine
     @Observable.observed
@@ -1344,7 +1434,9 @@ class ContainerState(State):
             raise AttributeError("The transition_id %s does not exist" % str(transition_id))
 
         self.transitions[transition_id].parent = None
-        return self.transitions.pop(transition_id)
+        transition = self.transitions.pop(transition_id)
+        self.invalidate_connection_lookup_tables()
+        return transition
 
     @lock_state_machine
     def remove_outcome_hook(self, outcome_id):
@@ -1395,6 +1487,7 @@ class ContainerState(State):
 
         self.data_flows[data_flow_id] = DataFlow(from_state_id, from_data_port_id, to_state_id, to_data_port_id,
                                                  data_flow_id, self)
+        self.invalidate_connection_lookup_tables()
         return data_flow_id
 
     @lock_state_machine
@@ -1409,7 +1502,9 @@ class ContainerState(State):
             raise AttributeError("The data_flow_id %s does not exist" % str(data_flow_id))
 
         self._data_flows[data_flow_id].parent = None
-        return self._data_flows.pop(data_flow_id)
+        data_flow = self._data_flows.pop(data_flow_id)
+        self.invalidate_connection_lookup_tables()
+        return data_flow
 
     @lock_state_machine
     def remove_data_flows_with_data_port_id(self, data_port_id):
@@ -1575,16 +1670,13 @@ class ContainerState(State):
             # for all input keys fetch the correct data_flow connection and read data into the result_dict
             actual_value = None
             actual_value_time = 0
-            for data_flow_key, data_flow in self.data_flows.items():
-
-                if data_flow.to_key == input_port_key:
-                    if data_flow.to_state == state.state_id:
-                        # fetch data from the scoped_data list: the key is the data_port_key + the state_id
-                        key = str(data_flow.from_key) + data_flow.from_state
-                        if key in self.scoped_data:
-                            if actual_value is None or actual_value_time < self.scoped_data[key].timestamp:
-                                actual_value = deepcopy(self.scoped_data[key].value)
-                                actual_value_time = self.scoped_data[key].timestamp
+            for data_flow in self.get_data_flows_to_port(state.state_id, input_port_key):
+                # fetch data from the scoped_data list: the key is the data_port_key + the state_id
+                key = str(data_flow.from_key) + data_flow.from_state
+                if key in self.scoped_data:
+                    if actual_value is None or actual_value_time < self.scoped_data[key].timestamp:
+                        actual_value = deepcopy(self.scoped_data[key].value)
+                        actual_value_time = self.scoped_data[key].timestamp
 
             if actual_value is not None:
                 result_dict[value.name] = actual_value
@@ -1595,7 +1687,7 @@ class ContainerState(State):
     # ---------------------------- functions to modify the scoped data ----------------------------
     # ---------------------------------------------------------------------------------------------
 
-    @lock_state_machine
+    @lock_scoped_data
     def add_input_data_to_scoped_data(self, dictionary):
         """Add a dictionary to the scoped data
 
@@ -1608,18 +1700,19 @@ class ContainerState(State):
         for dict_key, value in dictionary.items():
             for input_data_port_key, data_port in list(self.input_data_ports.items()):
                 if dict_key == data_port.name:
+                    # the copy is shared by all snapshots of the scoped data, see get_scoped_data_snapshot
+                    value = deepcopy(value)
                     self.scoped_data[str(input_data_port_key) + self.state_id] = \
                         ScopedData(data_port.name, value, type(value), self.state_id, ScopedVariable, parent=self)
                     # forward the data to scoped variables
-                    for data_flow_key, data_flow in self.data_flows.items():
-                        if data_flow.from_key == input_data_port_key and data_flow.from_state == self.state_id:
-                            if data_flow.to_state == self.state_id and data_flow.to_key in self.scoped_variables:
-                                current_scoped_variable = self.scoped_variables[data_flow.to_key]
-                                self.scoped_data[str(data_flow.to_key) + self.state_id] = \
-                                    ScopedData(current_scoped_variable.name, value, type(value), self.state_id,
-                                               ScopedVariable, parent=self)
+                    for data_flow in self.get_data_flows_from_port(self.state_id, input_data_port_key):
+                        if data_flow.to_state == self.state_id and data_flow.to_key in self.scoped_variables:
+                            current_scoped_variable = self.scoped_variables[data_flow.to_key]
+                            self.scoped_data[str(data_flow.to_key) + self.state_id] = \
+                                ScopedData(current_scoped_variable.name, value, type(value), self.state_id,
+                                           ScopedVariable, parent=self)
 
-    @lock_state_machine
+    @lock_scoped_data
     def add_state_execution_output_to_scoped_data(self, dictionary, state):
         """Add a state execution output to the scoped data
 
@@ -1636,19 +1729,20 @@ class ContainerState(State):
                             logger.error("The data type of output port {0} should be of type {1}, but is of type {2}".
                                          format(output_name, data_port.data_type, type(value)))
                     self.scoped_data[str(output_data_port_key) + state.state_id] = \
-                        ScopedData(data_port.name, value, type(value), state.state_id, OutputDataPort, parent=self)
+                        ScopedData(data_port.name, deepcopy(value), type(value), state.state_id, OutputDataPort,
+                                   parent=self)
 
-    @lock_state_machine
+    @lock_scoped_data
     def add_default_values_of_scoped_variables_to_scoped_data(self):
         """Add the scoped variables default values to the scoped_data dictionary
 
         """
         for key, scoped_var in self.scoped_variables.items():
             self.scoped_data[str(scoped_var.data_port_id) + self.state_id] = \
-                ScopedData(scoped_var.name, scoped_var.default_value, scoped_var.data_type, self.state_id,
+                ScopedData(scoped_var.name, deepcopy(scoped_var.default_value), scoped_var.data_type, self.state_id,
                            ScopedVariable, parent=self)
 
-    @lock_state_machine
+    @lock_scoped_data
     def update_scoped_variables_with_output_dictionary(self, dictionary, state):
         """Update the values of the scoped variables with the output dictionary of a specific state.
 
@@ -1666,14 +1760,41 @@ class ContainerState(State):
                 if not key == "error":
                     logger.warning("Output variable %s was written during state execution, "
                                    "that has no data port connected to it.", str(key))
-            for data_flow_key, data_flow in self.data_flows.items():
-                if data_flow.from_key == output_data_port_key and data_flow.from_state == state.state_id:
-                    if data_flow.to_state == self.state_id:  # is target of data flow own state id?
-                        if data_flow.to_key in self.scoped_variables.keys():  # is target data port scoped?
-                            current_scoped_variable = self.scoped_variables[data_flow.to_key]
-                            self.scoped_data[str(data_flow.to_key) + self.state_id] = \
-                                ScopedData(current_scoped_variable.name, value, type(value), state.state_id,
-                                           ScopedVariable, parent=self)
+            for data_flow in self.get_data_flows_from_port(state.state_id, output_data_port_key):
+                if data_flow.to_state == self.state_id:  # is target of data flow own state id?
+                    if data_flow.to_key in self.scoped_variables.keys():  # is target data port scoped?
+                        current_scoped_variable = self.scoped_variables[data_flow.to_key]
+                        self.scoped_data[str(data_flow.to_key) + self.state_id] = \
+                            ScopedData(current_scoped_variable.name, deepcopy(value), type(value), state.state_id,
+                                       ScopedVariable, parent=self)
+
+    def get_scoped_data_snapshot(self):
+        """Returns a snapshot of the current scoped data, e.g. for the execution history
+
+        ScopedData objects are never changed after they were added to the scoped data, a new value always replaces the
+        whole object. Their values are copied once when they are added, so that scripts still referencing them, e.g.
+        via their output dictionary, cannot modify them. Thus, snapshots can share the ScopedData objects with the
+        scoped data and with each other. If the scoped data did not change since the last snapshot, the last snapshot
+        is returned again. Snapshots must therefore be treated as read-only.
+
+        :return: A dictionary mapping the scoped data keys to ScopedData objects
+        :rtype: dict
+        """
+        scoped_data = dict(self._scoped_data)
+        last_snapshot = self._scoped_data_snapshot
+        if last_snapshot is not None and len(last_snapshot) == len(scoped_data) and \
+                all(last_snapshot.get(key) is scoped_data_entry for key, scoped_data_entry in scoped_data.items()):
+            return last_snapshot
+        self._scoped_data_snapshot = scoped_data
+        return scoped_data
+
+    def restore_scoped_data(self, scoped_data_snapshot):
+        """Restores the scoped data from a snapshot, e.g. when stepping backwards
+
+        :param dict scoped_data_snapshot: A snapshot created by :meth:`get_scoped_data_snapshot`
+        """
+        # the snapshot is shared with the execution history and must thus not be modified
+        self.scoped_data = dict(scoped_data_snapshot)
 
     # ---------------------------------------------------------------------------------------------
     # ------------------------ functions to modify the scoped data end ----------------------------
@@ -1703,6 +1824,7 @@ class ContainerState(State):
                 data_flow._from_state = self.state_id
             if data_flow.to_state == old_state_id:
                 data_flow._to_state = self.state_id
+        self.invalidate_connection_lookup_tables()
 
     def get_state_for_transition(self, transition):
         """Calculate the target state of a transition
@@ -2244,10 +2366,12 @@ class ContainerState(State):
                         transition_ids_to_delete.append(transition.transition_id)
                 else:
                     self._transitions = old_transitions
+                    self.invalidate_connection_lookup_tables()
                     raise
 
         self._transitions = dict((transition_id, t) for (transition_id, t) in self._transitions.items()
                                  if transition_id not in transition_ids_to_delete)
+        self.invalidate_connection_lookup_tables()
 
         # check that all old_transitions are no more referencing self as there parent
         for old_transition in old_transitions.values():
@@ -2301,10 +2425,12 @@ class ContainerState(State):
                         data_flow_ids_to_delete.append(data_flow.data_flow_id)
                 else:
                     self._data_flows = old_data_flows
+                    self.invalidate_connection_lookup_tables()
                     raise
 
         self._data_flows = dict((data_flow_id, d) for (data_flow_id, d) in self._data_flows.items()
                                 if data_flow_id not in data_flow_ids_to_delete)
+        self.invalidate_connection_lookup_tables()
 
         # check that all old_data_flows are no more referencing self as there parent
         for old_data_flow in old_data_flows.values():
@@ -2418,7 +2544,7 @@ class ContainerState(State):
         return self._scoped_data
 
     @scoped_data.setter
-    @lock_state_machine
+    @lock_scoped_data
     # @Observable.observed
     def scoped_data(self, scoped_data):
         if not isinstance(scoped_data, dict):
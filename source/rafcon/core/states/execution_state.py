@@ -87,6 +87,11 @@ class ExecutionState(State):
         super(ExecutionState, self).update_hash(obj_hash)
         obj_hash.update(self.get_object_hash_string(self.script.script))
 
+    def update_storage_hash(self, obj_hash):
+        super(ExecutionState, self).update_storage_hash(obj_hash)
+        obj_hash.update(self.get_object_hash_string(self.script.script))
+        return obj_hash
+
     @classmethod
     def from_dict(cls, dictionary):
         name = dictionary['name']
@@ -139,7 +144,7 @@ class ExecutionState(State):
         if self.is_root_state:
             self.execution_history.push_call_history_item(self, CallType.EXECUTE, None, self.input_data)
 
-        logger.debug("Running {0}{1}".format(self, " (backwards)" if self.backward_execution else ""))
+        logger.debug("Running %s%s", self, " (backwards)" if self.backward_execution else "")
         if self.backward_execution:
             self.setup_backward_run()
         else:
@@ -58,7 +58,7 @@ class HierarchyState(ContainerState):
         """ This function covers the whole initialization routine before executing a hierarchy state.
         :return:
         """
-        logger.debug("Starting execution of {0}{1}".format(self, " (backwards)" if self.backward_execution else ""))
+        logger.debug("Starting execution of %s%s", self, " (backwards)" if self.backward_execution else "")
 
         # reset variables
         self.child_state = None
@@ -75,7 +75,7 @@ class HierarchyState(ContainerState):
         if self.backward_execution:
             last_history_item = self.execution_history.pop_last_item()
             assert isinstance(last_history_item, ReturnItem)
-            self.scoped_data = last_history_item.scoped_data
+            self.restore_scoped_data(last_history_item.scoped_data)
 
         else:  # forward_execution
             self.execution_history.push_call_history_item(self, CallType.CONTAINER, self, self.input_data)
@@ -117,6 +117,11 @@ class HierarchyState(ContainerState):
                     else:
                         break
                 elif execution_mode == StateMachineExecutionStatus.BACKWARD:
+                    if not self.execution_history.is_backward_step_possible():
+                        logger.warning("Cannot step back further in {0}, as the required execution history items "
+                                       "were already removed from memory".format(self))
+                        # wait for the next execution command
+                        continue
                     break_loop = self._handle_backward_execution_before_child_execution()
                     if break_loop:
                         break
@@ -178,7 +183,7 @@ class HierarchyState(ContainerState):
                 self.child_state.state_execution_status = StateExecutionStatus.INACTIVE
             return True
         assert isinstance(last_history_item, ReturnItem)
-        self.scoped_data = last_history_item.scoped_data
+        self.restore_scoped_data(last_history_item.scoped_data)
         self.child_state = last_history_item.state_reference
         return False
 
@@ -202,10 +207,8 @@ class HierarchyState(ContainerState):
         if not self.backward_execution:  # only add history item if it is not a backward execution
             self.execution_history.push_call_history_item(
                 self.child_state, CallType.EXECUTE, self, self.child_state.input_data)
-        self.child_state.start(self.execution_history, backward_execution=self.backward_execution,
-                               generate_run_id=False)
-
-        self.child_state.join()
+        self.child_state.run_synchronously(self.execution_history, backward_execution=self.backward_execution,
+                                           generate_run_id=False)
 
         # this line is important to indicate the parent the current execution status
         # it may also change during the execution of an hierarchy state
@@ -243,7 +246,7 @@ class HierarchyState(ContainerState):
         last_history_item = self.execution_history.pop_last_item()
         assert isinstance(last_history_item, CallItem)
         # copy the scoped_data of the history from the point before the child_state was executed
-        self.scoped_data = last_history_item.scoped_data
+        self.restore_scoped_data(last_history_item.scoped_data)
 
         # this is a look-ahead step to directly leave this hierarchy-state if the last child_state
         # was executed; this leads to the backward and forward execution of a hierarchy child_state
@@ -252,7 +255,7 @@ class HierarchyState(ContainerState):
         if last_history_item.state_reference is self:
             last_history_item = self.execution_history.pop_last_item()
             assert isinstance(last_history_item, CallItem)
-            self.scoped_data = last_history_item.scoped_data
+            self.restore_scoped_data(last_history_item.scoped_data)
             self.child_state.state_execution_status = StateExecutionStatus.INACTIVE
             return True
         return False
@@ -21,6 +21,7 @@ from future.utils import string_types
 from builtins import str
 from weakref import ref
 from copy import copy, deepcopy
+from threading import RLock
 
 from gtkmvc3.observable import Observable
 from rafcon.core.states.state import StateExecutionStatus
@@ -34,6 +35,9 @@ from rafcon.utils.hashable import Hashable
 
 logger = log.get_logger(__name__)
 
+# guards the creation of the state copies of all library states, which happens rarely
+_state_copy_creation_lock = RLock()
+
 
 class LibraryState(State):
     """A class to represent a library state for the state machine
@@ -56,6 +60,11 @@ class LibraryState(State):
     :ivar dict allow_user_interaction: flag to indicate if the user can support in localizing moved libraries
     :ivar skip_runtime_data_initialization: flag to indicate if the runtime-data data structures have to be initialized,
                                             this is not needed e.g. in the case of a copy
+
+    The root state of the library is shared by all library states of the library as template, which is never modified.
+    A library state only copies its outcomes and data ports from the template. The copy of the whole library root
+    state, :attr:`state_copy`, is created when it is accessed the first time, e.g. when the library state is executed.
+    Read-only operations like comparisons, hashing and statistics use the template as long as there is no copy.
     """
 
     yaml_tag = u'!LibraryState'
@@ -64,6 +73,7 @@ class LibraryState(State):
     _library_name = None
     _version = None
     _state_copy = None
+    _library_template = None
 
     _input_data_port_runtime_values = {}
     _use_runtime_value_input_data_ports = {}
@@ -100,10 +110,10 @@ class LibraryState(State):
             logger.info("New library name '{0}' is located at {1}".format(new_library_name, new_library_path))
 
         # key = load_library_root_state_timer.start()
-        lib_version, state_copy = library_manager.get_library_state_copy_instance(self.lib_os_path)
+        lib_version, library_template = library_manager.get_library_state_template(self.lib_os_path)
         if not str(lib_version) == version and not str(lib_version) == "None":
             raise AttributeError("Library does not have the correct version!")
-        self.state_copy = state_copy
+        self._library_template = library_template
 
         if safe_init:
             LibraryState._safe_init(self, name)
@@ -123,30 +133,63 @@ class LibraryState(State):
         self.initialized = True
 
     def _safe_init(self, name):
-        self.state_copy.parent = self
         if name is None:
-            self.name = self.state_copy.name
-        # copy all ports and outcomes of self.state_copy to let the library state appear like the container state
-        # this will also set the parent of all outcomes and data ports to self
-        self.outcomes = self.state_copy.outcomes
-        self.input_data_ports = self.state_copy.input_data_ports
-        self.output_data_ports = self.state_copy.output_data_ports
+            self.name = self._library_template.name
+        # copy all ports and outcomes of the library root state to let the library state appear like the container
+        # state, this will also set the parent of all outcomes and data ports to self
+        self.outcomes = {key: copy(outcome) for key, outcome in self._library_template.outcomes.items()}
+        self.input_data_ports = {key: copy(port) for key, port in self._library_template.input_data_ports.items()}
+        self.output_data_ports = {key: copy(port) for key, port in self._library_template.output_data_ports.items()}
 
     def _unsafe_init(self, name):
-        self.state_copy._parent = ref(self)
         if name is None:
-            self._name = self.state_copy.name
-        self._outcomes = self.state_copy.outcomes
+            self._name = self._library_template.name
+        self._outcomes = {key: copy(outcome) for key, outcome in self._library_template.outcomes.items()}
         # add parents manually
         for outcome_id, outcome in self._outcomes.items():
             outcome._parent = ref(self)
-        self._input_data_ports = self.state_copy.input_data_ports
+        self._input_data_ports = {key: copy(port) for key, port in self._library_template.input_data_ports.items()}
         for port_id, port in self._input_data_ports.items():
             port._parent = ref(self)
-        self._output_data_ports = self.state_copy.output_data_ports
+        self._output_data_ports = {key: copy(port) for key, port in self._library_template.output_data_ports.items()}
         for port_id, port in self._output_data_ports.items():
             port._parent = ref(self)
 
+    def _create_state_copy(self):
+        """Creates the state copy from the library template
+
+        The state copy shares the outcomes and data ports of the library state, like the library state appears like
+        the library root state.
+        """
+        with _state_copy_creation_lock:
+            if self._state_copy is not None or self._library_template is None:
+                return
+            state_copy = deepcopy(self._library_template)
+            state_copy._parent = ref(self)
+            # the paths of the other states are not changed by the new states
+            state_copy._set_path_scope(self._path_scope)
+            state_copy._outcomes = self._outcomes
+            state_copy._input_data_ports = self._input_data_ports
+            state_copy._output_data_ports = self._output_data_ports
+            # the execution flags of the library state are the ones its library root state would have got recursively
+            if self.preempted:
+                state_copy.recursively_preempt_states()
+            if self.paused:
+                state_copy.recursively_pause_states()
+            if self.started:
+                state_copy.recursively_resume_states()
+            self._state_copy = state_copy
+
+    @property
+    def state_copy_initialized(self):
+        """Whether the copy of the library root state was created"""
+        return self._state_copy is not None
+
+    @property
+    def _library_root_state(self):
+        """The state copy if created, else the library template, which must only be used read-only"""
+        return self._state_copy if self._state_copy is not None else self._library_template
+
     def _handle_runtime_values(self, input_data_port_runtime_values, use_runtime_value_input_data_ports,
                                output_data_port_runtime_values, use_runtime_value_output_data_ports):
         # handle input runtime values
@@ -212,7 +255,7 @@ class LibraryState(State):
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
             return False
-        return str(self) == str(other) and self._state_copy == other.state_copy
+        return str(self) == str(other) and self._library_root_state == other._library_root_state
 
     def __copy__(self):
         income = self._income
@@ -234,11 +277,19 @@ class LibraryState(State):
     def destroy(self, recursive=True):
         super(LibraryState, self).destroy(recursive)
         if recursive:
-            if self.state_copy:
-                self.state_copy.destroy(recursive)
-            else:
+            if self._state_copy:
+                self._state_copy.destroy(recursive)
+            elif self._library_template is None:
                 logger.verbose("Multiple calls of destroy {0}".format(self))
             self._state_copy = None
+            # the template is shared with other library states, thus it is not destroyed
+            self._library_template = None
+
+    def _prepare_start(self, execution_history, backward_execution, generate_run_id):
+        super(LibraryState, self)._prepare_start(execution_history, backward_execution, generate_run_id)
+        # the state copy is run directly by run()
+        if self._state_copy is not None:
+            self._state_copy.preempted = False
 
     def run(self):
         """ This defines the sequence of actions that are taken when the library state is executed
@@ -247,7 +298,7 @@ class LibraryState(State):
         :return:
         """
         self.state_execution_status = StateExecutionStatus.ACTIVE
-        logger.debug("Entering library state '{0}' with name '{1}'".format(self.library_name, self.name))
+        logger.debug("Entering library state '%s' with name '%s'", self.library_name, self.name)
         # self.state_copy.parent = self.parent
         self.state_copy._run_id = self._run_id
         self.state_copy.input_data = self.input_data
@@ -255,7 +306,7 @@ class LibraryState(State):
         self.state_copy.execution_history = self.execution_history
         self.state_copy.backward_execution = self.backward_execution
         self.state_copy.run()
-        logger.debug("Exiting library state '{0}' with name '{1}'".format(self.library_name, self.name))
+        logger.debug("Exiting library state '%s' with name '%s'", self.library_name, self.name)
         self.state_execution_status = StateExecutionStatus.WAIT_FOR_NEXT_STATE
         self.finalize(self.state_copy.final_outcome)
 
@@ -263,19 +314,25 @@ class LibraryState(State):
         """Preempt the state and all of it child states.
         """
         super(LibraryState, self).recursively_preempt_states()
-        self.state_copy.recursively_preempt_states()
+        # a not yet created state copy gets the execution flags on creation
+        if self._state_copy is not None:
+            self._state_copy.recursively_preempt_states()
 
     def recursively_pause_states(self):
         """Pause the state and all of it child states.
         """
         super(LibraryState, self).recursively_pause_states()
-        self.state_copy.recursively_pause_states()
+        # a not yet created state copy gets the execution flags on creation
+        if self._state_copy is not None:
+            self._state_copy.recursively_pause_states()
 
     def recursively_resume_states(self):
         """Resume the state and all of it child states.
         """
         super(LibraryState, self).recursively_resume_states()
-        self.state_copy.recursively_resume_states()
+        # a not yet created state copy gets the execution flags on creation
+        if self._state_copy is not None:
+            self._state_copy.recursively_resume_states()
 
     @lock_state_machine
     def add_outcome(self, name, outcome_id=None):
@@ -355,7 +412,7 @@ class LibraryState(State):
     @lock_state_machine
     @Observable.observed
     def set_input_runtime_value(self, input_data_port_id, value):
-        checked_value = self.state_copy.input_data_ports[input_data_port_id].check_default_value(value)
+        checked_value = self.input_data_ports[input_data_port_id].check_default_value(value)
         self._input_data_port_runtime_values[input_data_port_id] = checked_value
 
     @lock_state_machine
@@ -366,7 +423,7 @@ class LibraryState(State):
     @lock_state_machine
     @Observable.observed
     def set_output_runtime_value(self, output_data_port_id, value):
-        checked_value = self.state_copy.output_data_ports[output_data_port_id].check_default_value(value)
+        checked_value = self.output_data_ports[output_data_port_id].check_default_value(value)
         self._output_data_port_runtime_values[output_data_port_id] = checked_value
 
     @lock_state_machine
@@ -409,7 +466,7 @@ class LibraryState(State):
 
     def update_hash(self, obj_hash):
         super(LibraryState, self).update_hash(obj_hash)
-        self.state_copy.update_hash(obj_hash)
+        self._library_root_state.update_hash(obj_hash)
 
     @staticmethod
     def state_to_dict(state):
@@ -432,21 +489,21 @@ class LibraryState(State):
         Returns the numer of child states. As per default states do not have child states return 1.
         :return:
         """
-        return self.state_copy.get_states_statistics(hierarchy_level)
+        return self._library_root_state.get_states_statistics(hierarchy_level)
 
     def get_number_of_transitions(self):
         """
         Return the number of transitions for a state. Per default states do not have transitions.
         :return:
         """
-        return self.state_copy.get_number_of_transitions()
+        return self._library_root_state.get_number_of_transitions()
 
     def get_number_of_data_flows(self):
         """
         Return the number of data flows for a state. Per default states do not have data flows.
         :return:
         """
-        return self.state_copy.get_number_of_data_flows()
+        return self._library_root_state.get_number_of_data_flows()
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc3
@@ -504,7 +561,10 @@ class LibraryState(State):
     def state_copy(self):
         """Property for the _state_copy field
 
+        The state copy is created from the library template on first access.
         """
+        if self._state_copy is None:
+            self._create_state_copy()
         return self._state_copy
 
     @state_copy.setter
@@ -603,6 +663,17 @@ class LibraryState(State):
         else:
             return self.lib_os_path + PATH_SEPARATOR + appendix
 
+    def _get_path_of_children(self, path_type, validity):
+        # the states of a library are stored in the library and not in the state machine of the library state
+        if path_type == 'storage':
+            return self.lib_os_path
+        return super(LibraryState, self)._get_path_of_children(path_type, validity)
+
+    def _set_path_scope(self, path_scope):
+        super(LibraryState, self)._set_path_scope(path_scope)
+        if self._state_copy is not None:
+            self._state_copy._set_path_scope(path_scope)
+
     @property
     def library_hierarchy_depth(self):
         """ Calculates the library hierarchy depth
@@ -46,7 +46,7 @@ class PreemptiveConcurrencyState(ConcurrencyState):
 
         :return:
         """
-        logger.debug("Starting execution of {0}{1}".format(self, " (backwards)" if self.backward_execution else ""))
+        logger.debug("Starting execution of %s%s", self, " (backwards)" if self.backward_execution else "")
         self.setup_run()
 
         try:
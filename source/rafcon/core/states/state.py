@@ -28,6 +28,7 @@ import queue
 import copy
 import os
 import threading
+from itertools import count
 from builtins import staticmethod
 from weakref import ref
 import copy
@@ -44,17 +45,60 @@ from rafcon.core.state_elements.logical_port import Income, Outcome
 from rafcon.core.state_elements.scope import ScopedData
 from rafcon.core.storage import storage
 from rafcon.core.config import global_config
+from rafcon.core.execution.state_thread_pool import get_state_thread_pool, pooled_execution_enabled
 from rafcon.utils import classproperty
 from rafcon.utils import log
 from rafcon.utils import multi_event
 from rafcon.utils.constants import RAFCON_TEMP_PATH_STORAGE
 from rafcon.utils.hashable import Hashable
 from rafcon.utils.vividict import Vividict
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, observed_execution_event
 
 logger = log.get_logger(__name__)
 PATH_SEPARATOR = '/'
 
+# the generations of all path scopes are drawn from this counter, so that they are unique across the scopes;
+# drawing from it is atomic
+_path_generations = count()
+
+
+class _StatePathScope(object):
+    """The generation of the paths of a tree of states, i.e. of a state machine
+
+    All states of a tree share the scope of their root state. The generation changes whenever a state of the tree is
+    renamed, reparented or gets a new id, which invalidates the cached paths of the states of the tree only.
+    """
+    __slots__ = ['generation']
+
+    def __init__(self):
+        self.generation = next(_path_generations)
+
+    def invalidate(self):
+        self.generation = next(_path_generations)
+
+
+def invalidate_state_paths(state):
+    """Invalidates the cached paths of all states in the tree of the given state
+
+    The setters of the name and the id of a state call this function. It has to be called as well, if these fields
+    are changed directly, e.g. while initializing a state.
+
+    :param State state: a state of the tree
+    """
+    state._path_scope.invalidate()
+
+
+def get_path_generation(state):
+    """Returns the current generation of the paths of the tree of the given state
+
+    The generation changes, whenever the path of a state of the tree might have changed. Thus it can be used to
+    validate data derived from state paths, e.g. an index of states by their path.
+
+    :param State state: a state of the tree
+    :rtype: int
+    """
+    return state._path_scope.generation
+
 
 class State(Observable, YAMLObject, JSONObject, Hashable):
 
@@ -62,6 +106,11 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
     It inherits from Observable to make a change of its fields observable.
 
+    The structure of a state is only changed while holding the modification lock of its state machine. The runtime
+    data of the state, e.g. its input and output data and its execution status, is changed during execution without
+    this lock, as each field is replaced as a whole. Thus concurrent branches of a state machine do not block each
+    other.
+
     :ivar str State.name: the name of the state
     :ivar str State.state_id: the id of the state
     :ivar dict State.input_data_ports: holds the input data ports of the state
@@ -80,6 +129,9 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                  income=None, outcomes=None, parent=None, safe_init=True):
 
         Observable.__init__(self)
+        # path type -> (validity of the path, path)
+        self._cached_paths = {}
+        self._path_scope = _StatePathScope()
         self._state_id = None
         self._name = None
         self._input_data_ports = {}
@@ -113,6 +165,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         # before storing a state the file_system_path cannot return the file system path
         # therefore this variable is None till the state was stored
         self._file_system_path = None
+        # the folder and storage hash of the state, when it was last stored or loaded
+        self._storage_record = None
 
         self.thread = None
         self._run_id = None
@@ -158,6 +212,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         self._name = str(name) if isinstance(name, (int, float)) else name
         if parent:
             self._parent = ref(parent)
+            if isinstance(parent, State):
+                self._set_path_scope(parent._path_scope)
         else:
             self._parent = None
         self._input_data_ports = input_data_ports if input_data_ports is not None else {}
@@ -229,6 +285,15 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         Hashable.update_hash_from_dict(obj_hash, self.semantic_data)
         return obj_hash
 
+    def update_storage_hash(self, obj_hash):
+        """Updates the hash with all data stored in the folder of the state, excluding child states
+
+        :param obj_hash: The hash object (see Python hashlib)
+        """
+        obj_hash.update(self.get_object_hash_string(type(self).__name__))
+        State.update_hash(self, obj_hash)
+        return obj_hash
+
     @classmethod
     def from_dict(cls, dictionary):
         """ An abstract method each state has to implement.
@@ -281,14 +346,42 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     def start(self, execution_history, backward_execution=False, generate_run_id=True):
         """ Starts the execution of the state in a new thread.
 
+        Depending on the ``STATE_EXECUTION_BACKEND`` config value, the state is either run in a thread of its own or
+        in a reusable thread of the state thread pool.
+
+        :return:
+        """
+        self._prepare_start(execution_history, backward_execution, generate_run_id)
+        if pooled_execution_enabled():
+            self.thread = get_state_thread_pool().submit(self.run)
+        else:
+            self.thread = threading.Thread(target=self.run)
+            self.thread.start()
+
+    def run_synchronously(self, execution_history, backward_execution=False, generate_run_id=True):
+        """ Executes the state and returns after the state finished its execution.
+
+        This is used by container states executing one child after the other. With the "POOL" execution backend the
+        state is run directly in the calling thread, otherwise this is equivalent to calling start() and join().
+
         :return:
         """
+        if not pooled_execution_enabled():
+            self.start(execution_history, backward_execution, generate_run_id)
+            self.join()
+            return
+        self._prepare_start(execution_history, backward_execution, generate_run_id)
+        self.thread = None
+        self.run()
+
+    def _prepare_start(self, execution_history, backward_execution, generate_run_id):
+        # reset in the starting thread, so that a preemption before the state runs, e.g. while it waits for a thread of
+        # the pool, is not lost
+        self.preempted = False
         self.execution_history = execution_history
         if generate_run_id:
             self._run_id = run_id_generator()
         self.backward_execution = copy.copy(backward_execution)
-        self.thread = threading.Thread(target=self.run)
-        self.thread.start()
 
     def generate_run_id(self):
         self._run_id = run_id_generator()
@@ -310,7 +403,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         """
         self._execution_counter += 1
         self.state_execution_status = StateExecutionStatus.ACTIVE
-        self.preempted = False
         if not isinstance(self.input_data, dict):
             raise TypeError("input_data must be of type dict")
         if not isinstance(self.output_data, dict):
@@ -319,7 +411,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
     def setup_backward_run(self):
         self.state_execution_status = StateExecutionStatus.ACTIVE
-        self.preempted = False
 
     def run(self, *args, **kwargs):
         """Implementation of the abstract run() method of the :class:`threading.Thread`
@@ -351,7 +442,11 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         """Calculates the state that was executed before this state
 
         :return: The last state in the execution history
+        :raises exceptions.RuntimeError: with the production execution profile, as no history items are recorded
         """
+        from rafcon.core.execution.execution_history import ExecutionTimingHistory
+        if isinstance(self.execution_history, ExecutionTimingHistory):
+            raise RuntimeError("The previously executed state is unknown with the production execution profile")
         return self.execution_history.get_last_history_item().prev.state_reference
 
     # ---------------------------------------------------------------------------------------------
@@ -560,55 +655,75 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     # ---------------------------------------------------------------------------------------------
 
     def get_path(self, appendix=None, by_name=False):
-        """ Recursively create the path of the state.
+        """ Create the path of the state.
 
-        The path is generated in bottom up method i.e. from the nested child states to the root state. The method
-        concatenates either State.state_id (always unique) or State.name (maybe not unique but human readable) as
-        state identifier for the path.
+        The path is the concatenation of the state identifiers from the root state to this state. Either State.state_id
+        (always unique) or State.name (maybe not unique but human readable) is used as state identifier. The paths are
+        cached and only created again after a state has been renamed, reparented or got a new id.
 
-        :param str appendix: the part of the path that was already calculated by previous function calls
+        :param str appendix: a path to be appended to the path of the state
         :param bool by_name: The boolean enables name usage to generate the path
         :rtype: str
         :return: the full path to the root state
         """
-        if by_name:
-            state_identifier = self.name
-        else:
-            state_identifier = self.state_id
-
-        if not self.is_root_state:
-            if appendix is None:
-                return self.parent.get_path(state_identifier, by_name)
-            else:
-                return self.parent.get_path(state_identifier + PATH_SEPARATOR + appendix, by_name)
-        else:
-            if appendix is None:
-                return state_identifier
-            else:
-                return state_identifier + PATH_SEPARATOR + appendix
+        path = self._get_cached_path('name' if by_name else 'id', self._path_scope.generation)
+        if appendix is None:
+            return path
+        return path + PATH_SEPARATOR + appendix
 
     def get_storage_path(self, appendix=None):
-        """ Recursively create the storage path of the state.
+        """ Create the storage path of the state.
 
-        The path is generated in bottom up method i.e. from the nested child states to the root state. The method
-        concatenates the concatenation of (State.name and State.state_id) as state identifier for the path.
+        The path is the concatenation of the storage ids (State.name and State.state_id) from the root state to this
+        state. Like the paths, the storage paths are cached, as long as the configuration of the storage ids is not
+        changed.
 
-        :param str appendix: the part of the path that was already calculated by previous function calls
+        :param str appendix: a path to be appended to the storage path of the state
         :rtype: str
         :return: the full path to the root state
         """
-        state_identifier = storage.get_storage_id_for_state(self)
+        validity = (self._path_scope.generation, global_config.get_config_value('STORAGE_PATH_WITH_STATE_NAME'),
+                    global_config.get_config_value('MAX_LENGTH_FOR_STATE_NAME_IN_STORAGE_PATH'))
+        path = self._get_cached_path('storage', validity)
+        if appendix is None:
+            return path
+        return path + PATH_SEPARATOR + appendix
 
-        if not self.is_root_state:
-            if appendix is None:
-                return self.parent.get_storage_path(state_identifier)
-            else:
-                return self.parent.get_storage_path(state_identifier + PATH_SEPARATOR + appendix)
+    def _get_cached_path(self, path_type, validity):
+        """Returns the path of the given type, which is only created if the cached one is not valid anymore
+
+        :param str path_type: either 'id', 'name' or 'storage'
+        :param validity: the value the path was cached with, if the cached path is still valid
+        :rtype: str
+        """
+        cached_path = self._cached_paths.get(path_type)
+        if cached_path is not None and cached_path[0] == validity:
+            return cached_path[1]
+
+        if path_type == 'storage':
+            state_identifier = storage.get_storage_id_for_state(self)
+        elif path_type == 'name':
+            state_identifier = self.name
         else:
-            if appendix is None:
-                return state_identifier
-            else:
-                return state_identifier + PATH_SEPARATOR + appendix
+            state_identifier = self.state_id
+        parent = self.parent
+        if isinstance(parent, State):
+            path = parent._get_path_of_children(path_type, validity) + PATH_SEPARATOR + state_identifier
+        else:
+            path = state_identifier
+        self._cached_paths[path_type] = (validity, path)
+        return path
+
+    def _get_path_of_children(self, path_type, validity):
+        """Returns the path the identifiers of the child states are appended to"""
+        return self._get_cached_path(path_type, validity)
+
+    def _set_path_scope(self, path_scope):
+        """Sets the path scope of the state and its descendants, e.g. when the state is added to a container state
+
+        :param _StatePathScope path_scope: the path scope of the new tree of the state
+        """
+        self._path_scope = path_scope
 
     def get_state_machine(self):
         """Get a reference of the state_machine the state belongs to
@@ -925,6 +1040,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 state_id = state_id_generator(used_state_ids=used_ids)
 
         self._state_id = state_id
+        invalidate_state_paths(self)
 
     def get_states_statistics(self, hierarchy_level):
         """Get states statistic tuple
@@ -1048,6 +1164,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 raise ValueError("Name must have at least one character")
 
         self._name = name
+        invalidate_state_paths(self)
 
     @property
     def parent(self):
@@ -1065,6 +1182,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     @lock_state_machine
     @Observable.observed
     def parent(self, parent):
+        was_child_state = isinstance(self.parent, State)
         if parent is None:
             self._parent = None
         else:
@@ -1073,6 +1191,12 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 raise TypeError("parent must be of type State or StateMachine or None")
 
             self._parent = ref(parent)
+        # the paths of the former tree of the state changed, e.g. the state was removed
+        invalidate_state_paths(self)
+        if isinstance(parent, State):
+            self._set_path_scope(parent._path_scope)
+        elif was_child_state:
+            self._set_path_scope(_StatePathScope())
 
     @property
     def input_data_ports(self):
@@ -1277,7 +1401,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._input_data
 
     @input_data.setter
-    @lock_state_machine
     #@Observable.observed
     def input_data(self, input_data):
         if not isinstance(input_data, dict):
@@ -1292,7 +1415,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._output_data
 
     @output_data.setter
-    @lock_state_machine
     #@Observable.observed
     def output_data(self, output_data):
         if not isinstance(output_data, dict):
@@ -1306,7 +1428,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._preempted.is_set()
 
     @preempted.setter
-    @lock_state_machine
     def preempted(self, preempted):
         if not isinstance(preempted, bool):
             raise TypeError("preempted must be of type bool")
@@ -1322,7 +1443,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._started.is_set()
 
     @started.setter
-    @lock_state_machine
     def started(self, started):
         if not isinstance(started, bool):
             raise TypeError("started must be of type bool")
@@ -1338,7 +1458,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._paused.is_set()
 
     @paused.setter
-    @lock_state_machine
     def paused(self, paused):
         if not isinstance(paused, bool):
             raise TypeError("paused must be of type bool")
@@ -1373,7 +1492,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._concurrency_queue
 
     @concurrency_queue.setter
-    @lock_state_machine
     #@Observable.observed
     def concurrency_queue(self, concurrency_queue):
         if not isinstance(concurrency_queue, queue.Queue):
@@ -1392,7 +1510,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._final_outcome
 
     @final_outcome.setter
-    @lock_state_machine
     #@Observable.observed
     def final_outcome(self, final_outcome):
         if not isinstance(final_outcome, Outcome):
@@ -1437,8 +1554,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._state_execution_status
 
     @state_execution_status.setter
-    @lock_state_machine
-    @Observable.observed
+    @observed_execution_event(coalesce=True)
     def state_execution_status(self, state_execution_status):
         if not isinstance(state_execution_status, StateExecutionStatus):
             raise TypeError("state_execution_status must be of type StateExecutionStatus")
@@ -1518,7 +1634,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         if self.concurrency_queue:
             self.concurrency_queue.put(self.state_id)
 
-        logger.debug("Finished execution of {0}: {1}".format(self, self.final_outcome))
+        logger.debug("Finished execution of %s: %s", self, self.final_outcome)
 
         return None
 
@@ -0,0 +1,195 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: library_cache
+   :synopsis: A persistent cache of the parsed state folders of libraries, shared by all RAFCON processes of a user
+
+The states themselves cannot be stored, as they hold locks and weak references. Instead, the cache holds the content
+of the state folders of a library, as read by :func:`rafcon.core.storage.storage.read_state_folders_concurrently`,
+together with the modification time and size of every file and folder read. Thus, loading a library from a valid
+cache entry only requires a `stat` of these files and folders, instead of reading and parsing all of them. The states
+are created from the cached data.
+
+Each library has a cache file, named after the hash of its path. Cache files are replaced atomically, so that
+concurrent RAFCON processes can share the cache.
+"""
+
+import os
+import sys
+import time
+import pickle
+import hashlib
+
+import rafcon
+from rafcon.utils import storage_utils
+from rafcon.utils import log
+from rafcon.utils.constants import RAFCON_TEMP_PATH_CACHE
+from rafcon.utils.filesystem import write_file_atomically, create_private_folder
+
+from rafcon.core.config import global_config
+from rafcon.core.storage import storage
+
+logger = log.get_logger(__name__)
+
+#: Version of the format of the cache files, cache files of other versions are ignored
+LIBRARY_CACHE_FORMAT_VERSION = 1
+#: Files modified less than this number of seconds before they were read are not cached, as their modification might
+#: not be reflected in their modification time, due to the time resolution of the file system
+RACY_MODIFICATION_INTERVAL = 2.
+
+
+def get_library_cache_path():
+    """Returns the folder of the library cache as configured by ``LIBRARY_CACHE_PATH``
+
+    :rtype: str
+    """
+    cache_path = global_config.get_config_value("LIBRARY_CACHE_PATH", "%RAFCON_TEMP_PATH_CACHE/libraries")
+    if cache_path.startswith('%RAFCON_TEMP_PATH_CACHE'):
+        cache_path = cache_path.replace('%RAFCON_TEMP_PATH_CACHE', RAFCON_TEMP_PATH_CACHE)
+    return os.path.abspath(os.path.expandvars(os.path.expanduser(cache_path)))
+
+
+def get_cache_file_path(library_os_path):
+    """Returns the path of the cache file of a library
+
+    :param str library_os_path: the path of the library folder
+    :rtype: str
+    """
+    library_os_path = os.path.realpath(library_os_path)
+    cache_file_name = hashlib.sha1(library_os_path.encode('utf-8')).hexdigest() + '.pickle'
+    return os.path.join(get_library_cache_path(), cache_file_name)
+
+
+def _prepare_cache_folder(cache_path):
+    """Creates the cache folder, if not existing, and checks whether it can be trusted
+
+    The cache files are unpickled, thus the folder must only be writable by the current user.
+
+    :return: whether the cache folder can be used
+    :rtype: bool
+    """
+    if create_private_folder(cache_path):
+        return True
+    if os.path.isdir(cache_path):
+        logger.warning("The library cache is not used, as its folder is not owned and exclusively writable by "
+                       "the current user: {0}".format(cache_path))
+    return False
+
+
+def _get_file_stat(path):
+    """Returns the modification time and size of a file or folder, None if it does not exist"""
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    return file_stat.st_mtime, file_stat.st_size
+
+
+def _get_paths_read(library_os_path, state_folders):
+    """Returns the paths of all files and folders that are read when loading a library
+
+    The folders are included, as their modification time changes when files or child state folders are added, removed
+    or replaced.
+    """
+    paths = [os.path.join(library_os_path, storage.STATEMACHINE_FILE)]
+    for state_path in state_folders:
+        paths.extend([state_path,
+                      os.path.join(state_path, storage.FILE_NAME_CORE_DATA),
+                      os.path.join(state_path, storage.FILE_NAME_CORE_DATA_OLD),
+                      os.path.join(state_path, storage.SCRIPT_FILE),
+                      os.path.join(state_path, storage.SEMANTIC_DATA_FILE)])
+    return paths
+
+
+def _get_cache_header():
+    return LIBRARY_CACHE_FORMAT_VERSION, rafcon.__version__, sys.version_info[0]
+
+
+def _read_cache_entry(cache_file_path, library_os_path):
+    """Reads the cache entry of a library and validates it against the files of the library
+
+    :return: the content of the `statemachine.json` and the state folders, if the entry is valid, else None
+    """
+    try:
+        with open(cache_file_path, 'rb') as cache_file:
+            header, cached_library_os_path, state_machine_dict, state_folders, file_stats = pickle.load(cache_file)
+    except (IOError, OSError):
+        return None
+    except Exception as e:
+        logger.debug("Cache file {0} of library {1} cannot be read: {2}".format(cache_file_path, library_os_path, e))
+        return None
+    if header != _get_cache_header() or cached_library_os_path != library_os_path:
+        return None
+    for path, file_stat in file_stats:
+        if _get_file_stat(path) != file_stat:
+            logger.debug("Cache entry of library {0} is outdated, as {1} changed".format(library_os_path, path))
+            return None
+    return state_machine_dict, state_folders
+
+
+def _write_cache_entry(cache_file_path, library_os_path, state_machine_dict, state_folders, read_start_time):
+    """Writes the cache entry of a library, if the library is valid and was not modified while being read"""
+    for state_folder in state_folders.values():
+        if state_folder.core_data is None or isinstance(state_folder.core_data, ValueError):
+            return
+    file_stats = [(path, _get_file_stat(path)) for path in _get_paths_read(library_os_path, state_folders)]
+    for path, file_stat in file_stats:
+        if file_stat is not None and file_stat[0] > read_start_time - RACY_MODIFICATION_INTERVAL:
+            logger.debug("Library {0} is not cached, as {1} was modified recently".format(library_os_path, path))
+            return
+    try:
+        write_file_atomically(cache_file_path, pickle.dumps(
+            (_get_cache_header(), library_os_path, state_machine_dict, state_folders, file_stats), protocol=2),
+            mode='wb')
+    except (IOError, OSError) as e:
+        logger.warning("Library {0} cannot be cached: {1}".format(library_os_path, e))
+
+
+def load_library_state_machine(library_os_path):
+    """Loads the state machine of a library, using the library cache if enabled by ``USE_LIBRARY_CACHE``
+
+    :param str library_os_path: the path of the library folder
+    :return: the loaded state machine
+    :raises ValueError: if the provided path does not contain a valid state machine
+    """
+    state_machine_file_path = os.path.join(library_os_path, storage.STATEMACHINE_FILE)
+    if not global_config.get_config_value("USE_LIBRARY_CACHE", False) or not os.path.isfile(state_machine_file_path):
+        return storage.load_state_machine_from_path(library_os_path)
+
+    library_os_path = os.path.realpath(library_os_path)
+    cache_path = get_library_cache_path()
+    if not _prepare_cache_folder(cache_path):
+        return storage.load_state_machine_from_path(library_os_path)
+    cache_file_path = get_cache_file_path(library_os_path)
+
+    cache_entry = _read_cache_entry(cache_file_path, library_os_path)
+    if cache_entry is not None:
+        logger.debug("Loading library {0} from cache".format(library_os_path))
+        state_machine_dict, state_folders = cache_entry
+    else:
+        logger.debug("Loading library {0} and caching it".format(library_os_path))
+        read_start_time = time.time()
+        state_machine_dict = storage_utils.load_objects_from_json(state_machine_file_path)
+        state_folders = storage.read_state_folders_concurrently(
+            storage.get_root_state_path(library_os_path, state_machine_dict),
+            global_config.get_config_value('STATE_MACHINE_LOADING_THREADS', 0))
+        _write_cache_entry(cache_file_path, library_os_path, state_machine_dict, state_folders, read_start_time)
+    return storage.load_state_machine_from_state_folders(library_os_path, state_machine_dict, state_folders)
+
+
+def clear_library_cache():
+    """Removes all cache files of the library cache"""
+    cache_path = get_library_cache_path()
+    if not os.path.isdir(cache_path):
+        return
+    for file_name in os.listdir(cache_path):
+        if file_name.endswith('.pickle'):
+            try:
+                os.remove(os.path.join(cache_path, file_name))
+            except OSError:  # removed concurrently by another process
+                pass
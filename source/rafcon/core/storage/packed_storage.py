@@ -0,0 +1,235 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: packed_storage
+   :synopsis: Helper functions to store a state machine in a single packed file and load it from there
+
+A packed state machine is a zip archive holding the same files as the folder format, with the folder of each state
+as member path prefix. Additionally, the archive contains a table of contents (TOC) with the hierarchy of the states
+and the files of each state. States are materialized by :func:`rafcon.core.storage.storage.load_state_recursively`,
+which reads their files from the archive instead of the folders.
+"""
+
+from builtins import object
+from builtins import str
+import os
+import json
+import zipfile
+import tempfile
+from threading import RLock
+
+from rafcon.utils import storage_utils
+from rafcon.utils.filesystem import replace_file_with_temporary_file
+from rafcon.utils import log
+from rafcon.utils.timer import measure_time
+
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage.storage import FILE_NAME_CORE_DATA, SCRIPT_FILE, SEMANTIC_DATA_FILE, STATEMACHINE_FILE, \
+    StateFolder, get_storage_id_for_state, check_state_machine_version, load_state_recursively, _parse_json_text
+
+logger = log.get_logger(__name__)
+
+#: File extension of packed state machines
+PACKED_STATEMACHINE_FILE_EXTENSION = '.rafcon'
+#: Name of the archive member holding the table of contents
+TOC_FILE = 'toc.json'
+#: Version of the packed format
+PACKED_FORMAT_VERSION = 1
+
+
+def is_packed_state_machine_path(path):
+    """Checks whether a path refers to a packed state machine file
+
+    :param str path: the path to be checked
+    :return: True, if the path has the extension of packed state machines
+    :rtype: bool
+    """
+    return str(path).endswith(PACKED_STATEMACHINE_FILE_EXTENSION)
+
+
+def _join_member_path(*elements):
+    return '/'.join(element for element in elements if element)
+
+
+class PackedStateMachineFile(object):
+    """A packed state machine file opened for reading
+
+    Opening the file only reads the table of contents. States are materialized on demand with :meth:`load_state`,
+    which reads and decodes only the files of the requested subtree.
+
+    :ivar str file_path: the path of the packed file
+    :ivar dict toc: the table of contents, mapping the member path of each state to its children and files
+    :ivar str root_state_path: the member path of the root state
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._zip_file = zipfile.ZipFile(file_path, 'r')
+        # the members of a zip file must not be read by several threads at the same time
+        self._lock = RLock()
+        try:
+            toc = json.loads(self._read(TOC_FILE))
+        except KeyError:
+            self.close()
+            raise ValueError("Provided file is not a packed state machine: {0}".format(file_path))
+        if toc['format_version'] > PACKED_FORMAT_VERSION:
+            logger.warning("The packed state machine {0} was stored in a newer format (version {1}).".format(
+                file_path, toc['format_version']))
+        self.toc = toc['states']
+        self.root_state_path = toc['root_state_path']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._zip_file.close()
+
+    def _read(self, member_path):
+        with self._lock:
+            return self._zip_file.read(member_path).decode('utf-8')
+
+    def load_state_machine_dict(self):
+        """Reads the content of the `statemachine.json` of the packed state machine
+
+        :return: the state machine dictionary
+        :rtype: dict
+        """
+        return storage_utils.load_objects_from_json_string(self._read(STATEMACHINE_FILE))
+
+    def get_child_state_paths(self, state_path=None):
+        """Returns the member paths of the child states of a state, without loading any state
+
+        :param str state_path: the member path of the state, the root state if not given
+        :return: the member paths of the child states
+        :rtype: list
+        """
+        state_path = self.root_state_path if state_path is None else state_path
+        return list(self.toc[state_path]['children'])
+
+    def read_state_folder(self, state_path):
+        """Reads the files of a state from the archive
+
+        This is the reader passed to :func:`rafcon.core.storage.storage.load_state_recursively`.
+
+        :param str state_path: the member path of the state
+        :rtype: rafcon.core.storage.storage.StateFolder
+        """
+        toc_entry = self.toc[state_path]
+        core_data = self._read(_join_member_path(state_path, FILE_NAME_CORE_DATA))
+        script_text = self._read(_join_member_path(state_path, SCRIPT_FILE)) if toc_entry['script'] else None
+        semantic_data = self._read(_join_member_path(state_path, SEMANTIC_DATA_FILE)) \
+            if toc_entry['semantic_data'] else None
+        return StateFolder(_parse_json_text(core_data), script_text, _parse_json_text(semantic_data),
+                           list(toc_entry['children']), None)
+
+    def load_state(self, state_path=None, parent=None, dirty_states=None):
+        """Materializes a state and all its descendants
+
+        :param str state_path: the member path of the state, the root state if not given
+        :param parent: the container state or state machine the state is added to
+        :param list dirty_states: a list, to which states are added that changed during loading
+        :return: the loaded state or None, if the state could not be loaded
+        """
+        state_path = self.root_state_path if state_path is None else state_path
+        dirty_states = [] if dirty_states is None else dirty_states
+        return load_state_recursively(parent, state_path, dirty_states, read_state_folder=self.read_state_folder)
+
+
+@measure_time
+def load_state_machine_from_packed_file(file_path, state_machine_id=None):
+    """Loads a state machine from a packed file
+
+    Like a state machine folder, the whole state machine is materialized.
+
+    :param str file_path: the path of the packed file
+    :param state_machine_id: an optional id for the state machine
+    :return: the loaded state machine
+    :raises ValueError: if the provided file is not a packed state machine
+    """
+    logger.debug("Loading packed state machine from file {0}...".format(file_path))
+    with PackedStateMachineFile(file_path) as packed_file:
+        state_machine_dict = packed_file.load_state_machine_dict()
+        check_state_machine_version(state_machine_dict)
+        state_machine = StateMachine.from_dict(state_machine_dict, state_machine_id)
+        state_machine.file_system_path = file_path
+        dirty_states = []
+        state_machine.root_state = packed_file.load_state(parent=state_machine, dirty_states=dirty_states)
+    if state_machine.root_state is None:
+        return  # a corresponding exception has been handled with a proper error log in load_state
+    state_machine.marked_dirty = len(dirty_states) > 0
+    return state_machine
+
+
+def _add_state_to_archive(zip_file, toc, state, parent_path):
+    from rafcon.core.states.execution_state import ExecutionState
+    from rafcon.core.states.container_state import ContainerState
+
+    state_path = _join_member_path(parent_path, get_storage_id_for_state(state))
+    zip_file.writestr(_join_member_path(state_path, FILE_NAME_CORE_DATA), storage_utils.dict_to_json_string(state))
+    toc_entry = {'children': [], 'script': False, 'semantic_data': False}
+    toc[state_path] = toc_entry
+
+    if isinstance(state, ExecutionState):
+        zip_file.writestr(_join_member_path(state_path, SCRIPT_FILE), state.script_text)
+        toc_entry['script'] = True
+
+    if state.semantic_data:
+        zip_file.writestr(_join_member_path(state_path, SEMANTIC_DATA_FILE),
+                          storage_utils.dict_to_json_string(state.semantic_data))
+        toc_entry['semantic_data'] = True
+
+    if isinstance(state, ContainerState):
+        for child_state in state.states.values():
+            toc_entry['children'].append(_add_state_to_archive(zip_file, toc, child_state, state_path))
+    return state_path
+
+
+def save_state_machine_to_packed_file(state_machine, file_path, as_copy=False):
+    """Saves a state machine into a single packed file
+
+    The file is written to a temporary file first, which then replaces any existing file at `file_path`.
+
+    :param rafcon.core.state_machine.StateMachine state_machine: the state_machine to be saved
+    :param str file_path: the path of the packed file
+    :param bool as_copy: Whether to use a copy storage for the state machine
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    state_machine.acquire_modification_lock()
+    try:
+        old_update_time = state_machine.last_update
+        state_machine.last_update = storage_utils.get_current_time_string()
+        file_descriptor, temp_file_path = tempfile.mkstemp(dir=directory, suffix=PACKED_STATEMACHINE_FILE_EXTENSION)
+        os.close(file_descriptor)
+        try:
+            with zipfile.ZipFile(temp_file_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                zip_file.writestr(STATEMACHINE_FILE, storage_utils.dict_to_json_string(state_machine.to_dict()))
+                toc = {}
+                root_state_path = _add_state_to_archive(zip_file, toc, state_machine.root_state, "")
+                zip_file.writestr(TOC_FILE, json.dumps({'format_version': PACKED_FORMAT_VERSION,
+                                                        'root_state_path': root_state_path,
+                                                        'states': toc}))
+            replace_file_with_temporary_file(temp_file_path, file_path)
+        except Exception:
+            os.remove(temp_file_path)
+            raise
+
+        if not as_copy:
+            state_machine.file_system_path = file_path
+            if state_machine.marked_dirty:
+                state_machine.marked_dirty = False
+        else:
+            state_machine.last_update = old_update_time
+        logger.debug("State machine with id {0} was saved at {1}".format(state_machine.state_machine_id, file_path))
+    finally:
+        state_machine.release_modification_lock()
@@ -25,15 +25,22 @@ import math
 import shutil
 import glob
 import copy
+import json
+import hashlib
 import yaml
 import warnings
+import atexit
+from collections import namedtuple
+from threading import Lock
+from multiprocessing.pool import ThreadPool
 from distutils.version import StrictVersion
 
 import rafcon
 
-from rafcon.utils.filesystem import read_file, write_file
+from rafcon.utils.filesystem import read_file, write_file_atomically
 from rafcon.utils import storage_utils
 from rafcon.utils import log
+from rafcon.utils.hashable import Hashable
 from rafcon.utils.timer import measure_time
 
 from rafcon.core.custom_exceptions import LibraryNotFoundException
@@ -56,6 +63,14 @@ STATEMACHINE_FILE = 'statemachine.json'
 STATEMACHINE_FILE_OLD = 'statemachine.yaml'
 ID_NAME_DELIMITER = "_"
 
+#: The content of a state folder, as read by `_read_state_folder` and passed to `load_state_recursively`
+StateFolder = namedtuple('StateFolder', ['core_data', 'script_text', 'semantic_data', 'child_state_paths',
+                                         'content_digest'])
+
+# (number of threads, pool) of the threads reading state folders
+_loading_pool = None
+_loading_pool_lock = Lock()
+
 REPLACED_CHARACTERS_FOR_NO_OS_LIMITATION = {'/': '', r'\0': '', '<': '', '>': '', ':': '_',
                                             '\\': '', '|': '_', '?': '', '*': '_'}
 
@@ -146,9 +161,16 @@ def clean_path(base_path):
     return base_path
 
 
-def save_state_machine_to_path(state_machine, base_path, delete_old_state_machine=False, as_copy=False):
+def save_state_machine_to_path(state_machine, base_path, delete_old_state_machine=False, as_copy=False,
+                               compact=False):
     """Saves a state machine recursively to the file system
 
+    Only the folders of states that changed since they were last stored or loaded from `base_path` are written. The
+    files are replaced atomically.
+
+    If `base_path` has the extension of packed state machines, the state machine is saved into a single packed file
+    (see :mod:`rafcon.core.storage.packed_storage`).
+
     The `as_copy` flag determines whether the state machine is saved as copy. If so (`as_copy=True`), some state
     machine attributes will be left untouched, such as the `file_system_path` or the `dirty_flag`.
 
@@ -156,7 +178,14 @@ def save_state_machine_to_path(state_machine, base_path, delete_old_state_machin
     :param str base_path: base_path to which all further relative paths refers to
     :param bool delete_old_state_machine: Whether to delete any state machine existing at the given path
     :param bool as_copy: Whether to use a copy storage for the state machine
+    :param bool compact: Whether to write the json files without indentation, e.g. for auto backups only read by
+        RAFCON
     """
+    from rafcon.core.storage import packed_storage
+    if packed_storage.is_packed_state_machine_path(base_path):
+        packed_storage.save_state_machine_to_packed_file(state_machine, base_path, as_copy)
+        return
+
     # warns the user in the logger when using deprecated names
     clean_path_from_deprecated_naming(base_path)
 
@@ -176,7 +205,8 @@ def save_state_machine_to_path(state_machine, base_path, delete_old_state_machin
         old_update_time = state_machine.last_update
         state_machine.last_update = storage_utils.get_current_time_string()
         state_machine_dict = state_machine.to_dict()
-        storage_utils.write_dict_to_json(state_machine_dict, os.path.join(base_path, STATEMACHINE_FILE))
+        write_file_atomically(os.path.join(base_path, STATEMACHINE_FILE),
+                              storage_utils.dict_to_json_string(state_machine_dict, compact))
 
         # set the file_system_path of the state machine
         if not as_copy:
@@ -186,7 +216,7 @@ def save_state_machine_to_path(state_machine, base_path, delete_old_state_machin
 
         # add root state recursively
         remove_obsolete_folders([root_state], base_path)
-        save_state_recursively(root_state, base_path, "", as_copy)
+        save_state_recursively(root_state, base_path, "", as_copy, compact)
 
         if state_machine.marked_dirty and not as_copy:
             state_machine.marked_dirty = False
@@ -212,7 +242,7 @@ def save_script_file_for_state_and_source_path(state, state_path_full, as_copy=F
         destination_script_file = os.path.join(state_path_full, SCRIPT_FILE)
 
         try:
-            write_file(destination_script_file, state.script_text)
+            write_file_atomically(destination_script_file, state.script_text)
         except Exception:
             logger.exception("Storing of script file failed: {0} -> {1}".format(state.get_path(),
                                                                                 destination_script_file))
@@ -223,33 +253,98 @@ def save_script_file_for_state_and_source_path(state, state_path_full, as_copy=F
             state.script.path = state_path_full
 
 
-def save_semantic_data_for_state(state, state_path_full):
+def save_semantic_data_for_state(state, state_path_full, compact=False):
     """Saves the semantic data in a separate json file.
 
     :param state: The state of which the script file should be saved
     :param str state_path_full: The path to the file system storage location of the state
+    :param bool compact: Whether to write the json file without indentation
     """
 
     destination_script_file = os.path.join(state_path_full, SEMANTIC_DATA_FILE)
 
     if state.semantic_data:
         try:
-            storage_utils.write_dict_to_json(state.semantic_data, destination_script_file)
+            write_file_atomically(destination_script_file,
+                                  storage_utils.dict_to_json_string(state.semantic_data, compact))
         except IOError:
             logger.exception("Storing of semantic data for state {0} failed! Destination path: {1}".
                              format(state.get_path(), destination_script_file))
             raise
 
 
-def save_state_recursively(state, base_path, parent_path, as_copy=False):
+def get_storage_hash(state):
+    """Calculates a hash of all data stored in the folder of a state
+
+    Next to the data of the state itself, the hash covers the names of the folders of the child states, but not
+    their content.
+
+    :param rafcon.core.states.state.State state: the state to calculate the hash for
+    :return: the hex digest of the hash
+    :rtype: str
+    """
+    from rafcon.core.states.container_state import ContainerState
+    obj_hash = state.update_storage_hash(hashlib.sha256())
+    if isinstance(state, ContainerState):
+        Hashable.update_hash_from_dict(obj_hash, sorted(get_storage_id_for_state(child_state)
+                                                        for child_state in state.states.values()))
+    return obj_hash.hexdigest()
+
+
+def get_content_digest(core_data_text, script_text, semantic_data_text, child_state_folder_names):
+    """Calculates a digest of the content of the folder of a state
+
+    :param str core_data_text: the content of the core data file
+    :param str script_text: the content of the script file or None
+    :param str semantic_data_text: the content of the semantic data file or None
+    :param child_state_folder_names: the names of the folders of the child states
+    :return: the hex digest
+    :rtype: str
+    """
+    content_hash = hashlib.sha256()
+    for text in (core_data_text, script_text, semantic_data_text):
+        content_hash.update(Hashable.get_object_hash_string(-1 if text is None else len(text)))
+        content_hash.update(Hashable.get_object_hash_string("" if text is None else text))
+    Hashable.update_hash_from_dict(content_hash, sorted(child_state_folder_names))
+    return content_hash.hexdigest()
+
+
+def _state_folder_needs_update(state, state_path_full, storage_hash):
+    """Checks whether the folder of a state has to be written
+
+    The storage record of a state holds the folder the state was last stored in or loaded from, the storage hash of
+    the state at that time and the digest of the file contents. After loading, only the digest is known, so that
+    the content of the files is generated and compared. This is still cheaper than writing the files.
+    """
+    from rafcon.core.states.execution_state import ExecutionState
+    from rafcon.core.states.container_state import ContainerState
+    if state._storage_record is None:
+        return True
+    recorded_path, recorded_storage_hash, recorded_content_digest = state._storage_record
+    if recorded_path != state_path_full or not os.path.exists(os.path.join(state_path_full, FILE_NAME_CORE_DATA)):
+        return True
+    if recorded_storage_hash is not None:
+        return recorded_storage_hash != storage_hash
+    content_digest = get_content_digest(storage_utils.dict_to_json_string(state),
+                                        state.script_text if isinstance(state, ExecutionState) else None,
+                                        storage_utils.dict_to_json_string(state.semantic_data)
+                                        if state.semantic_data else None,
+                                        [get_storage_id_for_state(child_state) for child_state in state.states.values()]
+                                        if isinstance(state, ContainerState) else [])
+    return recorded_content_digest != content_digest
+
+
+def save_state_recursively(state, base_path, parent_path, as_copy=False, compact=False):
     """Recursively saves a state to a json file
 
-    It calls this method on all its substates.
+    It calls this method on all its substates. The folder of a state is only written, if the state was not stored or
+    loaded from the very same folder before or its storage hash (see :func:`get_storage_hash`) changed since then.
 
     :param state: State to be stored
     :param base_path: Path to the state machine
     :param parent_path: Path to the parent state
     :param bool as_copy: Temporary storage flag to signal that the given path is not the new file_system_path
+    :param bool compact: Whether to write the json files without indentation
     :return:
     """
     from rafcon.core.states.execution_state import ExecutionState
@@ -257,51 +352,38 @@ def save_state_recursively(state, base_path, parent_path, as_copy=False):
 
     state_path = os.path.join(parent_path, get_storage_id_for_state(state))
     state_path_full = os.path.join(base_path, state_path)
-    if not os.path.exists(state_path_full):
-        os.makedirs(state_path_full)
+    storage_hash = get_storage_hash(state)
+    path_core_data = os.path.join(state_path_full, FILE_NAME_CORE_DATA)
 
-    storage_utils.write_dict_to_json(state, os.path.join(state_path_full, FILE_NAME_CORE_DATA))
-    if not as_copy:
-        state.file_system_path = state_path_full
+    if _state_folder_needs_update(state, state_path_full, storage_hash):
+        if not os.path.exists(state_path_full):
+            os.makedirs(state_path_full)
 
-    if isinstance(state, ExecutionState):
-        save_script_file_for_state_and_source_path(state, state_path_full, as_copy)
+        write_file_atomically(path_core_data, storage_utils.dict_to_json_string(state, compact))
+
+        if isinstance(state, ExecutionState):
+            save_script_file_for_state_and_source_path(state, state_path_full, as_copy)
 
-    save_semantic_data_for_state(state, state_path_full)
+        save_semantic_data_for_state(state, state_path_full, compact)
+
+        if isinstance(state, ContainerState):
+            remove_obsolete_folders(state.states.values(), state_path_full)
+
+    if not as_copy:
+        state._storage_record = (state_path_full, storage_hash, None)
+        state.file_system_path = state_path_full
 
     # create yaml files for all children
     if isinstance(state, ContainerState):
-        remove_obsolete_folders(state.states.values(), os.path.join(base_path, state_path))
         for state in state.states.values():
-            save_state_recursively(state, base_path, state_path, as_copy)
+            save_state_recursively(state, base_path, state_path, as_copy, compact)
 
 
-@measure_time
-def load_state_machine_from_path(base_path, state_machine_id=None):
-    """Loads a state machine from the given path
+def check_state_machine_version(state_machine_dict):
+    """Warns the user if a state machine was stored with a newer version of RAFCON
 
-    :param base_path: An optional base path for the state machine.
-    :return: a tuple of the loaded container state, the version of the state and the creation time
-    :raises ValueError: if the provided path does not contain a valid state machine
+    :param dict state_machine_dict: the content of the `statemachine.json` of the state machine
     """
-    logger.debug("Loading state machine from path {0}...".format(base_path))
-
-    state_machine_file_path = os.path.join(base_path, STATEMACHINE_FILE)
-    state_machine_file_path_old = os.path.join(base_path, STATEMACHINE_FILE_OLD)
-
-    # was the root state specified as state machine base_path to load from?
-    if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
-
-        # catch the case that a state machine root file is handed
-        if os.path.exists(base_path) and os.path.isfile(base_path):
-            base_path = os.path.dirname(base_path)
-            state_machine_file_path = os.path.join(base_path, STATEMACHINE_FILE)
-            state_machine_file_path_old = os.path.join(base_path, STATEMACHINE_FILE_OLD)
-
-        if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
-            raise ValueError("Provided path doesn't contain a valid state machine: {0}".format(base_path))
-
-    state_machine_dict = storage_utils.load_objects_from_json(state_machine_file_path)
     if 'used_rafcon_version' in state_machine_dict:
         previously_used_rafcon_version = StrictVersion(state_machine_dict['used_rafcon_version']).version
         active_rafcon_version = StrictVersion(rafcon.__version__).version
@@ -338,18 +420,81 @@ def load_state_machine_from_path(base_path, state_machine_id=None):
             logger.warning(rafcon_older_than_sm_version)
             logger.warning(note_about_possible_incompatibility)
 
+
+@measure_time
+def load_state_machine_from_path(base_path, state_machine_id=None):
+    """Loads a state machine from the given path
+
+    The path can either be a state machine folder or a packed state machine file.
+
+    :param base_path: An optional base path for the state machine.
+    :return: a tuple of the loaded container state, the version of the state and the creation time
+    :raises ValueError: if the provided path does not contain a valid state machine
+    """
+    from rafcon.core.storage import packed_storage
+    if packed_storage.is_packed_state_machine_path(base_path) and os.path.isfile(base_path):
+        return packed_storage.load_state_machine_from_packed_file(base_path, state_machine_id)
+
+    logger.debug("Loading state machine from path {0}...".format(base_path))
+
+    state_machine_file_path = os.path.join(base_path, STATEMACHINE_FILE)
+    state_machine_file_path_old = os.path.join(base_path, STATEMACHINE_FILE_OLD)
+
+    # was the root state specified as state machine base_path to load from?
+    if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
+
+        # catch the case that a state machine root file is handed
+        if os.path.exists(base_path) and os.path.isfile(base_path):
+            base_path = os.path.dirname(base_path)
+            state_machine_file_path = os.path.join(base_path, STATEMACHINE_FILE)
+            state_machine_file_path_old = os.path.join(base_path, STATEMACHINE_FILE_OLD)
+
+        if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
+            raise ValueError("Provided path doesn't contain a valid state machine: {0}".format(base_path))
+
+    state_machine_dict = storage_utils.load_objects_from_json(state_machine_file_path)
+    number_of_threads = global_config.get_config_value('STATE_MACHINE_LOADING_THREADS', 0)
+    if number_of_threads > 0:
+        state_folders = read_state_folders_concurrently(get_root_state_path(base_path, state_machine_dict),
+                                                        number_of_threads)
+    else:
+        state_folders = None
+    return load_state_machine_from_state_folders(base_path, state_machine_dict, state_folders, state_machine_id)
+
+
+def get_root_state_path(base_path, state_machine_dict):
+    """Returns the path of the folder of the root state of a state machine
+
+    :param str base_path: the path of the state machine folder
+    :param dict state_machine_dict: the content of the `statemachine.json` of the state machine
+    :rtype: str
+    """
+    if "root_state_storage_id" not in state_machine_dict:
+        return os.path.join(base_path, state_machine_dict['root_state_id'])
+    return os.path.join(base_path, state_machine_dict['root_state_storage_id'])
+
+
+def load_state_machine_from_state_folders(base_path, state_machine_dict, state_folders=None, state_machine_id=None):
+    """Creates a state machine from its already read `statemachine.json` and optionally its already read state folders
+
+    :param str base_path: the path of the state machine folder
+    :param dict state_machine_dict: the content of the `statemachine.json` of the state machine
+    :param dict state_folders: the state folders as returned by `read_state_folders_concurrently`; if not given, the
+      state folders are read while creating the states
+    :param state_machine_id: an optional id for the state machine
+    :return: the loaded state machine
+    """
+    check_state_machine_version(state_machine_dict)
+
     state_machine = StateMachine.from_dict(state_machine_dict, state_machine_id)
     if "root_state_storage_id" not in state_machine_dict:
-        root_state_storage_id = state_machine_dict['root_state_id']
         state_machine.supports_saving_state_names = False
-    else:
-        root_state_storage_id = state_machine_dict['root_state_storage_id']
 
-    root_state_path = os.path.join(base_path, root_state_storage_id)
+    root_state_path = get_root_state_path(base_path, state_machine_dict)
     state_machine.file_system_path = base_path
     dirty_states = []
     state_machine.root_state = load_state_recursively(parent=state_machine, state_path=root_state_path,
-                                                      dirty_states=dirty_states)
+                                                      dirty_states=dirty_states, state_folders=state_folders)
     if state_machine.root_state is None:
         return  # a corresponding exception has been handled with a proper error log in load_state_recursively
     if len(dirty_states) > 0:
@@ -378,7 +523,108 @@ def load_state_from_path(state_path):
     return load_state_recursively(parent=None, state_path=state_path)
 
 
-def load_state_recursively(parent, state_path=None, dirty_states=[]):
+def _get_loading_pool(number_of_threads):
+    """Returns the pool of threads for reading state folders, which is shared by all loading calls
+
+    If the pool exists with another number of threads, it is replaced. Loading calls still using the replaced pool
+    can finish, its threads exit afterwards.
+
+    :param int number_of_threads: the number of threads of the pool
+    """
+    global _loading_pool
+    with _loading_pool_lock:
+        if _loading_pool is not None:
+            pool_size, pool = _loading_pool
+            if pool_size == number_of_threads:
+                return pool
+            pool.close()
+        pool = ThreadPool(number_of_threads)
+        _loading_pool = (number_of_threads, pool)
+        return pool
+
+
+def shutdown_loading_pool():
+    """Terminates the threads of the pool for reading state folders, called at exit"""
+    global _loading_pool
+    with _loading_pool_lock:
+        if _loading_pool is not None:
+            _, pool = _loading_pool
+            pool.terminate()
+            pool.join()
+        _loading_pool = None
+
+
+atexit.register(shutdown_loading_pool)
+
+
+def _parse_json_text(text):
+    """Parses a json text without decoding objects
+
+    :return: the parsed data, None if no text is given or the ValueError if the text is not valid json
+    """
+    if text is None:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        return e
+
+
+def _read_state_folder(state_path):
+    """Reads the files of a state folder and finds the folders of its child states
+
+    This function is executed by the worker threads of `read_state_folders_concurrently`. Therefore, it does not
+    create any objects. Missing files are represented by None. It is also the reader used by `load_state_recursively`,
+    if the state folders were not read beforehand.
+
+    :param str state_path: the path of the state folder
+    :rtype: StateFolder
+    """
+    path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA)
+    # TODO: Should be removed with next minor release
+    if not os.path.exists(path_core_data):
+        path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA_OLD)
+    core_data = read_file(path_core_data)
+    script_text = read_file(state_path, SCRIPT_FILE)
+    semantic_data = read_file(state_path, SEMANTIC_DATA_FILE)
+    child_state_paths = []
+    for p in os.listdir(state_path):
+        child_state_path = os.path.join(state_path, p)
+        if os.path.isdir(child_state_path) and os.path.exists(os.path.join(child_state_path, FILE_NAME_CORE_DATA)):
+            child_state_paths.append(child_state_path)
+
+    content_digest = get_content_digest(core_data, script_text, semantic_data,
+                                        [os.path.basename(child_state_path) for child_state_path in child_state_paths])
+    return StateFolder(_parse_json_text(core_data), script_text, _parse_json_text(semantic_data), child_state_paths, content_digest)
+
+
+def read_state_folders_concurrently(root_state_path, number_of_threads):
+    """Reads the folders of a state and all its descendants concurrently
+
+    The folders of each hierarchy level are read and their json files are parsed by a pool of threads. The objects are
+    not yet created, this is done by `load_state_recursively`, which gets the result of this function passed.
+
+    :param str root_state_path: the path of the folder of the uppermost state
+    :param int number_of_threads: the number of threads reading the folders, zero to read them sequentially
+    :return: the content of the state folders, with the state folder paths as keys
+    :rtype: dict[str, StateFolder]
+    """
+    thread_pool = _get_loading_pool(number_of_threads) if number_of_threads > 0 else None
+
+    state_folders = {}
+    state_paths = [root_state_path]
+    while state_paths:
+        if len(state_paths) == 1 or thread_pool is None:
+            level_state_folders = [_read_state_folder(state_path) for state_path in state_paths]
+        else:
+            level_state_folders = thread_pool.map(_read_state_folder, state_paths)
+        state_folders.update(zip(state_paths, level_state_folders))
+        state_paths = [child_state_path for state_folder in level_state_folders
+                       for child_state_path in state_folder.child_state_paths]
+    return state_folders
+
+
+def load_state_recursively(parent, state_path=None, dirty_states=[], state_folders=None, read_state_folder=None):
     """Recursively loads the state
 
     It calls this method on each sub-state of a container state.
@@ -386,30 +632,43 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
     :param parent:  the root state of the last load call to which the loaded state will be added
     :param state_path: the path on the filesystem where to find the meta file for the state
     :param dirty_states: a dict of states which changed during loading
+    :param dict state_folders: the already read state folders as returned by `read_state_folders_concurrently`; if
+      not given, the files are read by this function
+    :param read_state_folder: a function returning the :class:`StateFolder` for a state path, used to load states that
+      are not stored in folders on the file system (see :mod:`rafcon.core.storage.packed_storage`); the state paths
+      are then only passed to this function
     :return:
     """
     from rafcon.core.states.execution_state import ExecutionState
     from rafcon.core.states.container_state import ContainerState
     from rafcon.core.states.hierarchy_state import HierarchyState
 
+    in_file_system = read_state_folder is None
+    if in_file_system:
+        read_state_folder = state_folders.__getitem__ if state_folders is not None else _read_state_folder
+
     path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA)
 
     logger.debug("Load state recursively: {0}".format(str(state_path)))
 
     # TODO: Should be removed with next minor release
-    if not os.path.exists(path_core_data):
+    if in_file_system and not os.path.exists(path_core_data):
         path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA_OLD)
 
+    state_folder = read_state_folder(state_path)
     try:
-        state_info = load_data_file(path_core_data)
+        if state_folder.core_data is None:
+            raise ValueError("Data file not found: {0}".format(path_core_data))
+        elif isinstance(state_folder.core_data, ValueError):
+            raise state_folder.core_data
+        state_info = storage_utils.decode_json_objects(state_folder.core_data)
     except ValueError as e:
         logger.exception("Error while loading state data: {0}".format(e))
         return
     except LibraryNotFoundException as e:
         logger.error("Library could not be loaded: {0}\n"
                      "Skipping library and continuing loading the state machine".format(e))
-        state_info = storage_utils.load_objects_from_json(path_core_data, as_dict=True)
-        state_id = state_info["state_id"]
+        state_id = state_folder.core_data["state_id"]
         dummy_state = HierarchyState(LIBRARY_NOT_FOUND_DUMMY_STATE_NAME, state_id=state_id)
         # set parent of dummy state
         if isinstance(parent, ContainerState):
@@ -436,32 +695,26 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
 
     # read script file if state is an ExecutionState
     if isinstance(state, ExecutionState):
-        script_text = read_file(state_path, state.script.filename)
+        if not in_file_system or state.script.filename == SCRIPT_FILE:
+            script_text = state_folder.script_text
+        else:
+            script_text = read_file(state_path, state.script.filename)
         state.script.set_script_without_compilation(script_text)
 
-    # load semantic data
-    try:
-        semantic_data = load_data_file(os.path.join(state_path, SEMANTIC_DATA_FILE))
-        state.semantic_data = semantic_data
-    except Exception as e:
-        # semantic data file does not have to be there
-        pass
+    # load semantic data, the semantic data file does not have to be there
+    if state_folder.semantic_data is not None and not isinstance(state_folder.semantic_data, ValueError):
+        state.semantic_data = storage_utils.decode_json_objects(state_folder.semantic_data)
 
     one_of_my_child_states_not_found = False
 
     # load child states
-    for p in os.listdir(state_path):
-        child_state_path = os.path.join(state_path, p)
-        if os.path.isdir(child_state_path):
-            if not os.path.exists(os.path.join(child_state_path, FILE_NAME_CORE_DATA)):
-                # this means that child_state_path is a folder, not containing a valid state
-                # this also happens when pip creates __pycache__ folders for the script.py files upon installing rafcon
-                continue
-            child_state = load_state_recursively(state, child_state_path, dirty_states)
-            if not child_state:
-                return None
-            if child_state.name is LIBRARY_NOT_FOUND_DUMMY_STATE_NAME:
-                one_of_my_child_states_not_found = True
+    for child_state_path in state_folder.child_state_paths:
+        child_state = load_state_recursively(state, child_state_path, dirty_states, state_folders,
+                                             None if in_file_system else read_state_folder)
+        if not child_state:
+            return None
+        if child_state.name is LIBRARY_NOT_FOUND_DUMMY_STATE_NAME:
+            one_of_my_child_states_not_found = True
 
     if one_of_my_child_states_not_found:
         # omit adding transitions and data flows in this case
@@ -478,11 +731,17 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
             state._data_flows = data_flows
             for _, data_flow in state.data_flows.items():
                 data_flow._parent = ref(state)
+            state.invalidate_connection_lookup_tables()
 
-    state.file_system_path = state_path
+    if in_file_system:
+        state.file_system_path = state_path
 
     if state.marked_dirty:
         dirty_states.append(state)
+    elif in_file_system and not one_of_my_child_states_not_found and \
+            os.path.basename(path_core_data) == FILE_NAME_CORE_DATA:
+        # allows to skip the state folder when saving the unchanged state
+        state._storage_record = (state_path, None, state_folder.content_digest)
 
     return state
 
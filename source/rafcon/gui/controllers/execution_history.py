@@ -33,7 +33,8 @@ from threading import RLock
 import rafcon
 
 from rafcon.core.state_machine_manager import StateMachineManager
-from rafcon.core.execution.execution_history import ConcurrencyItem, CallItem, ScopedDataItem, HistoryItem
+from rafcon.core.execution.execution_history import ConcurrencyItem, CallItem, ReturnItem, ScopedDataItem, \
+    HistoryItem
 from rafcon.core.singleton import state_machine_execution_engine
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.core.execution.execution_history import CallType, StateMachineStartItem
@@ -49,6 +50,28 @@ from rafcon.utils import log
 logger = log.get_logger(__name__)
 
 
+class EvictedHistoryItems(object):
+    """Placeholder in the history tree for the items that were removed from an execution history due to its retention
+    limits
+
+    :ivar rafcon.core.execution.execution_history.ExecutionHistory execution_history: the truncated execution history
+    :ivar int number_of_loaded_items: the number of evicted items already loaded from the execution log
+    """
+    run_id = None
+    state_reference = None
+
+    def __init__(self, execution_history):
+        self.execution_history = execution_history
+        self.number_of_loaded_items = 0
+
+    @property
+    def label(self):
+        number_of_evicted_items = self.execution_history.number_of_evicted_items
+        if self.number_of_loaded_items < number_of_evicted_items:
+            return "{0} older items (double click to load)".format(number_of_evicted_items)
+        return "{0} older items".format(number_of_evicted_items)
+
+
 class ExecutionHistoryTreeController(ExtendedController):
     """Controller handling the execution history.
 
@@ -64,6 +87,7 @@ class ExecutionHistoryTreeController(ExtendedController):
     TOOL_TIP_TEXT = "Right click for more details\n" \
                     "Middle click for external more detailed viewer\n" \
                     "Double click to select corresponding state"
+    EVICTED_ITEMS_PAGE_SIZE = 100
 
     def __init__(self, model=None, view=None):
         assert isinstance(model, StateMachineManagerModel)
@@ -154,6 +178,13 @@ class ExecutionHistoryTreeController(ExtendedController):
             if row is not None:
                 histroy_item_path = self.history_tree_store.get_path(row)
                 histroy_item_iter = self.history_tree_store.get_iter(histroy_item_path)
+                history_item = self.history_tree_store[histroy_item_iter][self.HISTORY_ITEM_STORAGE_ID]
+                if isinstance(history_item, EvictedHistoryItems):
+                    self.load_evicted_history_items(histroy_item_iter)
+                    return True
+                if history_item is None and not self.history_tree_store.iter_n_children(histroy_item_iter):
+                    # items loaded from the execution log are not linked to states
+                    return True
                 # logger.info(history_item.state_reference)
                 # TODO generalize double-click folding and unfolding -> also used in states tree of state machine
                 if histroy_item_path is not None and self.history_tree_store.iter_n_children(histroy_item_iter):
@@ -397,6 +428,7 @@ class ExecutionHistoryTreeController(ExtendedController):
                                 None,
                                 (first_history_item.state_reference.name + " - Run " + str(execution_number + 1),
                                  first_history_item, self.TOOL_TIP_TEXT))
+                            self.insert_evicted_history_items(tree_item, execution_history)
                             self.insert_execution_history(tree_item, execution_history[1:], is_root=True)
                         else:
                             pass  # there was only the Start item in the history
@@ -406,6 +438,7 @@ class ExecutionHistoryTreeController(ExtendedController):
                             None,
                             (first_history_item.state_reference.name + " - Run " + str(execution_number + 1),
                              first_history_item, self.TOOL_TIP_TEXT))
+                        self.insert_evicted_history_items(tree_item, execution_history)
                         self.insert_execution_history(tree_item, execution_history, is_root=True)
 
             self._restore_expansion_state()
@@ -481,6 +514,9 @@ class ExecutionHistoryTreeController(ExtendedController):
                     self.insert_history_item(current_parent, history_item, "Return")
                 else:  # CONTAINER
                     self.insert_history_item(current_parent, history_item, "Exit")
+                    # truncated histories can contain returns of states whose calls were removed from memory
+                    if self.history_tree_store.get_path(current_parent) == self.history_tree_store.get_path(parent):
+                        continue
                     current_parent = self.history_tree_store.iter_parent(current_parent)
 
             is_root = False
@@ -498,4 +534,43 @@ class ExecutionHistoryTreeController(ExtendedController):
                 # this is just a dummy item to have an extra parent for each branch
                 # gives better overview in case that one of the child state is a simple execution state
                 tree_item = self.insert_history_item(parent, first_history_item, "Concurrency Branch", dummy=True)
+                self.insert_evicted_history_items(tree_item, execution_history)
                 self.insert_execution_history(tree_item, execution_history)
+
+    def insert_evicted_history_items(self, parent, execution_history):
+        """Adds a placeholder for the items removed from an execution history due to its retention limits
+
+        :param Gtk.TreeItem parent: the parent to add the placeholder to
+        :param ExecutionHistory execution_history: the execution history
+        """
+        if not execution_history.number_of_evicted_items:
+            return
+        placeholder = EvictedHistoryItems(execution_history)
+        self.history_tree_store.insert_before(parent, None, (placeholder.label, placeholder, None))
+
+    def load_evicted_history_items(self, placeholder_iter):
+        """Loads the next page of evicted history items from the execution log
+
+        The items are loaded from new to old and inserted as children of the placeholder.
+
+        :param Gtk.TreeIter placeholder_iter: the tree iter of the placeholder
+        """
+        placeholder = self.history_tree_store[placeholder_iter][self.HISTORY_ITEM_STORAGE_ID]
+        execution_history = placeholder.execution_history
+        if execution_history.execution_history_storage is None:
+            logger.info("Set EXECUTION_LOG_ENABLE to True in your config to be able to load execution history items "
+                        "that were removed from memory.")
+            return
+        stop = execution_history.number_of_evicted_items - placeholder.number_of_loaded_items
+        start = max(0, stop - self.EVICTED_ITEMS_PAGE_SIZE)
+        records = execution_history.get_evicted_item_records(start, stop)
+        for position, record in enumerate(records):
+            description = record['item_type']
+            if record['item_type'] == CallItem.__name__:
+                description = "Enter" if record['call_type'] == CallType.CONTAINER.name else "Call"
+            elif record['item_type'] == ReturnItem.__name__:
+                description = "Exit" if record['call_type'] == CallType.CONTAINER.name else "Return"
+            self.history_tree_store.insert(placeholder_iter, position,
+                                           (record['state_name'] + " - " + description, None, None))
+        placeholder.number_of_loaded_items += stop - start
+        self.history_tree_store[placeholder_iter][self.LABEL_NAME_STORAGE_ID] = placeholder.label
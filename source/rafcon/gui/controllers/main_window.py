@@ -26,12 +26,15 @@ import os
 import logging
 from gi.repository import Gtk
 from gi.repository import Gdk
+from gi.repository import GLib
 from functools import partial
 
 import rafcon.core.config
 import rafcon.core.singleton
 import rafcon.gui.singleton as gui_singletons
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
+from rafcon.core.execution.execution_event_bus import execution_event_bus_enabled, get_execution_event_bus, \
+    notify_observers
 from rafcon.gui.config import global_gui_config as gui_config
 from rafcon.gui.controllers.execution_history import ExecutionHistoryTreeController
 from rafcon.gui.controllers.global_variable_manager import GlobalVariableManagerController
@@ -205,7 +208,15 @@ class MainWindowController(ExtendedController):
         self.right_bar_hidden = False
         self.console_hidden = False
 
+        # the observers are notified about execution events in batches, instead of directly in the executing threads
+        self._execution_event_bus = None
+        if execution_event_bus_enabled():
+            self._execution_event_bus = get_execution_event_bus()
+            self._execution_event_bus.subscribe(self._on_execution_events)
+
     def destroy(self):
+        if self._execution_event_bus is not None:
+            self._execution_event_bus.unsubscribe(self._on_execution_events)
         if hasattr(self, '_max_position_notification_id'):
             last_pane_id = next(reversed(constants.PANE_ID.values()))
             self.view[last_pane_id].disconnect(self._max_position_notification_id)
@@ -218,6 +229,11 @@ class MainWindowController(ExtendedController):
         self.right_bar_child.destroy()
         self.console_child.destroy()
 
+    @staticmethod
+    def _on_execution_events(events):
+        # called in the thread of the execution event bus, the observers are registered in the GUI thread
+        GLib.idle_add(notify_observers, events)
+
     @staticmethod
     def update_widget_runtime_config(widget, event, name):
         global_runtime_config.store_widget_properties(widget, name)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # Example 1: execution_log_viewer.py your_execution_log.shelve xxxxxxx.run_id.00000000000000000003
 # Example 2: rafcon_execution_log_viewer your_execution_log.shelve xxxxxxx.run_id.00000000000000000003
+# Example 3: rafcon_execution_log_viewer your_execution_log.rlog xxxxxxx.run_id.00000000000000000003
 from rafcon.gui.views.utils.single_widget_window import SingleWidgetWindowView
 from rafcon.gui.views.execution_log_viewer import ExecutionLogTreeView
 from rafcon.gui.controllers.utils.single_widget_window import SingleWidgetWindowController
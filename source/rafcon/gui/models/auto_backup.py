@@ -395,7 +395,7 @@ class AutoBackupModel(ModelMT):
     def write_backup_meta_data(self):
         """Write the auto backup meta data into the current tmp-storage path"""
         auto_backup_meta_file = os.path.join(self._tmp_storage_path, FILE_NAME_AUTO_BACKUP)
-        storage.storage_utils.write_dict_to_json(self.meta, auto_backup_meta_file)
+        storage.storage_utils.write_dict_to_json(self.meta, auto_backup_meta_file, compact=True)
 
     def update_last_backup_meta_data(self):
         """Update the auto backup meta data with internal recovery information"""
@@ -472,7 +472,8 @@ class AutoBackupModel(ModelMT):
             sm = self.state_machine_model.state_machine
             logger.debug('Performing auto backup of state machine {} to temp folder'.format(sm.state_machine_id))
             self.update_tmp_storage_path()
-            storage.save_state_machine_to_path(sm, self._tmp_storage_path, delete_old_state_machine=True, as_copy=True)
+            storage.save_state_machine_to_path(sm, self._tmp_storage_path, delete_old_state_machine=True, as_copy=True,
+                                               compact=True)
             self.update_last_backup_meta_data()
             self.write_backup_meta_data()
             self.state_machine_model.store_meta_data(copy_path=self._tmp_storage_path)
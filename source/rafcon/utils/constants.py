@@ -42,5 +42,8 @@ except OSError:  # Raised when directory is already existing, thus can be ignore
 
 RAFCON_TEMP_PATH_STORAGE = tempfile.mkdtemp(dir=RAFCON_TEMP_PATH_BASE)
 
+# caches shared by all RAFCON processes of the user, thus not within RAFCON_TEMP_PATH_BASE
+RAFCON_TEMP_PATH_CACHE = os.path.join(TEMP_PATH, 'rafcon-{0}'.format(getpass.getuser()), 'cache')
+
 BY_EXECUTION_TRIGGERED_OBSERVABLE_STATE_METHODS = ['state_execution_status',
                                                    '_add_new_execution_history', 'clear_execution_histories']
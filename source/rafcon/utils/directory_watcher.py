@@ -0,0 +1,248 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: directory_watcher
+   :synopsis: A module to find out which directories of a set of watched directories changed
+
+The watchers are not recursive, each directory of interest has to be watched. A directory changed if an entry was
+added, removed or renamed or, if requested when watching it, if one of its files was modified. The changes are
+collected without a thread and are handed out by :meth:`DirectoryWatcher.get_changed_directories`.
+"""
+
+from builtins import object
+import os
+import errno
+import struct
+from threading import RLock
+
+from rafcon.utils import log
+logger = log.get_logger(__name__)
+
+
+def create_directory_watcher(use_inotify=True):
+    """Creates a directory watcher, using inotify if possible
+
+    :param bool use_inotify: whether to use inotify, if available
+    :return: an :class:`InotifyDirectoryWatcher` if requested and available, else a :class:`DirectoryWatcher`
+    """
+    if use_inotify:
+        try:
+            return InotifyDirectoryWatcher()
+        except (OSError, AttributeError) as e:
+            logger.debug("inotify is not available, the directories are polled: {0}".format(e))
+    return DirectoryWatcher()
+
+
+class DirectoryWatcher(object):
+    """Finds changed directories by polling their modification times
+
+    A `stat` of each watched directory is needed to find the changed directories. For directories, whose files are
+    watched as well, the files are listed and a `stat` of each file is needed.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        # path -> [number of watch calls, whether files are watched]
+        self._watches = {}
+        self._snapshots = {}
+
+    def watch(self, path, files=False):
+        """Starts watching a directory
+
+        A directory can be watched multiple times; it is watched until :meth:`unwatch` was called as often.
+
+        :param str path: the path of the directory
+        :param bool files: whether modifications of the files in the directory are changes of the directory
+        """
+        with self._lock:
+            if path in self._watches:
+                self._watches[path][0] += 1
+                if files and not self._watches[path][1]:
+                    self._watches[path][1] = True
+                    if path in self._snapshots:
+                        self._snapshots[path] = self._take_snapshot(path, files)
+                return
+            self._watches[path] = [1, files]
+            self._add_watch(path, files)
+
+    def unwatch(self, path):
+        """Stops watching a directory
+
+        :param str path: the path of the directory
+        """
+        with self._lock:
+            if path not in self._watches:
+                return
+            self._watches[path][0] -= 1
+            if self._watches[path][0] <= 0:
+                del self._watches[path]
+                self._remove_watch(path)
+
+    def get_watched_directories(self):
+        """Returns the paths of all watched directories
+
+        :rtype: set[str]
+        """
+        with self._lock:
+            return set(self._watches)
+
+    def get_changed_directories(self):
+        """Returns the watched directories that changed since the last call or since they are watched
+
+        :rtype: set[str]
+        """
+        with self._lock:
+            return self._poll_changed_directories(list(self._snapshots))
+
+    def close(self):
+        """Stops watching all directories"""
+        with self._lock:
+            self._watches.clear()
+            self._snapshots.clear()
+
+    def _add_watch(self, path, files):
+        self._snapshots[path] = self._take_snapshot(path, files)
+
+    def _remove_watch(self, path):
+        self._snapshots.pop(path, None)
+
+    def _poll_changed_directories(self, paths):
+        changed_directories = set()
+        for path in paths:
+            snapshot = self._take_snapshot(path, self._watches[path][1])
+            if snapshot != self._snapshots[path]:
+                self._snapshots[path] = snapshot
+                changed_directories.add(path)
+        return changed_directories
+
+    @staticmethod
+    def _take_snapshot(path, files):
+        try:
+            directory_stat = os.stat(path)
+            if not files:
+                return directory_stat.st_ino, directory_stat.st_mtime
+            file_stats = {}
+            for file_name in os.listdir(path):
+                file_stat = os.stat(os.path.join(path, file_name))
+                file_stats[file_name] = file_stat.st_mtime, file_stat.st_size
+            return directory_stat.st_ino, directory_stat.st_mtime, file_stats
+        except OSError:  # the directory or one of its files was removed
+            return None
+
+
+class InotifyDirectoryWatcher(DirectoryWatcher):
+    """Finds changed directories with the inotify API of Linux
+
+    The events are read without blocking, when the changed directories are requested. Directories that cannot be
+    watched by inotify, e.g. because the limit of watches of the user is reached, are polled.
+
+    :raises OSError: if inotify is not available
+    """
+
+    _IN_MODIFY = 0x00000002
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_DELETE_SELF = 0x00000400
+    _IN_MOVE_SELF = 0x00000800
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _IN_ONLYDIR = 0x01000000
+    _WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | \
+        _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+    _EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        DirectoryWatcher.__init__(self)
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._file_descriptor = self._libc.inotify_init1(os.O_NONBLOCK | getattr(os, 'O_CLOEXEC', 0))
+        if self._file_descriptor < 0:
+            error_number = ctypes.get_errno()
+            raise OSError(error_number, os.strerror(error_number))
+        self._watch_descriptors = {}
+        self._paths = {}
+        self._polled_paths = set()
+
+    def get_changed_directories(self):
+        with self._lock:
+            changed_directories = self._poll_changed_directories(list(self._polled_paths))
+            if self._file_descriptor is None:
+                return changed_directories
+            while True:
+                try:
+                    data = os.read(self._file_descriptor, 65536)
+                except OSError as e:
+                    if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        break
+                    raise
+                if not data:
+                    break
+                changed_directories |= self._parse_events(data)
+            return changed_directories
+
+    def close(self):
+        with self._lock:
+            DirectoryWatcher.close(self)
+            if self._file_descriptor is not None:
+                os.close(self._file_descriptor)
+                self._file_descriptor = None
+            self._watch_descriptors.clear()
+            self._paths.clear()
+            self._polled_paths.clear()
+
+    def _add_watch(self, path, files):
+        import ctypes
+        watch_descriptor = -1
+        if self._file_descriptor is not None:
+            watch_descriptor = self._libc.inotify_add_watch(self._file_descriptor, path.encode('utf-8'),
+                                                            self._WATCH_MASK)
+        if watch_descriptor < 0:
+            error_number = ctypes.get_errno()
+            if error_number == errno.ENOSPC:
+                logger.warning("The inotify watch limit is reached, further directories are polled")
+            DirectoryWatcher._add_watch(self, path, True)
+            self._polled_paths.add(path)
+            return
+        self._watch_descriptors[path] = watch_descriptor
+        self._paths[watch_descriptor] = path
+
+    def _remove_watch(self, path):
+        if path in self._polled_paths:
+            self._polled_paths.discard(path)
+            DirectoryWatcher._remove_watch(self, path)
+            return
+        watch_descriptor = self._watch_descriptors.pop(path, None)
+        if watch_descriptor is not None:
+            self._paths.pop(watch_descriptor, None)
+            self._libc.inotify_rm_watch(self._file_descriptor, watch_descriptor)
+
+    def _parse_events(self, data):
+        changed_directories = set()
+        offset = 0
+        while offset + self._EVENT_HEADER.size <= len(data):
+            watch_descriptor, mask, _, name_length = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size + name_length
+            if mask & self._IN_Q_OVERFLOW:
+                # events were lost, thus all directories might have changed
+                changed_directories |= set(self._watch_descriptors)
+                continue
+            path = self._paths.get(watch_descriptor)
+            if path is None:
+                continue
+            changed_directories.add(path)
+            if mask & self._IN_IGNORED:
+                # the directory was removed, it is polled in case it is recreated
+                del self._paths[watch_descriptor]
+                del self._watch_descriptors[path]
+                DirectoryWatcher._add_watch(self, path, True)
+                self._polled_paths.add(path)
+        return changed_directories
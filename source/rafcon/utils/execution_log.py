@@ -18,10 +18,26 @@ import json
 import pickle
 
 from rafcon.utils.vividict import Vividict
+from rafcon.utils.record_log import RecordLogReader, is_record_log
 from rafcon.utils import log
 logger = log.get_logger(__name__)
 
 
+def open_execution_log(filename):
+    """Opens an execution log for reading
+
+    Execution logs are either written as shelve or as record log (see :mod:`rafcon.utils.record_log`). In both cases,
+    a read-only mapping of the history item ids to the history items is returned, which can be passed to the other
+    functions of this module. It must be closed after usage.
+
+    :param str filename: the path of the execution log
+    :return: the history items of the log
+    """
+    if is_record_log(filename):
+        return RecordLogReader(filename)
+    return shelve.open(filename, flag='r')
+
+
 def log_to_raw_structure(execution_history_items):
     """
     :param dict execution_history_items: history items, in the simplest case
@@ -76,6 +92,95 @@ def log_to_raw_structure(execution_history_items):
     return start_item, previous, next_, concurrent, grouped_by_run_id
 
 
+def log_to_raw_stream(execution_history_items, start_offset=None, start_item_id=None, follow=False,
+                      poll_interval=0.1, timeout=None):
+    """Yields the history items of a log one by one in the order they were created
+
+    In contrast to :func:`log_to_raw_structure`, only a single history item is held in memory at a time. Record logs
+    (see :func:`open_execution_log`) are read sequentially and can be followed while they are written. For other
+    logs, e.g. shelves, only the keys are sorted by their creation order.
+
+    :param execution_history_items: history items, in the simplest case the opened log file
+    :param int start_offset: only for record logs, the position in the file to start reading from, as returned by a
+           previous iteration
+    :param str start_item_id: start with the history item created after the item with the given id
+    :param bool follow: only for record logs, whether to wait for history items appended while iterating, until the
+           log was closed by its writer
+    :param float poll_interval: the time in seconds to wait for new history items
+    :param float timeout: stop following if no new history item was written for the given number of seconds
+    :return: generator of history item id, history item and offset tuples; the offset is the position after the
+             history item for record logs and None otherwise
+    """
+    if isinstance(execution_history_items, RecordLogReader):
+        records = execution_history_items.iter_records(start_offset, follow, poll_interval, timeout)
+    else:
+        if start_offset is not None or follow:
+            raise ValueError("Only record logs can be read from an offset or be followed")
+        # the ids are generated with an increasing, zero padded counter
+        records = ((key, execution_history_items[key], None) for key in sorted(execution_history_items.keys()))
+
+    for history_item_id, item, offset in records:
+        if start_item_id is not None:
+            if history_item_id == start_item_id:
+                start_item_id = None
+            continue
+        yield history_item_id, item, offset
+
+
+def log_to_collapsed_stream(execution_history_items, start_offset=None, start_item_id=None, follow=False,
+                            poll_interval=0.1, timeout=None, throw_on_pickle_error=True,
+                            include_erroneous_data_ports=False):
+    """Yields the collapsed state executions of a log as soon as the states returned
+
+    The collapsed state executions are the items of :func:`log_to_collapsed_structure`. Only the call items of
+    running states are held in memory. States called before the start position are omitted. Each state execution
+    has two additional entries, which can be used to continue the analysis later: `return_history_item_id` can be
+    passed as `start_item_id` and, for record logs, `resume_offset` as `start_offset`. The StateMachineStartItem is
+    yielded like a state execution without these entries.
+
+    The parameters are the ones of :func:`log_to_raw_stream` and :func:`log_to_collapsed_structure`.
+
+    :return: generator of collapsed state executions
+    """
+    raw_stream = log_to_raw_stream(execution_history_items, start_offset, start_item_id, follow, poll_interval,
+                                   timeout)
+    for call_item, return_item, history_item_id, offset in _pair_call_and_return_items(raw_stream):
+        if return_item is None:
+            yield _collapse_start_item(call_item)
+            continue
+        execution_item = _collapse_execution_items(call_item, return_item, throw_on_pickle_error,
+                                                   include_erroneous_data_ports)
+        execution_item['return_history_item_id'] = history_item_id
+        execution_item['resume_offset'] = offset
+        yield execution_item
+
+
+def _pair_call_and_return_items(raw_stream):
+    """Pairs the call and the return item of each state execution in a stream of history items
+
+    :param raw_stream: the generator returned by :func:`log_to_raw_stream`
+    :return: generator of call item, return item, history item id and offset of the return item tuples, as soon as
+             the return item was read; the StateMachineStartItem is yielded as call item without return item
+    """
+    open_call_items = {}
+    for history_item_id, item, offset in raw_stream:
+        run_id = item['run_id']
+        if item['item_type'] == 'StateMachineStartItem':
+            yield item, None, history_item_id, offset
+        elif item['item_type'] == 'CallItem':
+            # the EXECUTE call of a container state is followed by its CONTAINER call
+            if item['call_type'] == 'EXECUTE' or run_id not in open_call_items:
+                open_call_items[run_id] = item
+        elif item['item_type'] == 'ReturnItem':
+            call_item = open_call_items.get(run_id)
+            if call_item is None:
+                continue
+            # the CONTAINER return of a container state is followed by its EXECUTE return, except for the root state
+            if item['call_type'] == 'EXECUTE' or call_item['call_type'] == 'CONTAINER':
+                del open_call_items[run_id]
+                yield call_item, item, history_item_id, offset
+
+
 def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=True,
                                include_erroneous_data_ports=False, full_next=False):
     """
@@ -119,52 +224,13 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
     if len(next_) == 0 or len(next_) == 1:
         for rid, gitems in grouped.items():
             if gitems[0]['item_type'] == 'StateMachineStartItem':
-                item = gitems[0]
-                execution_item = {}
-                ## add base properties will throw if not existing
-                for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type',
-                          'path', 'timestamp', 'root_state_storage_id', 'state_machine_version',
-                          'used_rafcon_version', 'creation_time', 'last_update', 'os_environment']:
-                    try:
-                        execution_item[l] = item[l]
-                    except KeyError:
-                        logger.warning("Key {} not in history start item".format(str(l)))
-
-                ## add extended properties (added in later rafcon versions),
-                ## will add default value if not existing instead
-                for l, default in [('semantic_data', {}),
-                                     ('is_library', None),
-                                     ('library_state_name', None),
-                                     ('library_name', None),
-                                     ('library_path', None)]:
-                    execution_item[l] = item.get(l, default)
-
-                start_item = execution_item
+                start_item = _collapse_start_item(gitems[0])
         return start_item, collapsed_next, collapsed_concurrent, collapsed_hierarchy, collapsed_items
 
     # build collapsed items
     for rid, gitems in grouped.items():
         if gitems[0]['item_type'] == 'StateMachineStartItem':
-            item = gitems[0]
-            execution_item = {}
-            ## add base properties will throw if not existing
-            for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type',
-                      'path', 'timestamp', 'root_state_storage_id', 'state_machine_version',
-                      'used_rafcon_version', 'creation_time', 'last_update', 'os_environment']:
-                try:
-                    execution_item[l] = item[l]
-                except KeyError:
-                    logger.warning("Key {} not in history start item".format(str(l)))
-
-            ## add extended properties (added in later rafcon versions),
-            ## will add default value if not existing instead
-            for l, default in [('semantic_data', {}),
-                                 ('is_library', None),
-                                 ('library_state_name', None),
-                                 ('library_name', None),
-                                 ('library_path', None)]:
-                execution_item[l] = item.get(l, default)
-
+            execution_item = _collapse_start_item(gitems[0])
             start_item = execution_item
 
             collapsed_next[rid] = execution_history_items[next_[gitems[0]['history_item_id']]]['run_id']
@@ -249,64 +315,95 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
                     else:
                         collapsed_concurrent[prev_rid] = [rid]
 
-            # assemble grouped item
-            execution_item = {}
-            # add base properties will throw if not existing
-            for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type', 'path']:
-                execution_item[l] = call_item[l]
-
-            # add extended properties (added in later rafcon versions),
-            # will add default value if not existing instead
-            for l, default in [('semantic_data', {}),
-                                 ('is_library', None),
-                                 ('library_state_name', None),
-                                 ('library_name', None),
-                                 ('library_path', None)]:
-                execution_item[l] = return_item.get(l, default)
-
-            for l in ['outcome_name', 'outcome_id']:
-                execution_item[l] = return_item[l]
-            for l in ['timestamp']:
-                execution_item[l+'_call'] = call_item[l]
-                execution_item[l+'_return'] = return_item[l]
-
-            def unpickle_data(data_dict):
-                r = dict()
-                # support backward compatibility
-                if isinstance(data_dict, string_types):  # formerly data dict was a json string
-                    r = json.loads(data_dict)
-                else:
-                    for k, v in data_dict.items():
-                        if not k.startswith('!'):  # ! indicates storage error
-                            try:
-                                r[k] = pickle.loads(v)
-                            except Exception as e:
-                                if throw_on_pickle_error:
-                                    raise
-                                elif include_erroneous_data_ports:
-                                    r['!' + k] = (str(e), v)
-                                else:
-                                    pass  # ignore
-                        elif include_erroneous_data_ports:
-                            r[k] = v
-
-                return r
-
-            execution_item['data_ins'] = unpickle_data(call_item['input_output_data'])
-            execution_item['data_outs'] = unpickle_data(return_item['input_output_data'])
-            execution_item['scoped_data_ins'] = unpickle_data(call_item['scoped_data'])
-            execution_item['scoped_data_outs'] = unpickle_data(return_item['scoped_data'])
-            # backward compatibility
-            if isinstance(execution_item['semantic_data'], Vividict):
-                execution_item['semantic_data'] = execution_item['semantic_data']
-            else:
-                execution_item['semantic_data'] = unpickle_data(execution_item['semantic_data'])
-
+            execution_item = _collapse_execution_items(call_item, return_item, throw_on_pickle_error,
+                                                       include_erroneous_data_ports)
             collapsed_items[rid] = execution_item
 
     return start_item, collapsed_next, collapsed_concurrent, collapsed_hierarchy, collapsed_items
 
 
+def _collapse_start_item(item):
+    execution_item = {}
+    ## add base properties will throw if not existing
+    for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type',
+              'path', 'timestamp', 'root_state_storage_id', 'state_machine_version',
+              'used_rafcon_version', 'creation_time', 'last_update', 'os_environment']:
+        try:
+            execution_item[l] = item[l]
+        except KeyError:
+            logger.warning("Key {} not in history start item".format(str(l)))
+
+    ## add extended properties (added in later rafcon versions),
+    ## will add default value if not existing instead
+    for l, default in [('semantic_data', {}),
+                         ('is_library', None),
+                         ('library_state_name', None),
+                         ('library_name', None),
+                         ('library_path', None)]:
+        execution_item[l] = item.get(l, default)
+    return execution_item
+
+
+def _unpickle_data(data_dict, throw_on_pickle_error, include_erroneous_data_ports):
+    r = dict()
+    # support backward compatibility
+    if isinstance(data_dict, string_types):  # formerly data dict was a json string
+        r = json.loads(data_dict)
+    else:
+        for k, v in data_dict.items():
+            if not k.startswith('!'):  # ! indicates storage error
+                try:
+                    r[k] = pickle.loads(v)
+                except Exception as e:
+                    if throw_on_pickle_error:
+                        raise
+                    elif include_erroneous_data_ports:
+                        r['!' + k] = (str(e), v)
+                    else:
+                        pass  # ignore
+            elif include_erroneous_data_ports:
+                r[k] = v
+
+    return r
+
+
+def _collapse_execution_items(call_item, return_item, throw_on_pickle_error, include_erroneous_data_ports):
+    # assemble grouped item
+    execution_item = {}
+    # add base properties will throw if not existing
+    for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type', 'path']:
+        execution_item[l] = call_item[l]
+
+    # add extended properties (added in later rafcon versions),
+    # will add default value if not existing instead
+    for l, default in [('semantic_data', {}),
+                         ('is_library', None),
+                         ('library_state_name', None),
+                         ('library_name', None),
+                         ('library_path', None)]:
+        execution_item[l] = return_item.get(l, default)
+
+    for l in ['outcome_name', 'outcome_id']:
+        execution_item[l] = return_item[l]
+    for l in ['timestamp']:
+        execution_item[l+'_call'] = call_item[l]
+        execution_item[l+'_return'] = return_item[l]
+
+    def unpickle_data(data_dict):
+        return _unpickle_data(data_dict, throw_on_pickle_error, include_erroneous_data_ports)
+
+    execution_item['data_ins'] = unpickle_data(call_item['input_output_data'])
+    execution_item['data_outs'] = unpickle_data(return_item['input_output_data'])
+    execution_item['scoped_data_ins'] = unpickle_data(call_item['scoped_data'])
+    execution_item['scoped_data_outs'] = unpickle_data(return_item['scoped_data'])
+    # backward compatibility
+    if isinstance(execution_item['semantic_data'], Vividict):
+        execution_item['semantic_data'] = execution_item['semantic_data']
+    else:
+        execution_item['semantic_data'] = unpickle_data(execution_item['semantic_data'])
+    return execution_item
+
+
 def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_columns=[], scoped_in_columns=[],
                      scoped_out_columns=[], semantic_data_columns=[], throw_on_pickle_error=True):
     """
@@ -375,6 +472,225 @@ def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_colum
     return df_timed
 
 
+# columns of the columnar export, with categorical columns being stored as codes and categories
+_CATEGORICAL_COLUMNS = ['state_name', 'state_type', 'path', 'path_by_name', 'outcome_name', 'library_name',
+                        'library_path']
+_NUMERIC_COLUMNS = [('outcome_id', 'int64'), ('timestamp_call', 'float64'), ('timestamp_return', 'float64'),
+                    ('is_library', 'bool')]
+_CATEGORIES_SUFFIX = '__categories'
+
+
+def log_to_columnar_file(execution_history_items, filename, file_format=None):
+    """Exports the state executions of a log into a columnar file for fast analyses
+
+    Each row of the file represents a state execution (see :func:`log_to_collapsed_stream`). The run id, the
+    timestamps, the paths, names and outcomes are stored as typed columns. The input, output, scoped and semantic
+    data are stored in pickled form in a separate column and are only unpickled on request. The file can be loaded
+    with :func:`load_columnar_log`.
+
+    :param execution_history_items: history items, in the simplest case the opened log file
+    :param str filename: the path of the file to create
+    :param str file_format: "arrow" for the Arrow IPC file format (requires pyarrow) or "npz" for an uncompressed
+           numpy archive; by default, Arrow is used if pyarrow is installed
+    :return: the number of exported state executions
+    :rtype: int
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("The Python package 'numpy' is required for log_to_columnar_file.")
+    if file_format is None:
+        try:
+            import pyarrow
+            file_format = "arrow"
+        except ImportError:
+            file_format = "npz"
+    if file_format not in ("arrow", "npz"):
+        raise ValueError("Unknown columnar file format '{0}'".format(file_format))
+
+    run_ids = []
+    values = {name: [] for name in _CATEGORICAL_COLUMNS}
+    values.update({name: [] for name, _ in _NUMERIC_COLUMNS})
+    data = []
+    for call_item, return_item, _, _ in _pair_call_and_return_items(log_to_raw_stream(execution_history_items)):
+        if return_item is None:
+            continue  # the StateMachineStartItem
+        run_ids.append(call_item['run_id'])
+        for name in ['state_name', 'state_type', 'path', 'path_by_name']:
+            values[name].append(call_item[name])
+        values['outcome_name'].append(return_item['outcome_name'])
+        outcome_id = return_item['outcome_id']
+        values['outcome_id'].append(-1 if outcome_id is None else outcome_id)
+        values['timestamp_call'].append(call_item['timestamp'])
+        values['timestamp_return'].append(return_item['timestamp'])
+        values['is_library'].append(bool(return_item.get('is_library')))
+        for name in ['library_name', 'library_path']:
+            values[name].append(return_item.get(name))
+        # the data is stored as it is in the log, i.e. the single values remain pickled
+        data.append(pickle.dumps({'data_ins': call_item['input_output_data'],
+                                  'data_outs': return_item['input_output_data'],
+                                  'scoped_data_ins': call_item['scoped_data'],
+                                  'scoped_data_outs': return_item['scoped_data'],
+                                  'semantic_data': return_item.get('semantic_data', {})}, protocol=2))
+
+    for name in _CATEGORICAL_COLUMNS:
+        values[name] = [u"" if value is None else str(value) for value in values[name]]
+
+    if file_format == "arrow":
+        import pyarrow as pa
+        columns = {'run_id': pa.array(run_ids, type=pa.string()), 'data': pa.array(data, type=pa.binary())}
+        for name in _CATEGORICAL_COLUMNS:
+            columns[name] = pa.array(values[name], type=pa.string()).dictionary_encode()
+        for name, dtype in _NUMERIC_COLUMNS:
+            columns[name] = pa.array(np.array(values[name], dtype=dtype))
+        table = pa.Table.from_pydict(columns)
+        with pa.OSFile(filename, 'wb') as sink:
+            writer = pa.ipc.new_file(sink, table.schema)
+            writer.write_table(table)
+            writer.close()
+        return len(run_ids)
+
+    arrays = {'run_id': np.array(run_ids, dtype=np.str_)}
+    for name in _CATEGORICAL_COLUMNS:
+        categories, codes = np.unique(np.array(values[name], dtype=np.str_), return_inverse=True)
+        arrays[name] = codes.astype(np.int32)
+        arrays[name + _CATEGORIES_SUFFIX] = categories
+    for name, dtype in _NUMERIC_COLUMNS:
+        arrays[name] = np.array(values[name], dtype=dtype)
+    arrays['data_offsets'] = np.cumsum([0] + [len(item_data) for item_data in data], dtype=np.int64)
+    arrays['data'] = np.frombuffer(b"".join(data), dtype=np.uint8)
+    # the archive must not be compressed to allow memory mapping its members
+    with open(filename, 'wb') as npz_file:
+        np.savez(npz_file, **arrays)
+    return len(run_ids)
+
+
+def _memory_map_npz(filename):
+    import numpy as np
+    import struct
+    import zipfile
+
+    arrays = {}
+    with zipfile.ZipFile(filename) as archive, open(filename, 'rb') as npz_file:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError("Compressed numpy archives cannot be memory mapped: {0}".format(filename))
+            # the data of a member follows its local file header, which has a fixed size of 30 bytes plus the lengths
+            # of the file name and the extra field
+            npz_file.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', npz_file.read(4))
+            npz_file.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(npz_file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(npz_file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(npz_file)
+            name = info.filename[:-len('.npy')]
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(filename, dtype=dtype, mode='r', offset=npz_file.tell(), shape=shape,
+                                         order='F' if fortran_order else 'C')
+    return arrays
+
+
+def load_columnar_log(filename):
+    """Loads a file created by :func:`log_to_columnar_file`
+
+    The file is memory mapped, i.e. the columns are only read from the disk when they are accessed.
+
+    :param str filename: the path of the file
+    :rtype: ColumnarExecutionLog
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        pa = None
+    with open(filename, 'rb') as columnar_file:
+        is_arrow_file = columnar_file.read(6) == b"ARROW1"
+    if is_arrow_file:
+        if pa is None:
+            raise ImportError("The Python package 'pyarrow' is required to load {0}.".format(filename))
+        table = pa.ipc.open_file(pa.memory_map(filename, 'r')).read_all()
+        return ColumnarExecutionLog(table=table)
+    return ColumnarExecutionLog(arrays=_memory_map_npz(filename))
+
+
+class ColumnarExecutionLog(object):
+    """The state executions of a log loaded by :func:`load_columnar_log`
+
+    The columns are `run_id`, `state_name`, `state_type`, `path`, `path_by_name`, `outcome_name`, `outcome_id`,
+    `timestamp_call`, `timestamp_return`, `is_library`, `library_name` and `library_path`.
+    """
+
+    def __init__(self, arrays=None, table=None):
+        self._arrays = arrays
+        self._table = table
+
+    def __len__(self):
+        if self._table is not None:
+            return self._table.num_rows
+        return len(self._arrays['run_id'])
+
+    def column(self, name):
+        """Returns the values of a column as numpy array
+
+        :param str name: the name of the column
+        :rtype: numpy.ndarray
+        """
+        if self._table is not None:
+            column = self._table.column(name)
+            if name in _CATEGORICAL_COLUMNS:
+                column = column.cast(column.type.value_type)
+            return column.to_numpy()
+        if name in _CATEGORICAL_COLUMNS:
+            return self._arrays[name + _CATEGORIES_SUFFIX][self._arrays[name]]
+        return self._arrays[name]
+
+    def categorical_column(self, name):
+        """Returns the codes and the categories of a column with few distinct values, e.g. `state_name`
+
+        Grouping by the integer codes is faster than grouping by the values.
+
+        :param str name: the name of the column
+        :return: the codes of all rows and the categories, i.e. the values of the codes
+        :rtype: tuple
+        """
+        if name not in _CATEGORICAL_COLUMNS:
+            raise ValueError("{0} is not a categorical column".format(name))
+        if self._table is not None:
+            column = self._table.column(name).combine_chunks()
+            return column.indices.to_numpy(), column.dictionary.to_numpy(zero_copy_only=False)
+        return self._arrays[name], self._arrays[name + _CATEGORIES_SUFFIX]
+
+    def durations(self):
+        """Returns the duration of each state execution in seconds
+
+        :rtype: numpy.ndarray
+        """
+        return self.column('timestamp_return') - self.column('timestamp_call')
+
+    def get_data(self, index, throw_on_pickle_error=True, include_erroneous_data_ports=False):
+        """Unpickles the data of a state execution
+
+        :param int index: the row of the state execution
+        :return: a dict with the keys `data_ins`, `data_outs`, `scoped_data_ins`, `scoped_data_outs` and
+                 `semantic_data`, as in the items of :func:`log_to_collapsed_structure`
+        :rtype: dict
+        """
+        if self._table is not None:
+            raw_data = self._table.column('data')[index].as_py()
+        else:
+            offsets = self._arrays['data_offsets']
+            raw_data = self._arrays['data'][offsets[index]:offsets[index + 1]].tobytes()
+        data = pickle.loads(raw_data)
+        for key, data_dict in data.items():
+            if key == 'semantic_data' and isinstance(data_dict, Vividict):
+                continue
+            data[key] = _unpickle_data(data_dict, throw_on_pickle_error, include_erroneous_data_ports)
+        return data
+
+
 def log_to_ganttplot(execution_history_items):
     """
     Example how to use the DataFrame representation
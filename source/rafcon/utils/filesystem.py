@@ -23,6 +23,10 @@ import shutil
 from os.path import realpath, dirname, join, expanduser
 import shutil, errno
 
+# the umask can only be read by setting it, which is not thread-safe; thus, it is read once at import
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 
 def create_path(path):
     """Creates a absolute path in the file system.
@@ -104,8 +108,71 @@ def write_file(file_path, content, create_full_path=False):
         create_path(head)
     with open(file_path, 'w') as file_pointer:
         file_pointer.write(content)
-    
-        
+
+
+def write_file_atomically(file_path, content, mode='w'):
+    """Writes a file via a temporary file, which then replaces the file
+
+    Readers of the file thus either see the old or the new content, never a partially written file.
+
+    :param str file_path: the path of the file
+    :param content: the new content of the file
+    :param str mode: the mode the file is opened with, ``'wb'`` to write bytes
+    """
+    import tempfile
+    file_path = os.path.realpath(file_path)
+    file_descriptor, temp_file_path = tempfile.mkstemp(dir=os.path.dirname(file_path),
+                                                       prefix="." + os.path.basename(file_path))
+    try:
+        with os.fdopen(file_descriptor, mode) as file_pointer:
+            file_pointer.write(content)
+        replace_file_with_temporary_file(temp_file_path, file_path)
+    except Exception:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        raise
+
+
+def replace_file_with_temporary_file(temp_file_path, file_path):
+    """Moves a temporary file created by :func:`tempfile.mkstemp` to the path of the file it replaces
+
+    The temporary file gets the permissions of newly created files, as the permissions of files created by mkstemp are
+    restricted to the user.
+
+    :param str temp_file_path: the path of the temporary file
+    :param str file_path: the path of the file to be replaced
+    """
+    os.chmod(temp_file_path, 0o666 & ~_UMASK)
+    if hasattr(os, 'replace'):
+        os.replace(temp_file_path, file_path)
+        return
+    if os.name == 'nt' and os.path.exists(file_path):
+        os.remove(file_path)
+    os.rename(temp_file_path, file_path)
+
+
+def create_private_folder(path):
+    """Creates a folder only accessible by the current user, if not existing, and checks whether it can be trusted
+
+    Folders holding files, which are unpickled or executed, e.g. caches, must only be writable by the current user.
+
+    :param str path: the path of the folder
+    :return: whether the folder exists and is owned and exclusively writable by the current user
+    :rtype: bool
+    """
+    try:
+        os.makedirs(path, 0o700)
+    except OSError:  # Raised when directory is already existing, thus can be ignored
+        pass
+    if not os.path.isdir(path):
+        return False
+    if hasattr(os, 'getuid'):
+        path_stat = os.stat(path)
+        if path_stat.st_uid != os.getuid() or path_stat.st_mode & 0o022:
+            return False
+    return True
+
+
 def get_default_config_path():
     home_path = expanduser('~')
     if home_path:
@@ -0,0 +1,193 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: json_codec
+   :synopsis: A fast JSON codec for the files of RAFCON state machines
+
+The codec produces and reads the same JSON as the generic
+:class:`jsonconversion.encoder.JSONObjectEncoder` and :class:`jsonconversion.decoder.JSONObjectDecoder`, which are
+used with the parameters of :mod:`rafcon.utils.storage_utils`. The pretty printed output is byte-identical.
+
+Instead of calling a custom `isinstance` method for every element while serializing, the objects are first converted
+into plain JSON data, which is then serialized by the standard library. The qualified names of classes and the
+classes of qualified names are cached, so that the class paths of known types, e.g. of states and state elements, are
+only resolved once.
+In compact mode, the JSON is written without indentation and whitespace, which allows the C accelerated encoder of
+the standard library to be used. This is meant for files, which are only read by machines, e.g. auto backups.
+"""
+
+import sys
+import json
+from collections import OrderedDict
+from inspect import isclass
+from threading import Lock
+from future.utils import string_types, integer_types
+
+from jsonconversion.jsonobject import JSONObject
+from jsonconversion.encoder import JSONObjectEncoder
+from jsonconversion.conversion import string2type, get_class_from_qualified_name
+
+#: The name of the builtins module written into the files, to keep them identical for Python 2 and 3
+BUILTINS_STR = "__builtin__"
+
+PRETTY_SEPARATORS = (', ', ': ')
+COMPACT_SEPARATORS = (',', ':')
+
+# dicts keep the insertion order only as of Python 3.7
+_ordered_dict = dict if sys.version_info >= (3, 7) else OrderedDict
+_builtins_modules = ('__builtin__', 'builtins')
+_scalar_types = string_types + integer_types + (float, type(None))
+
+_cache_lock = Lock()
+_qualified_names = {}
+_classes = {}
+_types = {}
+
+# used for objects not known to the codec, e.g. numpy arrays, to get the same result as the generic encoder
+_generic_encoder = JSONObjectEncoder(builtins_str=BUILTINS_STR)
+
+
+def _get_qualified_name(cls):
+    qualified_name = _qualified_names.get(cls)
+    if qualified_name is None:
+        module = cls.__module__
+        if module in _builtins_modules:
+            module = BUILTINS_STR
+        qualified_name = module + '.' + cls.__name__
+        with _cache_lock:
+            _qualified_names[cls] = qualified_name
+    return qualified_name
+
+
+def to_json_data(obj):
+    """Converts an object into plain JSON data
+
+    Objects deriving from :class:`jsonconversion.jsonobject.JSONObject`, tuples, sets and types are converted into
+    dicts like the generic encoder does. The items of dicts are sorted by their keys.
+
+    :param obj: the object to be converted
+    :return: the object consisting only of dicts, lists, strings, numbers, booleans and None
+    :raises TypeError: if an object cannot be converted
+    """
+    # the order of the checks is the one of the generic encoder, e.g. a dict deriving from JSONObject is a dict
+    if isinstance(obj, _scalar_types):
+        return obj
+    if isinstance(obj, list):
+        return [to_json_data(element) for element in obj]
+    if isinstance(obj, dict):
+        return _ordered_dict((key, to_json_data(value)) for key, value in sorted(obj.items()))
+    if isinstance(obj, JSONObject):
+        dictionary = obj.to_dict()
+        dictionary['__jsonqualname__'] = _get_qualified_name(obj.__class__)
+        return to_json_data(dictionary)
+    if isinstance(obj, tuple):
+        return _ordered_dict([('__jsonqualname__', BUILTINS_STR + '.tuple'),
+                              ('items', [to_json_data(element) for element in obj])])
+    if isinstance(obj, set):
+        return _ordered_dict([('__jsonqualname__', BUILTINS_STR + '.set'),
+                              ('items', [to_json_data(element) for element in obj])])
+    if isclass(obj):
+        return {'__type__': _get_qualified_name(obj)}
+    return to_json_data(_generic_encoder.default(obj))
+
+
+def encode(obj, compact=False):
+    """Converts an object into a JSON string
+
+    :param obj: the object to be encoded
+    :param bool compact: whether to omit the indentation and whitespace
+    :return: the JSON string, identical to the one of the generic encoder if not compact
+    :rtype: str
+    """
+    if compact:
+        return json.dumps(to_json_data(obj), separators=COMPACT_SEPARATORS, check_circular=False)
+    return json.dumps(to_json_data(obj), indent=4, separators=PRETTY_SEPARATORS, check_circular=False)
+
+
+def _get_class(qualified_name):
+    cls = _classes.get(qualified_name)
+    if cls is None:
+        from rafcon.utils.storage_utils import substitute_modules
+        cls = get_class_from_qualified_name(substitute_modules.get(qualified_name, qualified_name))
+        with _cache_lock:
+            _classes[qualified_name] = cls
+    return cls
+
+
+def _get_type(type_string):
+    type_object = _types.get(type_string)
+    if type_object is None:
+        from rafcon.utils.storage_utils import substitute_modules
+        type_object = string2type(substitute_modules.get(type_string, type_string))
+        with _cache_lock:
+            _types[type_string] = type_object
+    return type_object
+
+
+def decode_object(dictionary):
+    """Converts a dict parsed from JSON into the object it represents
+
+    This is the object hook of the codec. Dicts are converted as by the generic decoder: objects with a qualified name
+    are created with their `from_dict` method, tuples, sets and types are restored and keys of other dicts are
+    converted into integers, where possible.
+
+    :param dict dictionary: the dict, whose values are already decoded
+    :return: the decoded object
+    """
+    if '__jsonqualname__' in dictionary:
+        cls = _get_class(dictionary.pop('__jsonqualname__'))
+        if cls is tuple:
+            return tuple(dictionary['items'])
+        if cls is set:
+            return set(dictionary['items'])
+        if hasattr(cls, "from_dict"):
+            return cls.from_dict(dictionary)
+        if cls.__module__ == 'numpy' and cls.__name__ == 'ndarray':
+            import numpy
+            return numpy.array(dictionary['items'])
+        return dictionary
+    if '__type__' in dictionary:
+        return _get_type(dictionary['__type__'])
+    decoded_dictionary = {}
+    for key, value in dictionary.items():
+        # most keys are names, which cannot be converted, so that the costly exception is avoided for them
+        if key and not (key[0].isalpha() or key[0] == '_'):
+            try:
+                key = int(key)
+            except ValueError:
+                pass
+        decoded_dictionary[key] = value
+    return decoded_dictionary
+
+
+def decode(json_string):
+    """Converts a JSON string into the objects it represents
+
+    :param str json_string: the JSON string, e.g. the content of a json file
+    :return: the decoded objects
+    """
+    return _decoder.decode(json_string)
+
+
+def decode_json_data(data):
+    """Converts plain JSON data, e.g. parsed in another process, into the objects it represents
+
+    The result is the same as if the JSON string of the data had been decoded with :func:`decode`.
+
+    :param data: the data as returned by `json.load` without object hook
+    :return: the data with all objects decoded
+    """
+    # json calls the object hook for the innermost objects first
+    if isinstance(data, dict):
+        return decode_object({key: decode_json_data(value) for key, value in data.items()})
+    if isinstance(data, list):
+        return [decode_json_data(value) for value in data]
+    return data
+
+
+_decoder = json.JSONDecoder(object_hook=decode_object)
@@ -0,0 +1,295 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: record_log
+   :synopsis: An append-only file format for records, e.g. execution history items
+
+A record log starts with the :data:`FILE_MAGIC`, followed by frames. Each frame consists of a header (frame type,
+payload length and CRC32 checksum of the payload) and the payload. There are three frame types:
+
+* record frames, holding the key and the pickled value of one record,
+* index frames, written periodically, mapping the keys of the preceding records to their offsets and referring to the
+  previous index frame,
+* the end frame, written when the log is closed, referring to the last index frame.
+
+As the log is only appended, it can be read while it is written. A frame that was only partially written, e.g. due to
+a crash, is detected by its length and checksum and ignored together with all following data.
+"""
+from future.utils import native_str
+from builtins import object
+from collections import Mapping, OrderedDict
+import os
+import pickle
+import struct
+import time
+import zlib
+
+FILE_MAGIC = b"RAFCON-RECORD-LOG-1\n"
+INDEX_INTERVAL = 1000
+
+RECORD_FRAME = b"R"
+INDEX_FRAME = b"I"
+END_FRAME = b"E"
+
+# frame type, payload length, checksum of the payload
+_FRAME_HEADER = struct.Struct(">cII")
+_KEY_LENGTH = struct.Struct(">H")
+_END_PAYLOAD = struct.Struct(">Q")
+_END_FRAME_SIZE = _FRAME_HEADER.size + _END_PAYLOAD.size
+
+
+def _checksum(payload):
+    return zlib.crc32(payload) & 0xffffffff
+
+
+def _read_frame(log_file, offset):
+    """Reads the frame at the given offset
+
+    :return: the frame type, the payload and the offset of the next frame, or None, if the frame is incomplete or
+      corrupt
+    :rtype: tuple
+    """
+    log_file.seek(offset)
+    header = log_file.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        return None
+    frame_type, length, checksum = _FRAME_HEADER.unpack(header)
+    payload = log_file.read(length)
+    if len(payload) < length or _checksum(payload) != checksum:
+        return None
+    return frame_type, payload, offset + _FRAME_HEADER.size + length
+
+
+def _decode_key(payload):
+    key_length = _KEY_LENGTH.unpack_from(payload)[0]
+    return native_str(payload[_KEY_LENGTH.size:_KEY_LENGTH.size + key_length].decode('utf-8')), key_length
+
+
+def _decode_record(payload):
+    key, key_length = _decode_key(payload)
+    return key, pickle.loads(payload[_KEY_LENGTH.size + key_length:])
+
+
+def is_record_log(filename):
+    """Checks whether the given file is a record log
+
+    :param str filename: the path of the file
+    :rtype: bool
+    """
+    try:
+        with open(filename, 'rb') as log_file:
+            return log_file.read(len(FILE_MAGIC)) == FILE_MAGIC
+    except (IOError, OSError):
+        return False
+
+
+class RecordLogWriter(object):
+    """Appends records to a new record log
+
+    The writer supports item assignment like a shelve. Records can be read back while the log is open.
+
+    :ivar str filename: the path of the log file
+    :ivar int index_interval: the number of records after which an index frame is written
+    """
+
+    def __init__(self, filename, index_interval=INDEX_INTERVAL):
+        self.filename = filename
+        self.index_interval = index_interval
+        self._file = open(filename, 'wb')
+        self._file.write(FILE_MAGIC)
+        self._offset = len(FILE_MAGIC)
+        self._offsets = {}
+        self._unindexed_offsets = {}
+        self._last_index_offset = None
+        self._read_file = None
+
+    def _write_frame(self, frame_type, payload):
+        offset = self._offset
+        self._file.write(_FRAME_HEADER.pack(frame_type, len(payload), _checksum(payload)))
+        self._file.write(payload)
+        self._offset += _FRAME_HEADER.size + len(payload)
+        return offset
+
+    def _write_index(self):
+        payload = pickle.dumps({'previous_index': self._last_index_offset, 'offsets': self._unindexed_offsets},
+                               protocol=2)
+        self._last_index_offset = self._write_frame(INDEX_FRAME, payload)
+        self._unindexed_offsets = {}
+
+    def __setitem__(self, key, record):
+        key = native_str(key)
+        encoded_key = key.encode('utf-8')
+        payload = _KEY_LENGTH.pack(len(encoded_key)) + encoded_key + pickle.dumps(record, protocol=2)
+        offset = self._write_frame(RECORD_FRAME, payload)
+        self._offsets[key] = offset
+        self._unindexed_offsets[key] = offset
+        if len(self._unindexed_offsets) >= self.index_interval:
+            self._write_index()
+        # make the record visible to readers tailing the log
+        self._file.flush()
+
+    def __getitem__(self, key):
+        offset = self._offsets[native_str(key)]
+        if self._read_file is None:
+            self._read_file = open(self.filename, 'rb')
+        return _decode_record(_read_frame(self._read_file, offset)[1])[1]
+
+    def __contains__(self, key):
+        return native_str(key) in self._offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def sync(self):
+        """Writes the records to the disk"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        """Writes the final index and closes the log"""
+        if self._file is None:
+            return
+        if self._unindexed_offsets or self._last_index_offset is None:
+            self._write_index()
+        self._write_frame(END_FRAME, _END_PAYLOAD.pack(self._last_index_offset))
+        self._file.close()
+        self._file = None
+        if self._read_file is not None:
+            self._read_file.close()
+            self._read_file = None
+
+
+class RecordLogReader(Mapping):
+    """Read-only mapping of the keys of a record log to their records
+
+    The records are iterated in the order they were written. If the log was closed by its writer, the keys are read
+    from the index frames. Otherwise, e.g. if the log is still written or the writer crashed, the log is scanned and
+    an incomplete last frame is ignored. Records written after opening the reader are added by :meth:`refresh` or
+    :meth:`follow`.
+
+    :ivar str filename: the path of the log file
+    :ivar bool complete: whether the end frame was read, i.e. no further records will be written
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        if self._file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            self._file.close()
+            raise ValueError("{0} is not a record log".format(filename))
+        self._offsets = OrderedDict()
+        self._scanned_offset = len(FILE_MAGIC)
+        self.complete = False
+        if not self._read_indices():
+            self.refresh()
+
+    def _read_indices(self):
+        self._file.seek(0, os.SEEK_END)
+        file_size = self._file.tell()
+        if file_size < len(FILE_MAGIC) + _END_FRAME_SIZE:
+            return False
+        end_frame = _read_frame(self._file, file_size - _END_FRAME_SIZE)
+        if end_frame is None or end_frame[0] != END_FRAME:
+            return False
+        offsets = {}
+        index_offset = _END_PAYLOAD.unpack(end_frame[1])[0]
+        while index_offset is not None:
+            index_frame = _read_frame(self._file, index_offset)
+            if index_frame is None or index_frame[0] != INDEX_FRAME:
+                return False
+            index = pickle.loads(index_frame[1])
+            offsets.update(index['offsets'])
+            index_offset = index['previous_index']
+        self._offsets = OrderedDict(sorted(offsets.items(), key=lambda key_and_offset: key_and_offset[1]))
+        self._scanned_offset = file_size
+        self.complete = True
+        return True
+
+    def refresh(self):
+        """Reads the keys of records appended since the last call
+
+        :return: the keys of the new records
+        :rtype: list
+        """
+        new_keys = []
+        while not self.complete:
+            frame = _read_frame(self._file, self._scanned_offset)
+            if frame is None:
+                # the frame is not yet completely written
+                break
+            frame_type, payload, next_offset = frame
+            if frame_type == RECORD_FRAME:
+                key = _decode_key(payload)[0]
+                self._offsets[key] = self._scanned_offset
+                new_keys.append(key)
+            elif frame_type == END_FRAME:
+                self.complete = True
+            self._scanned_offset = next_offset
+        return new_keys
+
+    def iter_records(self, start_offset=None, follow=False, poll_interval=0.1, timeout=None):
+        """Reads the records sequentially, without using the index
+
+        :param int start_offset: the offset of the first frame to read, as returned by a previous iteration, None to
+          start with the first record
+        :param bool follow: whether to wait for records appended while iterating, until the log is closed by its
+          writer
+        :param float poll_interval: the time in seconds to wait for new records
+        :param float timeout: stop following if no new record was written for the given number of seconds, None to
+          wait forever
+        :return: generator of key, record and offset tuples; the offset refers to the frame after the record
+        """
+        offset = len(FILE_MAGIC) if start_offset is None else start_offset
+        last_change = time.time()
+        while True:
+            frame = _read_frame(self._file, offset)
+            if frame is None:
+                if not follow or timeout is not None and time.time() - last_change > timeout:
+                    return
+                time.sleep(poll_interval)
+                continue
+            frame_type, payload, next_offset = frame
+            if frame_type == RECORD_FRAME:
+                key, record = _decode_record(payload)
+                yield key, record, next_offset
+            elif frame_type == END_FRAME:
+                return
+            offset = next_offset
+            last_change = time.time()
+
+    def follow(self, poll_interval=0.1, timeout=None):
+        """Yields all records, including records appended while iterating, until the log is closed by its writer
+
+        :param float poll_interval: the time in seconds to wait for new records
+        :param float timeout: stop if no new record was written for the given number of seconds, None to wait forever
+        :return: generator of key and record tuples
+        """
+        for key, record, _ in self.iter_records(follow=True, poll_interval=poll_interval, timeout=timeout):
+            yield key, record
+
+    def __getitem__(self, key):
+        frame = _read_frame(self._file, self._offsets[native_str(key)])
+        return _decode_record(frame[1])[1]
+
+    def __contains__(self, key):
+        return native_str(key) in self._offsets
+
+    def __iter__(self):
+        return iter(list(self._offsets.keys()))
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -20,9 +20,10 @@ import json
 import yaml
 from time import gmtime, strftime, strptime, mktime
 
-from jsonconversion.decoder import JSONObjectDecoder
 from jsonconversion.encoder import JSONObjectEncoder
 
+from rafcon.utils import json_codec
+
 substitute_modules = {
     # backward compatibiliy (remove in next minor release): state elements
     'rafcon.statemachine.data_flow.DataFlow': 'rafcon.core.state_elements.data_flow.DataFlow',
@@ -99,16 +100,34 @@ def load_dict_from_yaml(path):
     return dictionary
 
 
-def write_dict_to_json(dictionary, path, **kwargs):
+def dict_to_json_string(dictionary, compact=False, **kwargs):
+    """
+    Converts a dictionary to a json string, formatted like the json files written by `write_dict_to_json`.
+    Without additional parameters for the dumper, the fast codec of :mod:`rafcon.utils.json_codec` is used.
+    :param dictionary: The dictionary to be converted
+    :param bool compact: Whether to omit indentation and whitespace, for files only read by machines
+    :param kwargs: optional additional parameters for dumper
+    :return: the json string
+    """
+    if not kwargs:
+        return json_codec.encode(dictionary, compact)
+    if compact:
+        return json.dumps(dictionary, cls=JSONObjectEncoder, separators=json_codec.COMPACT_SEPARATORS,
+                          builtins_str="__builtin__", sort_keys=True, check_circular=False, **kwargs)
+    return json.dumps(dictionary, cls=JSONObjectEncoder,
+                      indent=4, separators=(', ', ': '), builtins_str="__builtin__", sort_keys=True,
+                      check_circular=False, **kwargs)
+
+
+def write_dict_to_json(dictionary, path, compact=False, **kwargs):
     """
     Write a dictionary to a json file.
     :param path: The relative path to save the dictionary to
     :param dictionary: The dictionary to get saved
+    :param bool compact: Whether to omit indentation and whitespace, for files only read by machines
     :param kwargs: optional additional parameters for dumper
     """
-    result_string = json.dumps(dictionary, cls=JSONObjectEncoder,
-                               indent=4, separators=(', ', ': '), builtins_str="__builtin__", sort_keys=True,
-                               check_circular=False, **kwargs)
+    result_string = dict_to_json_string(dictionary, compact, **kwargs)
     with open(path, 'w') as f:
         # We cannot write directly to the file, as otherwise the 'encode' method wouldn't be called
         f.write(result_string)
@@ -120,10 +139,30 @@ def load_objects_from_json(path, as_dict=False):
     :param path: The relative path of the json file.
     :return: The dictionary specified in the json file
     """
-    f = open(path, 'r')
+    with open(path, 'r') as f:
+        if as_dict:
+            return json.load(f)
+        return json_codec.decode(f.read())
+
+
+def load_objects_from_json_string(json_string, as_dict=False):
+    """Loads a dictionary from a json string.
+
+    :param str json_string: The json string, e.g. the content of a json file
+    :return: The dictionary specified in the json string
+    """
     if as_dict:
-        result = json.load(f)
-    else:
-        result = json.load(f, cls=JSONObjectDecoder, substitute_modules=substitute_modules)
-    f.close()
-    return result
+        return json.loads(json_string)
+    return json_codec.decode(json_string)
+
+
+def decode_json_objects(data):
+    """Converts data loaded from json without decoding of objects into objects
+
+    This allows to parse the json data, e.g. in another process, and to create the objects afterwards. The result is
+    the same as if the data had been loaded with `load_objects_from_json`.
+
+    :param data: The data as returned by `json.load` without object hook
+    :return: The data with all encoded objects decoded
+    """
+    return json_codec.decode_json_data(data)
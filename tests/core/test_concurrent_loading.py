@@ -0,0 +1,48 @@
+import os
+
+from rafcon.core.storage import storage
+from rafcon.core.config import global_config
+
+# test environment elements
+from tests import utils as testing_utils
+import pytest
+
+
+def test_concurrent_loading(caplog):
+    sm_path = testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines", "stepping_test_with_library"))
+    testing_utils.initialize_environment_core()
+    try:
+        sm = storage.load_state_machine_from_path(sm_path)
+        sm.root_state.semantic_data = {'key': 'value'}
+        storage_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(sm, storage_path)
+        # a folder without state, e.g. created by a script cache, has to be ignored
+        os.makedirs(os.path.join(sm.root_state.file_system_path, "__pycache__"))
+
+        global_config.set_config_value('STATE_MACHINE_LOADING_THREADS', 4)
+        sm_loaded = storage.load_state_machine_from_path(storage_path)
+        assert sm_loaded.root_state == sm.root_state
+        assert sm_loaded.root_state.semantic_data == {'key': 'value'}
+        assert not sm_loaded.marked_dirty
+
+        state_folders = storage.read_state_folders_concurrently(sm.root_state.file_system_path, 4)
+        root_state_folder = state_folders[sm.root_state.file_system_path]
+        assert len(root_state_folder.child_state_paths) == len(sm.root_state.states)
+        assert all(child_state_path in state_folders for child_state_path in root_state_folder.child_state_paths)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_loading_pool_is_replaced():
+    thread_pool = storage._get_loading_pool(2)
+    assert storage._get_loading_pool(2) is thread_pool
+    assert storage._get_loading_pool(3) is not thread_pool
+    # the replaced pool was closed, thus its threads exit
+    thread_pool.join()
+
+    storage.shutdown_loading_pool()
+    assert storage._loading_pool is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,79 @@
+# core elements
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+
+# test environment elements
+import pytest
+
+
+def create_hierarchy_state():
+    state1 = ExecutionState("State1")
+    state1.add_outcome("next", 3)
+    output_1 = state1.add_output_data_port("output", "int", 0)
+
+    state2 = ExecutionState("State2")
+    state2.add_outcome("next", 3)
+    input_2 = state2.add_input_data_port("input", "int", 0)
+
+    root_state = HierarchyState("Root")
+    root_state.add_state(state1)
+    root_state.add_state(state2)
+    root_state.set_start_state(state1.state_id)
+    root_state.add_outcome("done", 5)
+    scoped_variable = root_state.add_scoped_variable("scoped", "int", 0)
+
+    return root_state, state1, state2, output_1, input_2, scoped_variable
+
+
+def test_transition_lookup():
+    root_state, state1, state2, _, _, _ = create_hierarchy_state()
+
+    assert root_state.get_transition_for_origin(state1.state_id, 3) is None
+    t_id = root_state.add_transition(state1.state_id, 3, state2.state_id, None)
+    transition = root_state.transitions[t_id]
+    assert root_state.get_transition_for_origin(state1.state_id, 3) is transition
+    assert root_state.get_transition_for_outcome(state1, state1.outcomes[3]) is transition
+
+    # lookup tables must follow modifications of the transition itself
+    transition.modify_origin(state2.state_id, 3)
+    assert root_state.get_transition_for_origin(state1.state_id, 3) is None
+    assert root_state.get_transition_for_origin(state2.state_id, 3) is transition
+
+    root_state.remove_transition(t_id)
+    assert root_state.get_transition_for_origin(state2.state_id, 3) is None
+
+    t_id = root_state.add_transition(state2.state_id, 3, root_state.state_id, 5)
+    transitions = dict(root_state.transitions)
+    root_state.transitions = {}
+    assert root_state.get_transition_for_origin(state2.state_id, 3) is None
+    root_state.transitions = transitions
+    assert root_state.get_transition_for_origin(state2.state_id, 3) is transitions[t_id]
+
+
+def test_data_flow_lookup():
+    root_state, state1, state2, output_1, input_2, scoped_variable = create_hierarchy_state()
+
+    df_1 = root_state.add_data_flow(state1.state_id, output_1, state2.state_id, input_2)
+    df_2 = root_state.add_data_flow(state1.state_id, output_1, root_state.state_id, scoped_variable)
+    data_flows_from_output = root_state.get_data_flows_from_port(state1.state_id, output_1)
+    assert set(df.data_flow_id for df in data_flows_from_output) == {df_1, df_2}
+    assert root_state.get_data_flows_to_port(state2.state_id, input_2) == [root_state.data_flows[df_1]]
+
+    root_state.data_flows[df_1].modify_origin(root_state.state_id, scoped_variable)
+    assert root_state.get_data_flows_to_port(state2.state_id, input_2) == [root_state.data_flows[df_1]]
+    assert root_state.get_data_flows_from_port(state1.state_id, output_1) == [root_state.data_flows[df_2]]
+    assert root_state.get_data_flows_from_port(root_state.state_id, scoped_variable) == \
+        [root_state.data_flows[df_1]]
+
+    old_state_id = root_state.state_id
+    root_state.change_state_id()
+    assert root_state.get_data_flows_from_port(old_state_id, scoped_variable) == []
+    assert root_state.get_data_flows_from_port(root_state.state_id, scoped_variable) == \
+        [root_state.data_flows[df_1]]
+
+    root_state.remove_data_flow(df_2)
+    assert root_state.get_data_flows_from_port(state1.state_id, output_1) == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
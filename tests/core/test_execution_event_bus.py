@@ -0,0 +1,94 @@
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.state import StateExecutionStatus
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.execution.execution_status import StateMachineExecutionStatus
+from rafcon.core.execution.execution_event_bus import ExecutionEventBus, ExecutionEvent, get_execution_event_bus, \
+    get_active_execution_event_bus, notify_observers
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+class EventCollector(object):
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, events):
+        self.events.extend(events)
+
+
+class ObservableDummy(object):
+
+    def __init__(self):
+        self.notifications = []
+
+    def _notify_method_before(self, instance, name, args, kwargs):
+        self.notifications.append(("before", name, args[1:]))
+
+    def _notify_method_after(self, instance, name, result, args, kwargs):
+        self.notifications.append(("after", name, result))
+
+
+def test_coalescing():
+    execution_event_bus = ExecutionEventBus(rate=1000)
+    collector = EventCollector()
+    source1 = ObservableDummy()
+    source2 = ObservableDummy()
+    execution_event_bus.subscribe(collector)
+    try:
+        execution_event_bus._stop_dispatcher.set()  # dispatch manually
+        execution_event_bus._dispatcher.join()
+        for value in range(3):
+            execution_event_bus.publish(ExecutionEvent(source1, "status", (source1, value), {}, None))
+            execution_event_bus.publish(ExecutionEvent(source2, "push", (source2, value), {}, value))
+            execution_event_bus.publish(ExecutionEvent(source2, "push", (source2, value), {}, value), coalesce=False)
+        execution_event_bus.flush()
+        assert [(event.source, event.args[1]) for event in collector.events] == \
+            [(source2, 0), (source2, 1), (source1, 2), (source2, 2), (source2, 2)]
+
+        notify_observers(collector.events[2:3])
+        assert source1.notifications == [("before", "status", (2, )), ("after", "status", None)]
+    finally:
+        execution_event_bus.unsubscribe(collector)
+    assert not execution_event_bus.active
+
+
+def test_execution_events(caplog):
+    testing_utils.initialize_environment_core()
+    execution_event_bus = get_execution_event_bus()
+    collector = EventCollector()
+    try:
+        root_state = HierarchyState("root")
+        state1 = ExecutionState("state1")
+        state1.script_text = "def execute(self, inputs, outputs, gvm):\n    return 0\n"
+        root_state.add_state(state1)
+        root_state.set_start_state(state1)
+        root_state.add_transition(state1.state_id, 0, root_state.state_id, 0)
+        state_machine = StateMachine(root_state)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+
+        execution_event_bus.subscribe(collector)
+        assert get_active_execution_event_bus() is execution_event_bus
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        execution_event_bus.flush()
+
+        status_events = [event for event in collector.events if event.method_name == "state_execution_status"]
+        assert set(id(event.source) for event in status_events) == {id(root_state), id(state1)}
+        last_status = {id(event.source): event.args[1] for event in status_events}
+        assert all(status is StateExecutionStatus.INACTIVE for status in last_status.values())
+        history_events = [event for event in collector.events if event.method_name == "push_call_history_item"]
+        assert len(history_events) >= 2
+        assert all(event.result is not None for event in history_events)
+        mode_events = [event for event in collector.events if event.method_name == "set_execution_mode"]
+        assert [event.args[1] for event in mode_events] == [StateMachineExecutionStatus.STARTED,
+                                                            StateMachineExecutionStatus.FINISHED]
+
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        execution_event_bus.unsubscribe(collector)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+    assert get_active_execution_event_bus() is None
@@ -2,17 +2,37 @@
 import rafcon.core.singleton
 from rafcon.core.storage import storage as global_storage
 import rafcon.utils.execution_log as log_helper
+from rafcon.core.execution.execution_history import AsyncExecutionHistoryStorage
 
 # test environment elements
 import pytest
 from tests import utils as testing_utils
 import os
+import shelve
+import pickle
 
 
-def test_execution_log(caplog):
+class DummyHistoryItem(object):
+    def __init__(self, history_item_id, prev=None):
+        self.history_item_id = history_item_id
+        self.prev = prev
+        self.value = None
+
+    def to_dict(self):
+        return {'history_item_id': self.history_item_id,
+                'prev_history_item_id': self.prev.history_item_id if self.prev else None,
+                # like the data of history items, the value is pickled
+                'value': pickle.dumps(self.value)}
+
+
+@pytest.mark.parametrize("async_writer, log_format", [(True, "SHELVE"), (False, "SHELVE"), (True, "RECORDS"),
+                                                      (False, "RECORDS")])
+def test_execution_log(caplog, async_writer, log_format):
     try:
         testing_utils.initialize_environment_core(
             core_config={'EXECUTION_LOG_ENABLE': True,
+                         'EXECUTION_LOG_ASYNC_WRITER': async_writer,
+                         'EXECUTION_LOG_FORMAT': log_format,
                          'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()+'/test_execution_log'})
 
         state_machine = global_storage.load_state_machine_from_path(
@@ -23,9 +43,7 @@ def test_execution_log(caplog):
         rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
         rafcon.core.singleton.state_machine_execution_engine.join()
 
-        import shelve
-        import json
-        ss = shelve.open(state_machine.get_last_execution_log_filename())
+        ss = log_helper.open_execution_log(state_machine.get_last_execution_log_filename())
 
         assert len(ss) == 36
 
@@ -55,6 +73,7 @@ def test_execution_log(caplog):
         all_starts = df.groupby('state_name').get_group('Start')
         assert len(all_starts) == 3
         assert list(all_starts['outcome_name']) == ['success', 'success', 'done']
+        ss.close()
 
         rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
     except ImportError:  # if pandas is not installed
@@ -62,6 +81,170 @@ def test_execution_log(caplog):
     finally:
         testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
 
+
+@pytest.mark.parametrize("log_format", ["SHELVE", "RECORDS"])
+def test_execution_log_stream(caplog, log_format):
+    # the ports of the state machine are of pandas types
+    pytest.importorskip("pandas")
+    try:
+        testing_utils.initialize_environment_core(
+            core_config={'EXECUTION_LOG_ENABLE': True,
+                         'EXECUTION_LOG_FORMAT': log_format,
+                         'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()+'/test_execution_log'})
+
+        state_machine = global_storage.load_state_machine_from_path(
+            testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                        "execution_file_log_test")))
+
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+
+        ss = log_helper.open_execution_log(state_machine.get_last_execution_log_filename())
+        start, _, _, _, collapsed_items = log_helper.log_to_collapsed_structure(ss)
+        stream = list(log_helper.log_to_collapsed_stream(ss))
+
+        # the same executions are yielded, the root state returns last
+        assert stream[0] == start
+        assert len(stream) == len(collapsed_items)
+        assert stream[-1]['run_id'] == state_machine.root_state.run_id
+        for execution_item in stream[1:]:
+            collapsed_item = collapsed_items[execution_item['run_id']]
+            for key in ['state_name', 'path', 'outcome_name', 'timestamp_call', 'timestamp_return']:
+                assert execution_item[key] == collapsed_item[key]
+            assert set(execution_item['data_outs']) == set(collapsed_item['data_outs'])
+
+        # resume after the third execution
+        resumed_stream = list(log_helper.log_to_collapsed_stream(
+            ss, start_item_id=stream[3]['return_history_item_id']))
+        resumed_run_ids = [execution_item['run_id'] for execution_item in resumed_stream]
+        assert resumed_run_ids == [execution_item['run_id'] for execution_item in stream[4:]
+                                   if execution_item['run_id'] in resumed_run_ids]
+        assert len(resumed_run_ids) > 0
+        # states called before the start position are omitted
+        assert state_machine.root_state.run_id not in resumed_run_ids
+        if log_format == "RECORDS":
+            resumed_stream = list(log_helper.log_to_collapsed_stream(ss, start_offset=stream[3]['resume_offset']))
+            assert [execution_item['run_id'] for execution_item in resumed_stream] == resumed_run_ids
+        else:
+            with pytest.raises(ValueError):
+                next(log_helper.log_to_collapsed_stream(ss, start_offset=0))
+        ss.close()
+
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
+
+
+@pytest.mark.parametrize("file_format", ["npz", "arrow"])
+def test_columnar_export(caplog, file_format):
+    pytest.importorskip("numpy")
+    # the ports of the state machine are of pandas types
+    pytest.importorskip("pandas")
+    if file_format == "arrow":
+        pytest.importorskip("pyarrow")
+    try:
+        testing_utils.initialize_environment_core(
+            core_config={'EXECUTION_LOG_ENABLE': True,
+                         'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()+'/test_execution_log'})
+
+        state_machine = global_storage.load_state_machine_from_path(
+            testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                        "execution_file_log_test")))
+
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+
+        ss = log_helper.open_execution_log(state_machine.get_last_execution_log_filename())
+        start, _, _, _, collapsed_items = log_helper.log_to_collapsed_structure(ss)
+        filename = os.path.join(testing_utils.get_unique_temp_path(), 'execution_log.' + file_format)
+        assert log_helper.log_to_columnar_file(ss, filename, file_format) == len(collapsed_items) - 1
+        ss.close()
+
+        columnar_log = log_helper.load_columnar_log(filename)
+        assert len(columnar_log) == len(collapsed_items) - 1
+        run_ids = list(columnar_log.column('run_id'))
+        assert set(run_ids) == set(collapsed_items) - {start['run_id']}
+        assert list(columnar_log.column('state_name')) == [collapsed_items[run_id]['state_name'] for run_id in run_ids]
+        assert list(columnar_log.column('outcome_id')) == [collapsed_items[run_id]['outcome_id'] for run_id in run_ids]
+        assert all(columnar_log.durations() >= 0)
+
+        codes, categories = columnar_log.categorical_column('state_name')
+        assert list(categories[codes]) == list(columnar_log.column('state_name'))
+        assert list(categories).count('Start') == 1
+
+        prod2_index = list(columnar_log.column('state_name')).index('MakeProd2')
+        prod2_data = columnar_log.get_data(prod2_index)
+        assert prod2_data['data_ins']['input_1'] == 0
+        assert prod2_data['data_outs']['output_1'] == 3
+        assert prod2_data['scoped_data_ins']['product'] == 1
+
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
+
+
+def test_async_storage_writes_all_items_on_close():
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'async_log.shelve')
+    storage = AsyncExecutionHistoryStorage(filename, queue_size=2)
+
+    items = [DummyHistoryItem("item_0")]
+    for i in range(1, 50):
+        items.append(DummyHistoryItem("item_{}".format(i), items[-1]))
+    for item in items:
+        storage.store_history_item(item)
+    # the link to the previous item is taken from the time the item was stored
+    items[1].prev = None
+    assert storage.load_item("item_1")['prev_history_item_id'] == "item_0"
+    storage.close()
+
+    store = shelve.open(filename, flag='r')
+    try:
+        assert len(store) == 50
+    finally:
+        store.close()
+
+
+def test_async_storage_records_items_when_stored(caplog):
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'async_log.shelve')
+    storage = AsyncExecutionHistoryStorage(filename, queue_size=1)
+
+    item = DummyHistoryItem("item_0")
+    item.value = [1]
+    # block the writer thread, the item is recorded nevertheless with the data at the time it is stored
+    with storage.store_lock:
+        storage.store_history_item(item)
+        item.value.append(2)
+    assert pickle.loads(storage.load_item("item_0")['value']) == [1]
+    storage.close()
+
+    # items stored after closing are rejected instead of blocking on the full queue
+    for i in range(1, 4):
+        storage.store_history_item(DummyHistoryItem("item_{}".format(i)))
+    testing_utils.assert_logger_warnings_and_errors(caplog, expected_warnings=3)
+
+
+def test_async_storage_drops_items_if_full(caplog):
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'async_log.shelve')
+    storage = AsyncExecutionHistoryStorage(filename, queue_size=2, drop_items_if_full=True)
+    storage.BATCH_SIZE = 1
+
+    # block the writer thread, so that at most three items are accepted
+    with storage.store_lock:
+        for i in range(10):
+            storage.store_history_item(DummyHistoryItem("item_{}".format(i)))
+    storage.close()
+
+    assert storage.number_of_dropped_items >= 7
+    store = shelve.open(filename, flag='r')
+    try:
+        assert len(store) == 10 - storage.number_of_dropped_items
+    finally:
+        store.close()
+    testing_utils.assert_logger_warnings_and_errors(caplog, expected_warnings=2)
+
+
 if __name__ == '__main__':
-    test_execution_log(None)
+    test_execution_log(None, True, "SHELVE")
     # pytest.main([__file__])
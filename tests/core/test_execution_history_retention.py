@@ -0,0 +1,139 @@
+from builtins import range
+import time
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.execution import execution_history as execution_history_module
+
+# test environment elements
+from tests import utils as testing_utils
+from tests.utils import wait_for_execution_engine_sync_counter
+import pytest
+
+from rafcon.utils import log
+logger = log.get_logger(__name__)
+
+
+def return_loop_state_machine():
+    state1 = ExecutionState("MyFirstState", path=testing_utils.TEST_SCRIPT_PATH, filename="loop_state1.py")
+    state1.add_outcome("MyFirstOutcome", 3)
+
+    state2 = ExecutionState("MySecondState", path=testing_utils.TEST_SCRIPT_PATH, filename="loop_state2.py")
+    state2.add_outcome("FirstOutcome", 3)
+
+    state3 = HierarchyState("MyFirstHierarchyState")
+    state3.add_state(state1)
+    state3.add_state(state2)
+    state3.set_start_state(state1.state_id)
+    state3.add_transition(state1.state_id, 3, state2.state_id, None)
+    state3.add_transition(state2.state_id, 3, state1.state_id, None)
+
+    return StateMachine(state3)
+
+
+def run_loop_state_machine(state_machine, duration):
+    rafcon.core.singleton.global_variable_manager.set_variable("counter", 0)
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+    time.sleep(duration)
+    rafcon.core.singleton.state_machine_execution_engine.stop()
+    rafcon.core.singleton.state_machine_execution_engine.join()
+
+
+def test_max_items(caplog):
+    testing_utils.initialize_environment_core(core_config={'EXECUTION_HISTORY_MAX_ITEMS': 10,
+                                                           'EXECUTION_LOG_ENABLE': False})
+    try:
+        state_machine = return_loop_state_machine()
+        run_loop_state_machine(state_machine, 0.5)
+
+        execution_history = state_machine.execution_histories[0]
+        assert len(execution_history) <= 10
+        assert execution_history.number_of_evicted_items > 0
+        assert execution_history[-1].state_reference is state_machine.root_state
+        assert execution_history.get_evicted_item_records() == []
+    finally:
+        testing_utils.reload_config(gui_config=False)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_max_age_with_execution_log(caplog):
+    testing_utils.initialize_environment_core(core_config={'EXECUTION_HISTORY_MAX_AGE': 0.1,
+                                                           'EXECUTION_LOG_ENABLE': True,
+                                                           'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()})
+    try:
+        state_machine = return_loop_state_machine()
+        run_loop_state_machine(state_machine, 0.5)
+
+        execution_history = state_machine.execution_histories[0]
+        assert all(time.time() - history_item.timestamp < 0.5 for history_item in list(execution_history)[1:])
+        assert execution_history.number_of_evicted_items > 0
+
+        # evicted items can be loaded from the execution log, even after it was closed
+        records = execution_history.get_evicted_item_records(0, 3)
+        assert [record['item_type'] for record in records] == ['StateMachineStartItem', 'CallItem', 'ReturnItem']
+        assert records[1]['state_name'] == "MyFirstState"
+        # the ids of the sequentially executed items form few ranges, only the pinned items of running states are
+        # evicted out of order
+        assert len(execution_history._evicted_item_id_ranges) * 10 < execution_history.number_of_evicted_items
+    finally:
+        testing_utils.reload_config(gui_config=False)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_backward_stepping_within_kept_items(caplog):
+    testing_utils.initialize_environment_core(core_config={'EXECUTION_HISTORY_MAX_ITEMS': 6})
+    execution_engine = rafcon.core.singleton.state_machine_execution_engine
+    try:
+        state_machine = return_loop_state_machine()
+        rafcon.core.singleton.global_variable_manager.set_variable("counter", 0)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        with execution_engine._status.execution_condition_variable:
+            execution_engine.synchronization_counter = 0
+
+        execution_engine.step_mode(state_machine.state_machine_id)
+        wait_for_execution_engine_sync_counter(1, logger)
+        for _ in range(5):
+            execution_engine.step_into()
+            wait_for_execution_engine_sync_counter(1, logger)
+
+        # besides the call item of the running root state, only the items of the last steps are kept
+        execution_history = state_machine.execution_histories[0]
+        assert len(execution_history) == 6
+        for _ in range(2):
+            execution_engine.backward_step()
+            wait_for_execution_engine_sync_counter(1, logger)
+        assert len(execution_history) == 2
+
+        # the third step back is refused
+        execution_engine.backward_step()
+        wait_for_execution_engine_sync_counter(1, logger)
+        assert len(execution_history) == 2
+
+        execution_engine.stop()
+        execution_engine.join()
+        assert rafcon.core.singleton.global_variable_manager.get_variable("counter") == 5
+    finally:
+        testing_utils.reload_config(gui_config=False)
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=1)
+
+
+def test_evicted_item_ids_are_bounded(monkeypatch):
+    monkeypatch.setattr(execution_history_module, "MAX_EVICTED_ITEM_ID_RANGES", 2)
+    execution_history = execution_history_module.ExecutionHistory()
+    for number in (1, 2, 3, 5, 6, 8):
+        execution_history._remember_evicted_item_id("experiment.history_item_id.%020d" % number)
+    execution_history._number_of_evicted_items = 6
+
+    # the oldest range was forgotten
+    assert execution_history._number_of_forgotten_item_ids == 3
+    assert [id_range[1:3] for id_range in execution_history._evicted_item_id_ranges] == [[5, 2], [8, 1]]
+    assert list(execution_history._iter_evicted_item_ids()) == \
+        ["experiment.history_item_id.%020d" % number for number in (5, 6, 8)]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
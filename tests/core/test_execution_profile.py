@@ -0,0 +1,75 @@
+import pytest
+
+import rafcon.core.singleton
+from rafcon.core.config import global_config
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.execution.execution_history import ExecutionTimingHistory
+from rafcon.core.execution.execution_profile import activate_configured_profile, production_profile_active, \
+    DEFAULT_PROFILE, PRODUCTION_PROFILE
+
+# test environment elements
+from tests import utils as testing_utils
+
+SCRIPT_TEXT = "def execute(self, inputs, outputs, gvm):\n    return 0\n"
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    state1 = ExecutionState("state1")
+    state1.script_text = SCRIPT_TEXT
+    barrier_state = BarrierConcurrencyState("barrier")
+    barrier_state.states[UNIQUE_DECIDER_STATE_ID].script_text = SCRIPT_TEXT
+    for i in range(2):
+        branch_state = ExecutionState("branch" + str(i))
+        branch_state.script_text = SCRIPT_TEXT
+        barrier_state.add_state(branch_state)
+    barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+    root_state.add_state(state1)
+    root_state.add_state(barrier_state)
+    root_state.set_start_state(state1)
+    root_state.add_transition(state1.state_id, 0, barrier_state.state_id, None)
+    root_state.add_transition(barrier_state.state_id, 0, root_state.state_id, 0)
+    return StateMachine(root_state)
+
+
+def test_production_profile(caplog):
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_PROFILE": PRODUCTION_PROFILE})
+    try:
+        state_machine = create_state_machine()
+        root_state = state_machine.root_state
+        barrier_state_id = [state.state_id for state in root_state.states.values()
+                            if isinstance(state, BarrierConcurrencyState)][0]
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        execution_engine = rafcon.core.singleton.state_machine_execution_engine
+
+        for run in range(1, 3):
+            execution_engine.start(state_machine.state_machine_id)
+            execution_engine.join()
+            # the profile is reset with the end of the execution
+            assert not production_profile_active()
+            assert root_state.final_outcome.outcome_id == 0
+            execution_history = state_machine.execution_histories[-1]
+            assert isinstance(execution_history, ExecutionTimingHistory)
+            assert len(execution_history) == 0
+
+        timings = execution_history.get_timings()
+        expected_paths = [root_state.get_path()] + [state.get_path() for state in root_state.states.values()]
+        # like for the history items, the decider state is not considered
+        expected_paths += [state.get_path() for state_id, state in root_state.states[barrier_state_id].states.items()
+                           if state_id != UNIQUE_DECIDER_STATE_ID]
+        assert set(timings) == set(expected_paths)
+        assert all(count == 1 and duration >= 0. for count, duration in timings.values())
+        assert not execution_history.is_backward_step_possible()
+        with pytest.raises(RuntimeError):
+            root_state.states[barrier_state_id].get_previously_executed_state()
+
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        global_config.set_config_value("EXECUTION_PROFILE", DEFAULT_PROFILE)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+    assert activate_configured_profile() == DEFAULT_PROFILE
+    assert not production_profile_active()
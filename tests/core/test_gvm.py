@@ -1,3 +1,6 @@
+import threading
+import time
+
 from rafcon.core.global_variable_manager import GlobalVariableManager
 import pytest
 from tests import utils as testing_utils
@@ -58,6 +61,92 @@ def test_locks(caplog):
     testing_utils.assert_logger_warnings_and_errors(caplog, expected_warnings=1, expected_errors=1)
 
 
+def test_blocking_lock(caplog):
+    gvm = GlobalVariableManager()
+    gvm.set_variable('a', 1)
+    access_key = gvm.lock_variable('a')
+
+    # the lock times out
+    start_time = time.time()
+    assert gvm.lock_variable('a', block=True, timeout=0.1) is False
+    assert 0.1 <= time.time() - start_time < 1.
+
+    # waiting threads acquire the lock in the order of their requests, directly after it was released
+    lock_order = []
+
+    def set_variable(value):
+        thread_access_key = gvm.lock_variable('a', block=True)
+        lock_order.append(value)
+        gvm.set_variable('a', value, access_key=thread_access_key)
+        gvm.unlock_variable('a', thread_access_key)
+
+    threads = []
+    for value in range(2, 5):
+        thread = threading.Thread(target=set_variable, args=(value, ))
+        thread.start()
+        threads.append(thread)
+        while gvm.get_lock_statistics('a')['number_of_waiting_threads'] < len(threads):
+            time.sleep(0.01)
+    release_time = time.time()
+    gvm.unlock_variable('a', access_key)
+    for thread in threads:
+        thread.join()
+    assert time.time() - release_time < 0.1
+    assert lock_order == [2, 3, 4]
+    assert gvm.get_variable('a') == 4
+
+    statistics = gvm.get_lock_statistics('a')
+    assert statistics['number_of_contended_acquisitions'] == 3
+    assert statistics['max_wait_time'] > 0
+    assert statistics['number_of_waiting_threads'] == 0
+    assert gvm.get_lock_statistics('b') is None
+    testing_utils.assert_logger_warnings_and_errors(caplog, expected_warnings=1)
+
+
+def test_shared_reads_and_snapshots(caplog):
+    gvm = GlobalVariableManager()
+    assert gvm.get_variable_snapshot('a', default=0) == (0, 0)
+    d = {'a': 1}
+    gvm.set_variable('a', d)
+    value, version = gvm.get_variable_snapshot('a')
+    assert value == d and value is not d and version == 1
+    gvm.set_variable('a', {'a': 2})
+    assert gvm.get_variable_snapshot('a') == ({'a': 2}, 2)
+    assert gvm.get_variable_version('a') == 2
+
+    # immutable values are stored as copy, but returned without copying
+    t = (1, [2])
+    gvm.set_variable('t', t, immutable=True)
+    value, version = gvm.get_variable_snapshot('t')
+    assert value == t and value is not t and version == 1
+    assert gvm.get_variable('t') is value
+    with raises(RuntimeError):
+        gvm.get_variable('t', per_reference=True)
+    assert gvm.get_lock_statistics('t')['number_of_readers'] == 0
+    # the shared lock is also released, if the variable is deleted while it is read
+    del gvm._GlobalVariableManager__immutable_variables['t']
+    with raises(KeyError):
+        gvm.get_variable('t')
+    assert gvm.get_lock_statistics('t')['number_of_readers'] == 0
+
+    # readers do not block each other
+    lock = gvm._GlobalVariableManager__variable_locks['a']
+    assert lock.acquire_shared(blocking=False)
+    assert gvm.get_variable('a') == {'a': 2}
+    assert gvm.get_lock_statistics('a')['number_of_readers'] == 1
+    # but writers wait for them
+    assert gvm.lock_variable('a', block=True, timeout=0.1) is False
+    lock.release_shared()
+    access_key = gvm.lock_variable('a')
+    assert not lock.acquire_shared(blocking=False)
+    assert gvm.get_variable('a', access_key=access_key) == {'a': 2}
+    gvm.unlock_variable('a', access_key)
+
+    gvm.delete_variable('a')
+    assert gvm.get_variable_version('a') == 0
+    testing_utils.assert_logger_warnings_and_errors(caplog, expected_warnings=1)
+
+
 def test_type_check(caplog):
     # valid
     gvm = GlobalVariableManager()
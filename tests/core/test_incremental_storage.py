@@ -0,0 +1,95 @@
+import os
+
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.core.config import global_config
+
+# test environment elements
+from tests import utils as testing_utils
+import pytest
+
+
+def create_state_machine():
+    root_state = HierarchyState("root", state_id="ROOT")
+    for i in range(3):
+        hierarchy_state = HierarchyState("hierarchy{}".format(i), state_id="HIERARCHY{}".format(i))
+        for j in range(3):
+            execution_state = ExecutionState("execution{}".format(j), state_id="EXECUTION{}{}".format(i, j))
+            execution_state.semantic_data = {'index': j}
+            hierarchy_state.add_state(execution_state)
+        root_state.add_state(hierarchy_state)
+    return StateMachine(root_state)
+
+
+def get_file_modification_times(path):
+    modification_times = {}
+    for dir_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            file_path = os.path.join(dir_path, file_name)
+            # files are replaced, thus the inode changes even if the time resolution of the file system is coarse
+            file_stat = os.stat(file_path)
+            modification_times[os.path.relpath(file_path, path)] = (file_stat.st_ino, file_stat.st_mtime)
+    return modification_times
+
+
+def get_changed_files(path, old_modification_times):
+    modification_times = get_file_modification_times(path)
+    return {file_path for file_path in set(modification_times) | set(old_modification_times)
+            if modification_times.get(file_path) != old_modification_times.get(file_path)}
+
+
+@pytest.mark.parametrize("loading_threads", [0, 2])
+def test_incremental_saving(loading_threads, caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        global_config.set_config_value('STATE_MACHINE_LOADING_THREADS', loading_threads)
+        storage_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(create_state_machine(), storage_path)
+
+        sm = storage.load_state_machine_from_path(storage_path)
+        hierarchy_state = sm.root_state.states["HIERARCHY1"]
+        execution_state = hierarchy_state.states["EXECUTION12"]
+        hierarchy_folder = os.path.relpath(hierarchy_state.file_system_path, storage_path)
+
+        # unchanged state folders are not written
+        modification_times = get_file_modification_times(storage_path)
+        storage.save_state_machine_to_path(sm, storage_path)
+        assert get_changed_files(storage_path, modification_times) == {storage.STATEMACHINE_FILE}
+
+        # only the folder of the changed state is written
+        execution_state.script_text = execution_state.script_text + "\n"
+        modification_times = get_file_modification_times(storage_path)
+        storage.save_state_machine_to_path(sm, storage_path)
+        execution_folder = os.path.join(hierarchy_folder, "execution2_EXECUTION12")
+        assert get_changed_files(storage_path, modification_times) == {
+            storage.STATEMACHINE_FILE, os.path.join(execution_folder, storage.FILE_NAME_CORE_DATA),
+            os.path.join(execution_folder, storage.SCRIPT_FILE),
+            os.path.join(execution_folder, storage.SEMANTIC_DATA_FILE)}
+
+        # renaming a state moves its folder and rewrites the parent folder
+        execution_state.name = "renamed"
+        modification_times = get_file_modification_times(storage_path)
+        storage.save_state_machine_to_path(sm, storage_path)
+        renamed_folder = os.path.join(hierarchy_folder, "renamed_EXECUTION12")
+        changed_files = get_changed_files(storage_path, modification_times)
+        assert os.path.join(hierarchy_folder, storage.FILE_NAME_CORE_DATA) in changed_files
+        assert os.path.join(renamed_folder, storage.FILE_NAME_CORE_DATA) in changed_files
+        assert not os.path.exists(os.path.join(storage_path, execution_folder))
+        root_folder = os.path.relpath(sm.root_state.file_system_path, storage_path)
+        assert not any(file_path.startswith(os.path.join(root_folder, "hierarchy0")) for file_path in changed_files)
+
+        assert storage.load_state_machine_from_path(storage_path).root_state == sm.root_state
+        # no temporary files are left
+        assert all(not file_name.startswith('.') for file_name in get_file_modification_times(storage_path))
+
+        # a deleted folder is written again
+        storage.save_state_machine_to_path(sm, storage_path, delete_old_state_machine=True)
+        assert storage.load_state_machine_from_path(storage_path).root_state == sm.root_state
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
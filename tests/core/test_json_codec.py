@@ -0,0 +1,66 @@
+import os
+import json
+
+from jsonconversion.decoder import JSONObjectDecoder
+from jsonconversion.encoder import JSONObjectEncoder
+
+from rafcon.core.storage import storage
+from rafcon.utils import json_codec, storage_utils
+
+# test environment elements
+from tests import utils as testing_utils
+import pytest
+
+
+def generic_dict_to_json_string(dictionary):
+    return json.dumps(dictionary, cls=JSONObjectEncoder, indent=4, separators=(', ', ': '),
+                      builtins_str="__builtin__", sort_keys=True, check_circular=False)
+
+
+def generic_load_objects_from_json_string(json_string):
+    return json.loads(json_string, cls=JSONObjectDecoder, substitute_modules=storage_utils.substitute_modules)
+
+
+def test_identical_to_generic_codec(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        sm_path = testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                              "stepping_test_with_library"))
+        json_file_paths = [os.path.join(dir_path, file_name) for dir_path, _, file_names in os.walk(sm_path)
+                           for file_name in file_names if file_name.endswith(".json")]
+        assert json_file_paths
+        for json_file_path in json_file_paths:
+            with open(json_file_path) as json_file:
+                json_string = json_file.read()
+            data = generic_load_objects_from_json_string(json_string)
+            assert json_codec.decode(json_string) == data
+            assert json_codec.encode(data) == generic_dict_to_json_string(data)
+            assert json_codec.decode(json_codec.encode(json.loads(json_string), compact=True)) == data
+
+        data = {2: (1, "a"), 11: {int, float, type(None)}, -1: [None, True, 1.5], 0: {"1": object, "key": "\u00e4"}}
+        assert json_codec.encode(data) == generic_dict_to_json_string(data)
+        assert json_codec.decode(json_codec.encode(data)) == generic_load_objects_from_json_string(
+            generic_dict_to_json_string(data))
+        with pytest.raises(TypeError):
+            json_codec.encode({"key": object()})
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_compact_storage(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        sm_path = testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                              "stepping_test_with_library"))
+        sm = storage.load_state_machine_from_path(sm_path)
+        compact_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(sm, compact_path, as_copy=True, compact=True)
+        with open(os.path.join(compact_path, storage.STATEMACHINE_FILE)) as json_file:
+            assert "\n" not in json_file.read()
+        assert storage.load_state_machine_from_path(compact_path).root_state == sm.root_state
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,94 @@
+import os
+import time
+import shutil
+
+from rafcon.utils import storage_utils
+from rafcon.core.storage import storage
+from rafcon.core.storage import library_cache
+from rafcon.core.config import global_config
+
+# test environment elements
+from tests import utils as testing_utils
+import pytest
+
+
+def set_modification_times_to_past(path):
+    # recently modified files are not cached
+    modification_time = time.time() - 10 * library_cache.RACY_MODIFICATION_INTERVAL
+    for dir_path, _, file_names in os.walk(path):
+        for file_path in [dir_path] + [os.path.join(dir_path, file_name) for file_name in file_names]:
+            os.utime(file_path, (modification_time, modification_time))
+
+
+def fail_reading(*args, **kwargs):
+    raise AssertionError("The library was read, although it is cached")
+
+
+def test_library_cache(caplog, monkeypatch):
+    testing_utils.initialize_environment_core()
+    try:
+        global_config.set_config_value('USE_LIBRARY_CACHE', True)
+        global_config.set_config_value('LIBRARY_CACHE_PATH', os.path.join(testing_utils.get_unique_temp_path(),
+                                                                          "library_cache"))
+        library_path = os.path.join(testing_utils.get_unique_temp_path(), "library")
+        shutil.copytree(testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                                    "stepping_test_with_library")), library_path)
+        set_modification_times_to_past(library_path)
+        cache_file_path = library_cache.get_cache_file_path(library_path)
+
+        sm = library_cache.load_library_state_machine(library_path)
+        assert os.path.isfile(cache_file_path)
+        assert sm.root_state == storage.load_state_machine_from_path(library_path).root_state
+
+        # the cached library is loaded without reading its state folders
+        cache_modification_time = os.stat(cache_file_path).st_mtime
+        with monkeypatch.context() as patch:
+            patch.setattr(storage, "read_state_folders_concurrently", fail_reading)
+            patch.setattr(storage, "_read_state_folder", fail_reading)
+            patch.setattr(storage_utils, "load_objects_from_json", fail_reading)
+            sm_cached = library_cache.load_library_state_machine(library_path)
+        assert sm_cached.root_state == sm.root_state
+        assert sm_cached.file_system_path == sm.file_system_path
+        assert not sm_cached.marked_dirty
+        assert os.stat(cache_file_path).st_mtime == cache_modification_time
+
+        # touching a file invalidates the cache entry
+        read_root_state_paths = []
+
+        def read_state_folders_concurrently(root_state_path, number_of_threads):
+            read_root_state_paths.append(root_state_path)
+            return original_read_state_folders_concurrently(root_state_path, number_of_threads)
+        original_read_state_folders_concurrently = storage.read_state_folders_concurrently
+        monkeypatch.setattr(storage, "read_state_folders_concurrently", read_state_folders_concurrently)
+        os.utime(os.path.join(sm.root_state.file_system_path, storage.FILE_NAME_CORE_DATA), None)
+        assert library_cache.load_library_state_machine(library_path).root_state == sm.root_state
+        assert read_root_state_paths == [sm.root_state.file_system_path]
+        monkeypatch.undo()
+
+        # a changed file invalidates the cache entry
+        execution_state = [state for state in sm.root_state.states.values() if hasattr(state, 'script_text')][0]
+        script_path = os.path.join(execution_state.file_system_path, storage.SCRIPT_FILE)
+        with open(script_path, 'a') as script_file:
+            script_file.write("\n# changed\n")
+        sm_changed = library_cache.load_library_state_machine(library_path)
+        assert sm_changed.root_state.states[execution_state.state_id].script_text.endswith("# changed\n")
+        # the recently modified library was not cached
+        assert os.stat(cache_file_path).st_mtime == cache_modification_time
+        set_modification_times_to_past(library_path)
+        library_cache.load_library_state_machine(library_path)
+        assert library_cache.load_library_state_machine(library_path).root_state == sm_changed.root_state
+        assert os.stat(cache_file_path).st_mtime != cache_modification_time
+
+        # a corrupt cache file is ignored
+        with open(cache_file_path, 'wb') as cache_file:
+            cache_file.write(b"corrupt")
+        assert library_cache.load_library_state_machine(library_path).root_state == sm_changed.root_state
+
+        library_cache.clear_library_cache()
+        assert not os.listdir(library_cache.get_library_cache_path())
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,85 @@
+import os
+import json
+import time
+
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.core.config import global_config
+from rafcon.core import library_manager as library_manager_module
+
+# test environment elements
+from tests import utils as testing_utils
+import pytest
+
+
+def save_library(path, name):
+    storage.save_state_machine_to_path(StateMachine(ExecutionState(name)), path)
+
+
+def set_modification_times_to_past(path):
+    # recently modified folders are not indexed
+    modification_time = time.time() - 10 * library_manager_module.RACY_MODIFICATION_INTERVAL
+    for dir_path, _, _ in os.walk(path):
+        os.utime(dir_path, (modification_time, modification_time))
+
+
+def test_library_index(caplog, monkeypatch):
+    testing_utils.initialize_environment_core()
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        library_root_path = os.path.realpath(testing_utils.get_unique_temp_path())
+        index_path = os.path.join(testing_utils.get_unique_temp_path(), "library_index.json")
+        save_library(os.path.join(library_root_path, "folder", "library1"), "library1")
+        save_library(os.path.join(library_root_path, "library2"), "library2")
+        set_modification_times_to_past(library_root_path)
+        global_config.set_config_value("LIBRARY_PATHS", {"indexed": library_root_path})
+        global_config.set_config_value("USE_LIBRARY_INDEX", True)
+        global_config.set_config_value("LIBRARY_INDEX_PATH", index_path)
+        library_manager.initialize()
+        libraries = library_manager.libraries["indexed"]
+        assert os.path.isfile(index_path)
+        with open(index_path) as index_file:
+            assert library_root_path in json.load(index_file)["root_paths"]
+
+        # unchanged folders are not listed again
+        listed_paths = []
+        original_listdir = os.listdir
+
+        def listdir(path):
+            listed_paths.append(path)
+            return original_listdir(path)
+        monkeypatch.setattr(os, "listdir", listdir)
+        library_manager.initialize()
+        assert library_root_path not in listed_paths
+        assert os.path.join(library_root_path, "folder") not in listed_paths
+        assert library_manager.libraries["indexed"] == libraries
+
+        # modified folders are listed again
+        save_library(os.path.join(library_root_path, "folder", "library3"), "library3")
+        library_manager.initialize()
+        assert os.path.join(library_root_path, "folder") in listed_paths
+        assert list(library_manager.libraries["indexed"]["folder"].keys()) == ["library1", "library3"]
+
+        # a library folder that is no longer a library is listed as ordinary folder
+        set_modification_times_to_past(library_root_path)
+        library_manager.initialize()
+        os.remove(os.path.join(library_root_path, "library2", storage.STATEMACHINE_FILE))
+        del listed_paths[:]
+        library_manager.initialize()
+        assert library_root_path in listed_paths
+        assert isinstance(library_manager.libraries["indexed"]["library2"], dict)
+
+        # an ordinary folder, into which a state machine is saved, becomes a library
+        set_modification_times_to_past(library_root_path)
+        library_manager.initialize()
+        save_library(os.path.join(library_root_path, "library2"), "library2")
+        library_manager.initialize()
+        assert library_manager.libraries["indexed"]["library2"] == os.path.join(library_root_path, "library2")
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,82 @@
+import os
+import shutil
+
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.core.config import global_config
+from rafcon.utils.directory_watcher import DirectoryWatcher, InotifyDirectoryWatcher
+
+# test environment elements
+from tests import utils as testing_utils
+import pytest
+
+
+def save_library(path, name):
+    storage.save_state_machine_to_path(StateMachine(ExecutionState(name)), path)
+
+
+@pytest.mark.parametrize("watcher_type", ["INOTIFY", "POLLING"])
+def test_library_watcher(watcher_type, caplog):
+    testing_utils.initialize_environment_core()
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        library_root_path = os.path.realpath(testing_utils.get_unique_temp_path())
+        save_library(os.path.join(library_root_path, "folder", "library1"), "library1")
+        save_library(os.path.join(library_root_path, "library2"), "library2")
+        global_config.set_config_value("LIBRARY_PATHS", {"watched": library_root_path})
+        global_config.set_config_value("LIBRARY_FILE_SYSTEM_WATCHER", watcher_type)
+        library_manager.initialize()
+        if watcher_type == "POLLING":
+            assert type(library_manager._directory_watcher) is DirectoryWatcher
+        elif os.name == 'posix':
+            assert isinstance(library_manager._directory_watcher, InotifyDirectoryWatcher)
+        libraries = library_manager.libraries["watched"]
+        assert list(libraries.keys()) == ["folder", "library2"]
+
+        library1_os_path = libraries["folder"]["library1"]
+        library2_os_path = libraries["library2"]
+        _, library1_root_state = library_manager.get_library_state_template(library1_os_path)
+        library_manager.get_library_state_template(library2_os_path)
+
+        # only the changed folders are updated
+        save_library(os.path.join(library_root_path, "folder", "library3"), "library3")
+        os.makedirs(os.path.join(library_root_path, "new_folder"))
+        save_library(os.path.join(library_root_path, "new_folder", "library4"), "library4")
+        shutil.rmtree(library2_os_path)
+        library_manager.refresh_libraries()
+        assert library_manager.libraries["watched"] is libraries
+        assert list(libraries.keys()) == ["folder", "new_folder"]
+        assert list(libraries["folder"].keys()) == ["library1", "library3"]
+        assert list(libraries["new_folder"].keys()) == ["library4"]
+        assert library_manager.is_library_in_libraries("watched/new_folder", "library4")
+
+        # only changed libraries are removed from the loaded libraries
+        library4_os_path = libraries["new_folder"]["library4"]
+        library_manager.get_library_state_template(library4_os_path)
+        library1_root_state.script_text += "\n"
+        storage.save_state_machine_to_path(library1_root_state.get_state_machine(), library1_os_path)
+        library_manager.clean_loaded_libraries()
+        assert library1_os_path not in library_manager._loaded_libraries
+        assert library2_os_path not in library_manager._loaded_libraries
+        assert library4_os_path in library_manager._loaded_libraries
+        assert library_manager.get_library_state_template(library1_os_path)[1] is not library1_root_state
+
+        # a folder turned into a library
+        save_library(os.path.join(library_root_path, "new_folder"), "new_folder")
+        library_manager.refresh_libraries()
+        assert libraries["new_folder"] == os.path.join(library_root_path, "new_folder")
+
+        # a changed configuration leads to a full initialization
+        global_config.set_config_value("LIBRARY_FILE_SYSTEM_WATCHER", "NONE")
+        library_manager.refresh_libraries()
+        assert library_manager._directory_watcher is None
+        assert library_manager.libraries["watched"] == libraries
+    finally:
+        library_manager.prepare_destruction()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -177,6 +177,36 @@ def test_nested_library_state_machine(caplog):
         testing_utils.assert_logger_warnings_and_errors(caplog)
 
 
+def test_library_state_copy_on_demand(caplog):
+    library_container_state_sm = create_hierarchy_state_library_state_machine()
+    lib_state = library_container_state_sm.root_state.states["library_hierarchy_state"]
+    other_lib_state = LibraryState("temporary_libraries", "hierarchy_library", "0.1")
+
+    # the library root state is shared as template until a copy is needed
+    assert not lib_state.state_copy_initialized and not other_lib_state.state_copy_initialized
+    assert lib_state._library_template is other_lib_state._library_template
+    assert lib_state.get_states_statistics(0) == (3, 2)
+    assert all(port.parent is lib_state for port in lib_state.input_data_ports.values())
+
+    lib_state.recursively_preempt_states()
+    state_copy = lib_state.state_copy
+    assert lib_state.state_copy_initialized and not other_lib_state.state_copy_initialized
+    assert state_copy is not lib_state._library_template
+    assert state_copy.parent is lib_state
+    assert state_copy.outcomes is lib_state.outcomes
+    assert state_copy.input_data_ports is lib_state.input_data_ports
+    assert all(state.preempted for state in state_copy.states.values())
+    assert lib_state == lib_state.__copy__()
+    assert lib_state.state_copy == other_lib_state.state_copy
+
+    lib_state.recursively_resume_states()
+    lib_state.destroy()
+    assert lib_state._library_template is None
+    # the template is not affected by the destruction of a library state
+    assert not other_lib_state.state_copy.preempted
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
 def test_rafcon_library_path_variable(caplog):
     rafcon.core.config.global_config.set_config_value("LIBRARY_PATHS", {})
     os.environ['RAFCON_LIBRARY_PATH'] = os.path.join(testing_utils.LIBRARY_SM_PATH, 'generic')
@@ -0,0 +1,71 @@
+import os
+import zipfile
+
+from rafcon.core.storage import storage
+from rafcon.core.storage import packed_storage
+
+# test environment elements
+from tests import utils as testing_utils
+import pytest
+
+
+def test_save_load_packed_state_machine(caplog):
+    # the ports of the state machine are of pandas types
+    pytest.importorskip("pandas")
+    testing_utils.initialize_environment_core()
+    try:
+        sm = storage.load_state_machine_from_path(testing_utils.get_test_sm_path(os.path.join(
+            "unit_test_state_machines", "execution_file_log_test")))
+        sm.root_state.semantic_data = {'key': 'value'}
+        packed_file_path = os.path.join(testing_utils.get_unique_temp_path(),
+                                        "execution_file_log_test" + packed_storage.PACKED_STATEMACHINE_FILE_EXTENSION)
+
+        storage.save_state_machine_to_path(sm, packed_file_path)
+        assert os.path.isfile(packed_file_path)
+        assert sm.file_system_path == packed_file_path
+        assert not sm.marked_dirty
+        # the temporary file was renamed and got the permissions of newly created files
+        assert os.listdir(os.path.dirname(packed_file_path)) == [os.path.basename(packed_file_path)]
+        umask = os.umask(0)
+        os.umask(umask)
+        assert os.stat(packed_file_path).st_mode & 0o777 == 0o666 & ~umask
+
+        # existing files are replaced
+        storage.save_state_machine_to_path(sm, packed_file_path)
+        assert os.listdir(os.path.dirname(packed_file_path)) == [os.path.basename(packed_file_path)]
+        with zipfile.ZipFile(packed_file_path) as zip_file:
+            assert packed_storage.TOC_FILE in zip_file.namelist()
+
+        sm_loaded = storage.load_state_machine_from_path(packed_file_path)
+        assert sm_loaded.file_system_path == packed_file_path
+        assert sm_loaded.root_state == sm.root_state
+        assert sm_loaded.root_state.semantic_data == {'key': 'value'}
+
+        # child states can be materialized separately, the TOC tells the hierarchy without loading any state
+        with packed_storage.PackedStateMachineFile(packed_file_path) as packed_file:
+            child_state_paths = packed_file.get_child_state_paths()
+            assert len(child_state_paths) == len(sm.root_state.states)
+            child_state = packed_file.load_state(child_state_paths[0])
+            assert child_state == sm.root_state.states[child_state.state_id]
+            assert child_state.parent is None
+
+        # folders and packed files can be used side by side
+        folder_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(sm_loaded, folder_path)
+        assert storage.load_state_machine_from_path(folder_path).root_state == sm.root_state
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_load_invalid_packed_file(caplog):
+    file_path = os.path.join(testing_utils.get_unique_temp_path(), "invalid" +
+                             packed_storage.PACKED_STATEMACHINE_FILE_EXTENSION)
+    with zipfile.ZipFile(file_path, 'w') as zip_file:
+        zip_file.writestr("statemachine.json", "{}")
+    with pytest.raises(ValueError):
+        storage.load_state_machine_from_path(file_path)
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
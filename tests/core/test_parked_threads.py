@@ -0,0 +1,81 @@
+import time
+
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+from tests import utils as testing_utils
+
+SCRIPT_TEXT = "def execute(self, inputs, outputs, gvm):\n    return 0\n"
+
+
+def create_barrier_state(number_of_branches, number_of_states_per_branch):
+    barrier_state = BarrierConcurrencyState("barrier")
+    barrier_state.states[UNIQUE_DECIDER_STATE_ID].script_text = SCRIPT_TEXT
+    for i in range(number_of_branches):
+        hierarchy_state = HierarchyState("branch" + str(i))
+        last_state = None
+        for j in range(number_of_states_per_branch):
+            state = ExecutionState("state" + str(j))
+            state.script_text = SCRIPT_TEXT
+            hierarchy_state.add_state(state)
+            if last_state is None:
+                hierarchy_state.set_start_state(state)
+            else:
+                hierarchy_state.add_transition(last_state.state_id, 0, state.state_id, None)
+            last_state = state
+        hierarchy_state.add_transition(last_state.state_id, 0, hierarchy_state.state_id, 0)
+        barrier_state.add_state(hierarchy_state)
+    barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+    return barrier_state
+
+
+def test_targeted_wakeups(caplog):
+    testing_utils.initialize_environment_core()
+    execution_engine = rafcon.core.singleton.state_machine_execution_engine
+    execution_condition = execution_engine.status.execution_condition_variable
+    number_of_branches = 3
+    try:
+        state_machine = StateMachine(create_barrier_state(number_of_branches, 4))
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        execution_engine.synchronization_counter = 0
+
+        execution_engine.step_mode(state_machine.state_machine_id)
+        assert execution_engine.wait_for_parked_threads(number_of_branches, timeout=5)
+        assert execution_condition.get_number_of_waiting_threads() == number_of_branches
+
+        # switching between pause and step mode keeps all threads parked without waking them
+        number_of_wakeups = execution_condition.number_of_wakeups
+        execution_engine.pause()
+        execution_engine.step_mode()
+        assert execution_condition.number_of_wakeups == number_of_wakeups
+        assert not execution_engine.wait_for_parked_threads(1, timeout=0.1)
+
+        # each step wakes every parked branch exactly once
+        for _ in range(2):
+            execution_engine.step_into()
+            assert execution_engine.wait_for_parked_threads(number_of_branches, timeout=5)
+            number_of_wakeups += number_of_branches
+            assert execution_condition.number_of_wakeups == number_of_wakeups
+
+        # parks, which were not waited for yet, are kept for the next wait
+        execution_engine.step_into()
+        number_of_wakeups += number_of_branches
+        end_time = time.time() + 5
+        while execution_condition.get_number_of_waiting_threads() < number_of_branches and time.time() < end_time:
+            time.sleep(0.01)
+        assert execution_engine.wait_for_parked_threads(1, timeout=5)
+        assert execution_engine.wait_for_parked_threads(number_of_branches - 1, timeout=0.1)
+        assert not execution_engine.wait_for_parked_threads(1, timeout=0.1)
+
+        execution_engine.stop()
+        execution_engine.join()
+        assert execution_condition.get_number_of_waiting_threads() == 0
+        assert execution_condition.number_of_wakeups == number_of_wakeups + number_of_branches
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
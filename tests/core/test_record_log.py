@@ -0,0 +1,86 @@
+import os
+
+from rafcon.utils.record_log import RecordLogWriter, RecordLogReader, is_record_log
+
+# test environment elements
+import pytest
+from tests import utils as testing_utils
+
+
+def write_records(filename, number_of_records, index_interval=4, close=True):
+    writer = RecordLogWriter(filename, index_interval=index_interval)
+    for i in range(number_of_records):
+        writer["item_{}".format(i)] = {'number': i}
+    if close:
+        writer.close()
+    return writer
+
+
+def test_read_closed_log():
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'test.rlog')
+    write_records(filename, 10)
+    assert is_record_log(filename)
+
+    with RecordLogReader(filename) as reader:
+        assert reader.complete
+        assert len(reader) == 10
+        # the records are iterated in the order they were written
+        assert list(reader) == ["item_{}".format(i) for i in range(10)]
+        assert reader["item_7"] == {'number': 7}
+        assert "item_10" not in reader
+
+
+def test_read_log_while_writing():
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'test.rlog')
+    writer = write_records(filename, 5, close=False)
+    assert writer["item_2"] == {'number': 2}
+
+    reader = RecordLogReader(filename)
+    assert not reader.complete
+    assert len(reader) == 5
+
+    writer["item_5"] = {'number': 5}
+    assert reader.refresh() == ["item_5"]
+    writer.close()
+    assert reader.refresh() == []
+    assert reader.complete
+    assert [record['number'] for _, record in reader.follow()] == list(range(6))
+    reader.close()
+
+
+def test_iter_records_from_offset():
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'test.rlog')
+    write_records(filename, 10)
+
+    with RecordLogReader(filename) as reader:
+        records = list(reader.iter_records())
+        assert [key for key, _, _ in records] == list(reader)
+        resumed_records = list(reader.iter_records(start_offset=records[5][2]))
+        assert resumed_records == records[6:]
+
+
+def test_follow_stops_on_timeout():
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'test.rlog')
+    writer = write_records(filename, 2, close=False)
+    with RecordLogReader(filename) as reader:
+        assert [key for key, _ in reader.follow(poll_interval=0.01, timeout=0.05)] == ["item_0", "item_1"]
+    writer.close()
+
+
+def test_partially_written_record_is_ignored():
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'test.rlog')
+    writer = write_records(filename, 3, index_interval=100, close=False)
+    size_before_last_record = os.path.getsize(filename)
+    writer["item_3"] = {'number': 3}
+    # simulate a crash while writing the last record
+    with open(filename, 'rb+') as log_file:
+        log_file.truncate((size_before_last_record + os.path.getsize(filename)) // 2)
+
+    with RecordLogReader(filename) as reader:
+        assert not reader.complete
+        assert len(reader) == 3
+        assert reader["item_2"] == {'number': 2}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -5,6 +5,7 @@ from rafcon.core.states.hierarchy_state import HierarchyState
 from rafcon.core.state_elements.data_port import InputDataPort, OutputDataPort
 from rafcon.core.storage import storage
 from rafcon.core.state_machine import StateMachine
+from rafcon.core.execution.execution_history import ScopedDataItem
 
 # test environment elements
 from tests import utils as testing_utils
@@ -68,5 +69,65 @@ def test_scoped_data(caplog):
         testing_utils.assert_logger_warnings_and_errors(caplog)
 
 
+def test_scoped_data_snapshots(caplog):
+    state_machine = create_state_machine()
+
+    with testing_utils.test_multithreading_lock:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        snapshots = [history_item.scoped_data for history_item in state_machine.execution_histories[0]
+                     if isinstance(history_item, ScopedDataItem) and history_item.scoped_data]
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.assert_logger_warnings_and_errors(caplog)
+
+    root_state = state_machine.root_state
+    input_key = str(root_state.get_io_data_port_id_from_name_and_type("data_input_port1", InputDataPort)) + \
+        root_state.state_id
+    assert len(snapshots) == 6
+    # unchanged entries are shared between the snapshots instead of being copied
+    assert all(snapshot[input_key] is snapshots[0][input_key] for snapshot in snapshots)
+    # the return of the first child state and the call of the second one see the same scoped data
+    assert snapshots[2] is snapshots[3]
+    assert len(snapshots[0]) < len(snapshots[-1])
+
+    # restoring a snapshot must not modify it
+    number_of_entries = len(snapshots[0])
+    root_state.restore_scoped_data(snapshots[0])
+    root_state.scoped_data["dummy"] = snapshots[-1][input_key]
+    assert len(snapshots[0]) == number_of_entries
+    assert root_state.get_scoped_data_snapshot() is not snapshots[0]
+
+
+def test_scoped_data_is_not_modified_by_scripts(caplog):
+    state = ExecutionState("buffer_state")
+    state.add_output_data_port("buffer", "list")
+    # the script keeps a reference to its output, like a reused buffer
+    state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                        "    self.buffer = [1]\n" \
+                        "    outputs['buffer'] = self.buffer\n" \
+                        "    return 0\n"
+    root_state = HierarchyState("root")
+    root_state.add_state(state)
+    root_state.set_start_state(state.state_id)
+    root_state.add_transition(state.state_id, 0, root_state.state_id, 0)
+    state_machine = StateMachine(root_state)
+
+    with testing_utils.test_multithreading_lock:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        buffer_key = str(state.get_io_data_port_id_from_name_and_type("buffer", OutputDataPort)) + state.state_id
+        snapshots = [history_item.scoped_data for history_item in state_machine.execution_histories[0]
+                     if isinstance(history_item, ScopedDataItem) and buffer_key in history_item.scoped_data]
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.assert_logger_warnings_and_errors(caplog)
+
+    assert snapshots
+    state.buffer.append(2)
+    assert all(snapshot[buffer_key].value == [1] for snapshot in snapshots)
+    assert root_state.get_scoped_data_snapshot()[buffer_key].value == [1]
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -0,0 +1,122 @@
+import os
+import sys
+from threading import Thread
+
+from future.utils import native_str
+
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.config import global_config
+from rafcon.core import bytecode_cache
+
+# test environment elements
+from tests import utils as testing_utils
+import pytest
+
+SCRIPT_TEXT = """
+counter = 0
+
+def execute(self, inputs, outputs, gvm):
+    global counter
+    counter += 1
+    outputs["counter"] = counter
+    return 0
+"""
+
+
+@pytest.fixture
+def compile_counter(monkeypatch):
+    compile_calls = []
+
+    def counting_compile(*args, **kwargs):
+        compile_calls.append(args)
+        return compile(*args, **kwargs)
+    monkeypatch.setattr(bytecode_cache, "compile", counting_compile, raising=False)
+    return compile_calls
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="code objects cannot be relabeled")
+def test_script_compiled_once(caplog, compile_counter):
+    testing_utils.initialize_environment_core()
+    try:
+        bytecode_cache.clear_bytecode_cache()
+        state = ExecutionState("counter")
+        other_state = ExecutionState("other_counter")
+        state.script_text = other_state.script_text = SCRIPT_TEXT
+        outputs = {"counter": None}
+        for _ in range(3):
+            state.script.execute(state, {}, outputs)
+            # the module is still executed anew, resetting its global variables
+            assert outputs["counter"] == 1
+        other_state.script.compile_module()
+        assert len(compile_counter) == 1
+        assert str(state.script._script_id) in state.script.compiled_module.execute.__code__.co_filename
+        assert str(other_state.script._script_id) in other_state.script.compiled_module.execute.__code__.co_filename
+
+        # changed scripts are compiled again
+        state.script_text = SCRIPT_TEXT.replace("counter += 1", "counter += 2")
+        state.script.execute(state, {}, outputs)
+        assert outputs["counter"] == 2
+        assert len(compile_counter) == 2
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="code objects cannot be relabeled")
+def test_bytecode_file_cache(caplog, compile_counter):
+    testing_utils.initialize_environment_core()
+    try:
+        global_config.set_config_value("USE_SCRIPT_BYTECODE_CACHE", True)
+        global_config.set_config_value("SCRIPT_BYTECODE_CACHE_PATH", os.path.join(testing_utils.get_unique_temp_path(),
+                                                                                  "scripts"))
+        bytecode_cache.clear_bytecode_cache()
+        code = bytecode_cache.compile_script(SCRIPT_TEXT, "script.py (1)")
+        assert len(os.listdir(bytecode_cache.get_bytecode_cache_path())) == 1
+
+        # the code is read from the cache folder, e.g. after a restart
+        bytecode_cache._memory_cache.clear()
+        cached_code = bytecode_cache.compile_script(SCRIPT_TEXT, "script.py (2)")
+        assert len(compile_counter) == 1
+        assert cached_code.co_code == code.co_code
+        assert cached_code.co_filename == "script.py (2)"
+
+        bytecode_cache.clear_bytecode_cache()
+        assert not os.listdir(bytecode_cache.get_bytecode_cache_path())
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_concurrent_compilation(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        states = [ExecutionState("counter_{}".format(i)) for i in range(4)]
+        for state in states:
+            state.script_text = SCRIPT_TEXT
+        errors = []
+
+        def compile_scripts():
+            try:
+                for state in states:
+                    state.script.compile_module()
+            except Exception as e:
+                errors.append(e)
+
+        # the same scripts are compiled by several threads, each script under its own lock
+        threads = [Thread(target=compile_scripts) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        for state in states:
+            module = state.script.compiled_module
+            assert isinstance(module.__name__, native_str)
+            assert module.__name__.endswith(str(state.script._script_id))
+            outputs = {"counter": None}
+            module.execute(state, {}, outputs, None)
+            assert outputs["counter"] == 1
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
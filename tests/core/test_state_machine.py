@@ -3,8 +3,12 @@ from __future__ import print_function
 from rafcon.core.states.state import State
 from rafcon.core.decorators import global_lock_counter, lock_state_machine
 from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
 from rafcon.core.state_machine import StateMachine
+import rafcon.core.singleton
 
+from tests import utils as testing_utils
 from tests.utils import assert_logger_warnings_and_errors
 from rafcon.utils import log
 logger = log.get_logger(__name__)
@@ -37,5 +41,30 @@ def test_lock_state_machine(caplog):
     assert_logger_warnings_and_errors(caplog)
 
 
+def test_execution_without_modification_lock(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        script_text = "def execute(self, inputs, outputs, gvm):\n    return 0\n"
+        barrier_state = BarrierConcurrencyState("barrier")
+        barrier_state.states[UNIQUE_DECIDER_STATE_ID].script_text = script_text
+        for i in range(3):
+            state = ExecutionState("state" + str(i))
+            state.script_text = script_text
+            barrier_state.add_state(state)
+        barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+        state_machine = StateMachine(barrier_state)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+
+        # the runtime data is changed without the modification lock, e.g. while the state machine is saved
+        with state_machine.modification_lock():
+            rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+            rafcon.core.singleton.state_machine_execution_engine.join(5)
+            assert barrier_state.final_outcome.outcome_id == 0
+        rafcon.core.singleton.state_machine_execution_engine.stop()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
 if __name__ == '__main__':
     test_lock_state_machine(None)
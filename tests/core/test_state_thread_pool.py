@@ -0,0 +1,204 @@
+import threading
+from functools import partial
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.states.preemptive_concurrency_state import PreemptiveConcurrencyState
+from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.execution.state_thread_pool import StateThreadPool, get_state_thread_pool
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def test_thread_reuse():
+    pool = StateThreadPool(4)
+    used_threads = set()
+
+    def remember_thread():
+        used_threads.add(threading.current_thread())
+
+    for _ in range(20):
+        pool.submit(remember_thread).join()
+
+    assert len(used_threads) == 1
+    assert pool.number_of_workers == 1
+    assert pool.number_of_overflow_runs == 0
+
+
+def test_overflow_does_not_block():
+    pool = StateThreadPool(1)
+    started_events = [threading.Event() for _ in range(3)]
+
+    def wait_for_all_others(own_event):
+        # like concurrent branches, the runs only finish if all of them are running at the same time
+        own_event.set()
+        for event in started_events:
+            assert event.wait(5)
+
+    handles = [pool.submit(partial(wait_for_all_others, event)) for event in started_events]
+    for handle in handles:
+        handle.join(5)
+        assert not handle.is_alive()
+
+    assert pool.number_of_workers == 1
+    assert pool.number_of_overflow_runs == 2
+
+
+COUNTER_SCRIPT = """
+def execute(self, inputs, outputs, gvm):
+    gvm.set_variable("counter", gvm.get_variable("counter") + 1)
+    return 0
+
+
+def backward_execute(self, inputs, outputs, gvm):
+    gvm.set_variable("counter", gvm.get_variable("counter") - 1)
+"""
+
+SLEEP_SCRIPT = """
+import time
+
+
+def execute(self, inputs, outputs, gvm):
+    time.sleep(0.2)
+    return 0
+"""
+
+PREEMPTABLE_SCRIPT = """
+def execute(self, inputs, outputs, gvm):
+    if self.preemptive_wait(5):
+        return -2
+    return 1
+"""
+
+
+def create_hierarchy_state(name, scripts):
+    hierarchy_state = HierarchyState(name)
+    last_state = None
+    for index, script_text in enumerate(scripts):
+        state = ExecutionState("{0}_state{1}".format(name, index))
+        state.script_text = script_text
+        state.add_outcome("other", 1)
+        hierarchy_state.add_state(state)
+        if last_state is None:
+            hierarchy_state.set_start_state(state)
+        else:
+            hierarchy_state.add_transition(last_state.state_id, 0, state.state_id, None)
+        last_state = state
+    hierarchy_state.add_transition(last_state.state_id, 0, hierarchy_state.state_id, 0)
+    return hierarchy_state
+
+
+def execute_state_machine(state_machine):
+    rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+    rafcon.core.singleton.state_machine_execution_engine.join()
+
+
+def test_pooled_execution(caplog):
+    testing_utils.initialize_environment_core(core_config={'STATE_EXECUTION_BACKEND': 'POOL'})
+    gvm = rafcon.core.singleton.global_variable_manager
+    try:
+        barrier_state = BarrierConcurrencyState("barrier")
+        barrier_state.states[UNIQUE_DECIDER_STATE_ID].script_text = COUNTER_SCRIPT
+        for i in range(3):
+            barrier_state.add_state(create_hierarchy_state("branch" + str(i), [COUNTER_SCRIPT] * 3))
+        barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+        state_machine = StateMachine(barrier_state)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+
+        for _ in range(2):
+            gvm.set_variable("counter", 0)
+            execute_state_machine(state_machine)
+            assert barrier_state.final_outcome.outcome_id == 0
+            assert gvm.get_variable("counter") == 10
+
+        # further runs must not create additional threads
+        number_of_workers = get_state_thread_pool().number_of_workers
+        execute_state_machine(state_machine)
+        assert get_state_thread_pool().number_of_workers == number_of_workers
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        testing_utils.reload_config(gui_config=False)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_pooled_preemption(caplog):
+    testing_utils.initialize_environment_core(core_config={'STATE_EXECUTION_BACKEND': 'POOL'})
+    gvm = rafcon.core.singleton.global_variable_manager
+    try:
+        preemptive_state = PreemptiveConcurrencyState("preemptive")
+        fast_branch = create_hierarchy_state("fast", [COUNTER_SCRIPT])
+        slow_branch = create_hierarchy_state("slow", [PREEMPTABLE_SCRIPT])
+        preemptive_state.add_state(fast_branch)
+        preemptive_state.add_state(slow_branch)
+        preemptive_state.add_transition(fast_branch.state_id, 0, preemptive_state.state_id, 0)
+        state_machine = StateMachine(preemptive_state)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+
+        gvm.set_variable("counter", 0)
+        execute_state_machine(state_machine)
+        assert preemptive_state.final_outcome.outcome_id == 0
+        assert gvm.get_variable("counter") == 1
+        # the slow branch is preempted while waiting or, if the fast branch finished first, before it runs
+        assert slow_branch.final_outcome.outcome_id == -2
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        testing_utils.reload_config(gui_config=False)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def run_pause_and_backward_steps(backend):
+    """Pauses, steps forward and backward and resumes an execution and returns the observed counter values"""
+    testing_utils.initialize_environment_core(core_config={'STATE_EXECUTION_BACKEND': backend})
+    gvm = rafcon.core.singleton.global_variable_manager
+    execution_engine = rafcon.core.singleton.state_machine_execution_engine
+    try:
+        root_state = create_hierarchy_state("root", [SLEEP_SCRIPT] + [COUNTER_SCRIPT] * 3)
+        state_machine = StateMachine(root_state)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        counter_values = []
+
+        # the paused execution waits before the next state
+        gvm.set_variable("counter", 0)
+        execution_engine.synchronization_counter = 0
+        execution_engine.start(state_machine.state_machine_id)
+        execution_engine.pause()
+        assert execution_engine.wait_for_parked_threads(1, timeout=5)
+        counter_values.append(gvm.get_variable("counter"))
+
+        # steps forward and backward from the pause
+        execution_engine.step_mode()
+        for step in (execution_engine.step_into, execution_engine.step_into, execution_engine.backward_step):
+            step()
+            assert execution_engine.wait_for_parked_threads(1, timeout=5)
+            counter_values.append(gvm.get_variable("counter"))
+
+        # resumes till the end
+        execution_engine.start()
+        execution_engine.join()
+        assert root_state.final_outcome.outcome_id == 0
+        counter_values.append(gvm.get_variable("counter"))
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        return counter_values
+    finally:
+        testing_utils.reload_config(gui_config=False)
+        testing_utils.shutdown_environment_only_core()
+
+
+def test_pooled_pause_and_backward_stepping():
+    counter_values = run_pause_and_backward_steps('POOL')
+    assert counter_values[:4] == [0, 1, 2, 1]
+    # the pooled execution has the same semantics as the execution with a thread per state
+    assert counter_values == run_pause_and_backward_steps('THREADS')
+
+
+if __name__ == '__main__':
+    test_thread_reuse()
+    test_overflow_does_not_block()
+    test_pooled_execution(None)
+    test_pooled_preemption(None)
+    test_pooled_pause_and_backward_stepping()
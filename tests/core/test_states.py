@@ -5,7 +5,8 @@ from pytest import raises
 from rafcon.core.states.execution_state import ExecutionState
 from rafcon.core.states.container_state import ContainerState
 from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
-from rafcon.core.states.state import InputDataPort
+from rafcon.core.states.state import InputDataPort, get_path_generation
+from rafcon.core.state_machine import StateMachine
 from tests.utils import assert_logger_warnings_and_errors
 from rafcon.utils import log
 logger = log.get_logger(__name__)
@@ -261,8 +262,81 @@ def test_port_and_outcome_removal(caplog):
     assert_logger_warnings_and_errors(caplog)
 
 
+def test_cached_paths(caplog):
+    root_state = ContainerState("root")
+    container = ContainerState("container")
+    state1 = ExecutionState("state1")
+    container.add_state(state1)
+    root_state.add_state(container)
+    state_machine = StateMachine(root_state)
+
+    path = "/".join([root_state.state_id, container.state_id, state1.state_id])
+    assert state1.get_path() == path
+    assert state1.get_path(by_name=True) == "root/container/state1"
+    assert state1.get_path("appendix") == path + "/appendix"
+    assert state_machine.get_state_by_path(path) is state1
+    assert state_machine.get_state_by_path(path) is state1
+
+    # renaming, reparenting and changing the id of a state invalidates the paths of all its descendants
+    container.name = "renamed"
+    assert state1.get_path(by_name=True) == "root/renamed/state1"
+    root_state.change_state_id()
+    path = "/".join([root_state.state_id, container.state_id, state1.state_id])
+    assert state1.get_path() == path
+    assert state1.get_storage_path().split("/")[0].endswith(root_state.state_id)
+    assert state_machine.get_state_by_path(path) is state1
+
+    container.remove_state(state1.state_id)
+    root_state.add_state(state1)
+    assert state1.get_path() == root_state.state_id + "/" + state1.state_id
+    assert state_machine.get_state_by_path(path, as_check=True) is None
+    assert state_machine.get_state_by_path(state1.get_path()) is state1
+
+    assert_logger_warnings_and_errors(caplog)
+
+
+def test_path_scopes(caplog):
+    root_state = ContainerState("root")
+    container = ContainerState("container")
+    state1 = ExecutionState("state1")
+    container.add_state(state1)
+    root_state.add_state(container)
+    state_machine = StateMachine(root_state)
+    other_root_state = ContainerState("other_root")
+    other_state = ExecutionState("other_state")
+    other_root_state.add_state(other_state)
+    other_state_machine = StateMachine(other_root_state)
+
+    path = state1.get_path()
+    assert state_machine.get_state_by_path(path) is state1
+    path_generation = get_path_generation(state1)
+    assert get_path_generation(root_state) == path_generation
+
+    # changes in another state machine do not invalidate the paths and the index of this one
+    other_state.name = "renamed"
+    other_root_state.change_state_id()
+    other_root_state.remove_state(other_state.state_id)
+    assert get_path_generation(state1) == path_generation
+    assert state_machine._state_path_index[0] == path_generation
+
+    # a removed subtree gets a scope of its own
+    root_state.remove_state(container.state_id, recursive=False, destroy=False)
+    assert get_path_generation(root_state) != path_generation
+    assert get_path_generation(state1) == get_path_generation(container) != get_path_generation(root_state)
+    assert state1.get_path() == container.state_id + "/" + state1.state_id
+    assert state_machine.get_state_by_path(path, as_check=True) is None
+
+    # and the one of the state machine it is added to
+    other_root_state.add_state(container)
+    assert get_path_generation(state1) == get_path_generation(other_root_state)
+    assert other_state_machine.get_state_by_path(state1.get_path()) is state1
+
+    assert_logger_warnings_and_errors(caplog)
+
+
 if __name__ == '__main__':
     test_create_state(None)
     test_port_and_outcome_removal(None)
+    test_cached_paths(None)
     test_create_container_state(None)
     # pytest.main([__file__])
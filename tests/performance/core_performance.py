@@ -9,11 +9,34 @@ from rafcon.core.states.preemptive_concurrency_state import PreemptiveConcurrenc
 from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
 from rafcon.core.state_elements.data_port import InputDataPort, OutputDataPort
 from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.core.config import global_config
 
 from rafcon.utils.timer import measure_time
+from rafcon.utils import log
+from timeit import default_timer as timer
 
 from tests import utils as testing_utils
 
+logger = log.get_logger(__name__)
+
+SLOW_MODULE_SCRIPT = """
+import time
+# simulates a costly initialization of the script module, e.g. by imports
+time.sleep({0})
+
+
+def execute(self, inputs, outputs, gvm):
+    return 0
+"""
+
+FAST_SCRIPT = """
+def execute(self, inputs, outputs, gvm):
+    if "input1" in inputs:
+        outputs["output1"] = inputs["input1"]
+    return 0
+"""
+
 
 @measure_time
 def create_hierarchy_state(number_child_states=10, sleep=False):
@@ -94,6 +117,26 @@ def test_barrier_concurrency_state_execution(number_child_states=10, number_chil
     execute_state(barrier_state)
 
 
+def test_barrier_concurrency_scaling(branch_counts=(1, 2, 4, 8, 16, 32, 64), number_childs_per_child=10):
+    """Executes barrier concurrency states with a growing number of branches
+
+    The branches do not serialize on the modification lock of the state machine, thus the execution time per state
+    should not grow with the number of branches.
+    """
+    for number_child_states in branch_counts:
+        barrier_state = create_barrier_concurrency_state(number_child_states, number_childs_per_child)
+        barrier_state.states[UNIQUE_DECIDER_STATE_ID].script_text = FAST_SCRIPT
+        for hierarchy_state in barrier_state.states.values():
+            if isinstance(hierarchy_state, HierarchyState):
+                for state in hierarchy_state.states.values():
+                    state.script_text = FAST_SCRIPT
+        start = timer()
+        execute_state(barrier_state)
+        duration = timer() - start
+        logger.verbose("Barrier concurrency with {0} branches: {1:.3}s, {2:.3}ms per state".format(
+            number_child_states, duration, duration / (number_child_states * number_childs_per_child) * 1000.))
+
+
 @measure_time
 def test_preemption_concurrency_state_execution(number_child_states=10, number_childs_per_child=10,
                                                 number_of_childs_fast_state=3):
@@ -113,6 +156,117 @@ def test_preemption_concurrency_state_execution(number_child_states=10, number_c
     execute_state(preemption_state)
 
 
+@measure_time
+def test_concurrent_script_compilation(number_child_states=50, module_initialization_time=0.02):
+    """Executes many execution states concurrently, whose script modules take long to be initialized
+
+    As the script modules are created in parallel, the initialization times of the modules do not add up.
+    """
+    barrier_state = BarrierConcurrencyState("barrier_concurrency")
+    for i in range(number_child_states):
+        state = ExecutionState("state" + str(i))
+        state.script_text = SLOW_MODULE_SCRIPT.format(module_initialization_time)
+        barrier_state.add_state(state)
+    barrier_state.add_transition(barrier_state.states[UNIQUE_DECIDER_STATE_ID].state_id, 0, barrier_state.state_id, 0)
+    execute_state(barrier_state)
+
+
+def test_production_profile(number_child_states=300, repetitions=3):
+    """Compares the execution times of a hierarchy state with fast child states with both execution profiles
+
+    With the production profile no history items are created and no observers are notified, thus the execution time
+    per state should be considerably lower.
+    """
+    hierarchy_state = create_hierarchy_state(number_child_states)
+    for state in hierarchy_state.states.values():
+        state.script_text = FAST_SCRIPT
+    try:
+        for profile in ("DEFAULT", "PRODUCTION"):
+            global_config.set_config_value("EXECUTION_PROFILE", profile)
+            durations = []
+            for _ in range(repetitions):
+                start = timer()
+                execute_state(hierarchy_state)
+                durations.append(timer() - start)
+            logger.verbose("Execution of {0} states with the {1} profile: {2:.3}s, {3:.3}ms per state".format(
+                number_child_states, profile, min(durations), min(durations) / number_child_states * 1000.))
+    finally:
+        global_config.set_config_value("EXECUTION_PROFILE", "DEFAULT")
+
+
+def test_state_machine_loading(number_child_states=10, number_childs_per_child=30, thread_counts=(0, 4),
+                               repetitions=3):
+    """Loads a saved state machine sequentially and with threads reading the state folders
+
+    The threads read the files and parse the json concurrently, only the objects are created sequentially.
+    """
+    state_machine = StateMachine(create_barrier_concurrency_state(number_child_states, number_childs_per_child))
+    storage_path = testing_utils.get_unique_temp_path()
+    storage.save_state_machine_to_path(state_machine, storage_path)
+    number_of_states = len(storage.read_state_folders_concurrently(state_machine.root_state.file_system_path, 0))
+    try:
+        for number_of_threads in thread_counts:
+            global_config.set_config_value("STATE_MACHINE_LOADING_THREADS", number_of_threads)
+            durations = []
+            for _ in range(repetitions):
+                start = timer()
+                storage.load_state_machine_from_path(storage_path)
+                durations.append(timer() - start)
+            logger.verbose("Loading {0} states with {1} threads: {2:.3}s, {3:.3}ms per state".format(
+                number_of_states, number_of_threads, min(durations), min(durations) / number_of_states * 1000.))
+    finally:
+        global_config.set_config_value("STATE_MACHINE_LOADING_THREADS", 0)
+
+
+def step_and_count_wakeups(commands, number_child_states, number_childs_per_child):
+    """Steps through a barrier concurrency state with the given commands per step and counts the wakeups"""
+    barrier_state = create_barrier_concurrency_state(number_child_states, number_childs_per_child)
+    barrier_state.states[UNIQUE_DECIDER_STATE_ID].script_text = FAST_SCRIPT
+    for hierarchy_state in barrier_state.states.values():
+        if isinstance(hierarchy_state, HierarchyState):
+            for state in hierarchy_state.states.values():
+                state.script_text = FAST_SCRIPT
+    state_machine = StateMachine(barrier_state)
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    execution_engine = rafcon.core.singleton.state_machine_execution_engine
+    execution_condition = execution_engine.status.execution_condition_variable
+    execution_engine.synchronization_counter = 0
+    execution_engine.step_mode(state_machine.state_machine_id)
+    execution_engine.wait_for_parked_threads(number_child_states)
+
+    number_of_commands = 0
+    number_of_parked_threads = 0
+    number_of_wakeups = execution_condition.number_of_wakeups
+    start = timer()
+    for _ in range(number_childs_per_child - 1):
+        for command in commands:
+            number_of_parked_threads += execution_condition.get_number_of_waiting_threads()
+            number_of_commands += 1
+            getattr(execution_engine, command)()
+        execution_engine.wait_for_parked_threads(number_child_states)
+    duration = timer() - start
+    number_of_wakeups = execution_condition.number_of_wakeups - number_of_wakeups
+    execution_engine.stop()
+    execution_engine.join()
+    rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    logger.verbose("Stepping {0} branches with {1}: {2:.3} wakeups per command ({3:.3} parked threads per command), "
+                   "{4:.3}ms per step".format(number_child_states, ", ".join(commands),
+                                              number_of_wakeups / float(number_of_commands),
+                                              number_of_parked_threads / float(number_of_commands),
+                                              duration / (number_childs_per_child - 1) * 1000.))
+
+
+def test_step_mode_wakeups(number_child_states=16, number_childs_per_child=10):
+    """Steps through a barrier concurrency state and counts the wakeups of the parked branches
+
+    Each step only wakes the parked branches, which continue with the new execution command. Toggling between pause
+    and step mode wakes no branch at all, whereas notifying all threads at a shared condition would wake every parked
+    branch for each command. Plain steps are measured as well, as reference: there each command wakes every parked
+    branch, as before.
+    """
+    step_and_count_wakeups(("step_into", ), number_child_states, number_childs_per_child)
+    step_and_count_wakeups(("pause", "step_mode", "step_into"), number_child_states, number_childs_per_child)
+
 if __name__ == '__main__':
     # test_hierarchy_state_execution(10)
     test_hierarchy_state_execution(100)
@@ -5,11 +5,9 @@ standard_library.install_aliases()
 import pytest
 
 import copy
-import datetime
 import signal
 import os
 import tempfile
-import time
 from os import mkdir, environ
 from os.path import join, dirname, realpath, exists, abspath
 from threading import Lock, Event, Thread, currentThread
@@ -529,15 +527,8 @@ def dummy_gui(caplog):
 def wait_for_execution_engine_sync_counter(target_value, logger, timeout=5):
     from rafcon.core.singleton import state_machine_execution_engine
     logger.debug("++++++++++ waiting for execution engine sync for " + str(target_value) + " steps ++++++++++")
-    current_time = datetime.datetime.now()
-    while True:
-        with state_machine_execution_engine._status.execution_condition_variable:
-            if state_machine_execution_engine.synchronization_counter == target_value:
-                state_machine_execution_engine.synchronization_counter = 0
-                break
-        if (datetime.datetime.now() - current_time).seconds > timeout:
-            raise RuntimeError("Something went wrong while waiting for states to finish!")
-        time.sleep(0.1)
+    if not state_machine_execution_engine.wait_for_parked_threads(target_value, timeout):
+        raise RuntimeError("Something went wrong while waiting for states to finish!")
 
 
 def focus_graphical_editor_in_page(page):